@@ -0,0 +1,98 @@
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo.collection import Collection
+
+import database
+from config import DB_EXECUTOR_WORKERS
+from metrics import Counter, Gauge, Histogram
+
+MONGO_OP_SECONDS = Histogram(
+    "tts_mongo_op_seconds", "Time spent in a MongoDB operation on the executor thread", ["op"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+MONGO_OP_ERRORS = Counter("tts_mongo_op_errors_total", "MongoDB operations that raised", ["op"])
+MONGO_EXECUTOR_WAIT_SECONDS = Histogram(
+    "tts_mongo_executor_wait_seconds", "Time a MongoDB operation waited for a free executor thread",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+MONGO_CONNECT_SECONDS = Gauge("tts_mongo_connect_seconds", "Time the startup MongoDB connect (client + ping) took")
+
+# pymongo က blocking ဖြစ်လို့ handler တွေကနေ ဒီ thread pool ပေါ်မှာပဲ run မယ်
+# (worker အရေအတွက်က Mongo ကို တစ်ပြိုင်နက် ပို့မယ့် request အရေအတွက်ကို ကန့်သတ်ပေးတယ်)
+_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="mongo")
+
+
+# Startup မှာ background နဲ့ ဖွင့်တဲ့ connection (None = connect() မခေါ်ရသေး)
+_ready = None
+
+
+def _connect():
+    started = time.perf_counter()
+    try:
+        database.connect()
+        logging.info(f"MongoDB connected in {time.perf_counter() - started:.2f}s")
+    except Exception:
+        # Operation တွေက ကိုယ်တိုင် server selection timeout နဲ့ error ပြမယ်
+        logging.exception("MongoDB Connect Error")
+    MONGO_CONNECT_SECONDS.set(time.perf_counter() - started)
+
+
+def connect():
+    """Mongo client + ပထမ connection ကို executor ပေါ်မှာ ဖွင့်မယ် (မစောင့်ဘူး၊ run_db က စောင့်မယ်)"""
+    global _ready
+    if _ready is None:
+        _ready = asyncio.get_running_loop().run_in_executor(_executor, _connect)
+    return _ready
+
+
+async def wait_ready():
+    if _ready is not None and not _ready.done():
+        await asyncio.shield(_ready)
+
+
+def _op_name(func):
+    """Metrics label: "users.find_one" for collection methods, function name otherwise"""
+    owner = getattr(func, "__self__", None)
+    if isinstance(owner, Collection):
+        return f"{owner.name}.{func.__name__}"
+    return getattr(func, "__qualname__", None) or repr(func)
+
+
+def _timed(op, submitted, func, *args, **kwargs):
+    started = time.perf_counter()
+    MONGO_EXECUTOR_WAIT_SECONDS.observe(started - submitted)
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        MONGO_OP_ERRORS.inc(op=op)
+        raise
+    finally:
+        MONGO_OP_SECONDS.observe(time.perf_counter() - started, op=op)
+
+
+async def run_db(func, *args, **kwargs):
+    """Sync pymongo function ကို event loop မပိတ်ဘဲ executor ပေါ်မှာ run ခြင်း"""
+    # Connect မပြီးသေးရင် executor thread တွေကို client lock မှာ မစောင့်စေဘဲ ဒီမှာ စောင့်မယ်
+    if _ready is not None and not _ready.done():
+        await asyncio.shield(_ready)
+    loop = asyncio.get_running_loop()
+    call = functools.partial(_timed, _op_name(func), time.perf_counter(), func, *args, **kwargs)
+    return await loop.run_in_executor(_executor, call)
+
+
+def shutdown():
+    _executor.shutdown(wait=True)
+
+
+async def export_users_csv(since=None, batch_size=1000, spool_max_bytes=8 * 1024 * 1024):
+    return await run_db(database.export_users_csv, since, batch_size, spool_max_bytes)
+
+async def get_last_export_time():
+    return await run_db(database.get_last_export_time)
+
+async def set_last_export_time(at):
+    return await run_db(database.set_last_export_time, at)
@@ -0,0 +1,130 @@
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+# Zero-width characters that Myanmar keyboards and copy-paste commonly leave behind
+_INVISIBLE_CHARS = re.compile("[\u200b\u2060\ufeff]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """အသံမပြောင်းလဲစေသော ကွာခြားချက်များ (unicode form, space) ကို ဖယ်ရှားခြင်း"""
+    text = unicodedata.normalize("NFC", text)
+    text = _INVISIBLE_CHARS.sub("", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def cache_key(text, voice, fmt="mp3"):
+    # MP3 key ကို မပြောင်းလို့ format မတိုင်ခင်က cache entry တွေ ဆက်သုံးလို့ရမယ်
+    prefix = voice if fmt == "mp3" else f"{voice}\x00{fmt}"
+    canonical = f"{prefix}\x00{normalize_text(text)}"
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Telegram file_id cache: in-process LRU in front of a MongoDB collection.
+
+    A hit means the audio was already uploaded once, so the bot can resend it
+    by file_id without synthesizing or uploading again.
+    """
+
+    def __init__(self, collection, run_db, max_items=5000, ttl_seconds=7 * 24 * 3600):
+        self.col = collection
+        self._run_db = run_db  # Mongo call တွေကို event loop အပြင်မှာ run ဖို့
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._lru = OrderedDict()  # key -> (file_id, stored_at)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.chars_saved = 0
+
+    def ensure_indexes(self):
+        # MongoDB TTL monitor က သက်တမ်းကုန်သော document များကို အလိုအလျောက် ဖျက်ပေးမယ်
+        try:
+            self.col.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+        except Exception:
+            logging.exception("Audio Cache Index Error")
+
+    def _remember(self, key, file_id, stored_at):
+        self._lru[key] = (file_id, stored_at)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    async def get(self, text, voice, fmt="mp3"):
+        """Cache ထဲမှာ ရှိရင် file_id ပြန်ပေးမယ်၊ မရှိရင် None"""
+        key = cache_key(text, voice, fmt)
+        now = time.time()
+
+        entry = self._lru.get(key)
+        if entry:
+            file_id, stored_at = entry
+            if now - stored_at < self.ttl_seconds:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                self.chars_saved += len(text)
+                return file_id
+            del self._lru[key]
+
+        try:
+            doc = await self._run_db(
+                self.col.find_one_and_update,
+                {"_id": key, "created_at": {"$gt": datetime.now() - timedelta(seconds=self.ttl_seconds)}},
+                {"$inc": {"hits": 1}, "$set": {"last_hit": datetime.now()}},
+                projection={"file_id": 1, "created_at": 1}
+            )
+        except Exception:
+            logging.exception("Audio Cache Lookup Error")
+            doc = None
+
+        if not doc:
+            self.misses += 1
+            return None
+
+        self._remember(key, doc["file_id"], doc["created_at"].timestamp())
+        self.hits += 1
+        self.chars_saved += len(text)
+        return doc["file_id"]
+
+    async def put(self, text, voice, file_id, fmt="mp3"):
+        key = cache_key(text, voice, fmt)
+        now = datetime.now()
+        self._remember(key, file_id, now.timestamp())
+        self.stores += 1
+        try:
+            await self._run_db(
+                self.col.update_one,
+                {"_id": key},
+                {
+                    "$set": {"file_id": file_id, "voice": voice, "format": fmt, "chars": len(text), "created_at": now},
+                    "$setOnInsert": {"hits": 0}
+                },
+                upsert=True
+            )
+        except Exception:
+            logging.exception("Audio Cache Store Error")
+
+    async def invalidate(self, text, voice, fmt="mp3"):
+        """Telegram က file_id ကို လက်မခံတော့ရင် ဖယ်ရှားမယ်"""
+        key = cache_key(text, voice, fmt)
+        self._lru.pop(key, None)
+        try:
+            await self._run_db(self.col.delete_one, {"_id": key})
+        except Exception:
+            logging.exception("Audio Cache Invalidate Error")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": (self.hits / lookups * 100) if lookups else 0.0,
+            "chars_saved": self.chars_saved,
+            "memory_items": len(self._lru),
+        }
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import shutil
+import tempfile
+
+from metrics import Counter, Histogram
+
+# edge-tts က audio-24khz-48kbitrate-mono-mp3 ကိုပဲ ပေးလို့ တခြား format တွေကို ffmpeg နဲ့ ပြောင်းမယ်
+AUDIO_FORMATS = {
+    "mp3": {"ffmpeg": None, "extension": "mp3", "voice_note": False},
+    "mp3_low": {
+        "ffmpeg": ["-c:a", "libmp3lame", "-b:a", "24k", "-ar", "24000", "-ac", "1", "-f", "mp3"],
+        "extension": "mp3",
+        "voice_note": False,
+    },
+    # Telegram voice note က OGG ထဲက Opus ကိုပဲ လက်ခံတယ်
+    "opus": {
+        "ffmpeg": ["-c:a", "libopus", "-b:a", "16k", "-application", "voip", "-f", "ogg"],
+        "extension": "ogg",
+        "voice_note": True,
+    },
+}
+DEFAULT_FORMAT = "mp3"
+
+TRANSCODE_SECONDS = Histogram("tts_transcode_seconds", "ffmpeg transcode time for one result", ["format"])
+TRANSCODE_FALLBACKS = Counter(
+    "tts_transcode_fallbacks_total", "Results sent as MP3 because transcoding failed", ["format"]
+)
+OUTPUT_BYTES = Counter("tts_output_bytes_total", "Bytes of delivered audio by output format", ["format"])
+OUTPUT_CHARS = Counter("tts_output_chars_total", "Characters synthesized by output format", ["format"])
+
+
+class AudioTranscoder:
+    """Converts edge-tts MP3 results into the user's output format with ffmpeg.
+
+    If ffmpeg is not installed every format resolves to MP3; if one
+    conversion fails that result is sent as MP3. Bytes and characters are
+    recorded per delivered format so defaults can be picked from data.
+    """
+
+    def __init__(self, ffmpeg_path="ffmpeg", spool_max_bytes=8 * 1024 * 1024, timeout=60):
+        self.ffmpeg_path = shutil.which(ffmpeg_path)
+        self.spool_max_bytes = spool_max_bytes
+        self.timeout = timeout
+        self.fallbacks = 0
+        self._totals = {}  # format -> {"results", "chars", "bytes"}
+
+        if not self.ffmpeg_path:
+            logging.warning(f"{ffmpeg_path} not found, all audio will be sent as MP3")
+
+    def resolve(self, fmt):
+        """ဒီ process မှာ တကယ်ထုတ်ပေးနိုင်မယ့် format"""
+        spec = AUDIO_FORMATS.get(fmt)
+        if spec is None or (spec["ffmpeg"] and not self.ffmpeg_path):
+            return DEFAULT_FORMAT
+        return fmt
+
+    async def _run(self, data, args):
+        process = await asyncio.create_subprocess_exec(
+            self.ffmpeg_path, "-hide_banner", "-loglevel", "error",
+            "-f", "mp3", "-i", "pipe:0", "-vn", *args, "pipe:1",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            output, errors = await asyncio.wait_for(process.communicate(data), self.timeout)
+        except BaseException:
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with {process.returncode}: {errors.decode(errors='replace')[-300:]}")
+        return output
+
+    async def convert(self, buffer, size, fmt, chars=0):
+        """MP3 buffer ကို fmt ပြောင်းမယ်
+
+        Returns (buffer, size, format). On success the input buffer is
+        closed and a new one returned; on failure the rewound input comes
+        back with format "mp3". The caller owns the returned buffer.
+        """
+        fmt = self.resolve(fmt)
+        args = AUDIO_FORMATS[fmt]["ffmpeg"]
+        if not args or not size:
+            self.record(fmt, chars, size)
+            return buffer, size, fmt
+
+        try:
+            with TRANSCODE_SECONDS.time(format=fmt):
+                data = await self._run(buffer.read(), args)
+            if not data:
+                raise RuntimeError("ffmpeg produced no audio")
+        except Exception:
+            logging.exception(f"Transcode to {fmt} failed, sending MP3")
+            self.fallbacks += 1
+            TRANSCODE_FALLBACKS.inc(format=fmt)
+            buffer.seek(0)
+            self.record(DEFAULT_FORMAT, chars, size)
+            return buffer, size, DEFAULT_FORMAT
+
+        converted = tempfile.SpooledTemporaryFile(
+            max_size=self.spool_max_bytes, suffix=f".{AUDIO_FORMATS[fmt]['extension']}"
+        )
+        converted.write(data)
+        converted.seek(0)
+        buffer.close()
+        self.record(fmt, chars, len(data))
+        return converted, len(data), fmt
+
+    def record(self, fmt, chars, size):
+        totals = self._totals.setdefault(fmt, {"results": 0, "chars": 0, "bytes": 0})
+        totals["results"] += 1
+        totals["chars"] += chars
+        totals["bytes"] += size
+        OUTPUT_CHARS.inc(chars, format=fmt)
+        OUTPUT_BYTES.inc(size, format=fmt)
+
+    def stats(self):
+        return {
+            "ffmpeg": bool(self.ffmpeg_path),
+            "fallbacks": self.fallbacks,
+            "formats": {
+                fmt: {**totals, "bytes_per_char": totals["bytes"] / totals["chars"] if totals["chars"] else 0.0}
+                for fmt, totals in self._totals.items()
+            },
+        }
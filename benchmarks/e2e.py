@@ -0,0 +1,443 @@
+"""Offline end-to-end benchmark for the real handlers in main.py.
+
+Runs main.build_application() with edge-tts, the Telegram Bot API and MongoDB
+replaced by local stand-ins (benchmarks/fake_edge_tts.py,
+benchmarks/fake_telegram.py and mongomock), replays synthetic workloads and
+prints throughput, latency percentiles, Telegram / Mongo calls per request
+and event loop lag for each one. No token, network or database is needed.
+
+    python benchmarks/e2e.py
+    python benchmarks/e2e.py --scenario long_texts --synth-ttfb 0.3
+    python benchmarks/e2e.py --scenario slow_mongo --mongo-latency 0.1
+    python benchmarks/e2e.py --scenario long_texts --progressive
+    python benchmarks/e2e.py --scenario many_users --synth-stall-rate 0.05 --hedge
+
+Scenarios:
+    many_users  one short, unique text per user at a steady arrival rate
+    bursty      bursts of repeated texts from a few users (audio cache hits)
+    long_texts  5k-15k character texts split into parallel chunks
+    broadcast   /broadcast to every active user
+    slow_mongo  many_users with every Mongo call delayed on its executor
+                thread; loop lag must stay low because handlers never call
+                pymongo on the event loop
+    aimd        scripted edge-tts (fast -> slow -> failing -> fast) and the
+                adaptive concurrency limit it produces
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_edge_tts import FakeSynthesizer  # noqa: E402
+from fake_telegram import FakeTelegram, make_message  # noqa: E402
+
+ADMIN_ID = 999999
+SENTENCES = [
+    "မင်္ဂလာပါ။",
+    "ဒီနေ့ ရာသီဥတု သာယာပါတယ်။",
+    "စာအုပ်ဖတ်ရတာ ဝါသနာပါပါတယ်၊ အထူးသဖြင့် ဝတ္ထုတွေပါ။",
+    "ရန်ကုန်မြို့ဟာ မြန်မာနိုင်ငံရဲ့ အကြီးဆုံးမြို့ ဖြစ်ပါတယ်။",
+    "Hello, this is a mixed language sentence.",
+]
+
+SCENARIOS = ["many_users", "bursty", "long_texts", "broadcast", "slow_mongo", "aimd"]
+
+
+def make_text(rng, chars, tag=""):
+    parts = [tag] if tag else []
+    length = len(tag)
+    while length < chars:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)] if values else 0.0
+
+
+class LoopMonitor:
+    """Event loop ပိတ်မိရင် sleep က နောက်ကျနိုးလို့ အဲဒီ lag ကို တိုင်းမယ်"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(time.perf_counter() - started - self.interval)
+
+    def start(self):
+        self.lags = []
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.fake_telegram = FakeTelegram(latency=args.api_latency)
+        self.synth = FakeSynthesizer(
+            ttfb=args.synth_ttfb, seconds_per_char=args.synth_seconds_per_char,
+            failure_rate=args.synth_failure_rate, seed=args.seed,
+            stall_rate=args.synth_stall_rate, stall_seconds=args.synth_stall_seconds
+        )
+        self.monitor = LoopMonitor()
+        self.next_user = 1
+        self.main = None
+        self.application = None
+
+    # --- Setup ---
+
+    async def start(self):
+        await self.fake_telegram.start()
+        self.synth.install()
+
+        state_dir = tempfile.mkdtemp(prefix="tts-bench-")
+        defaults = {
+            "BOT_TOKEN": "1:bench",
+            "MONGO_URI": "mongodb://bench",
+            "ADMIN_ID": str(ADMIN_ID),
+            "BOT_MODE": "polling",
+            "RATE_LIMIT_USER_BURST": "1000000",
+            "RATE_LIMIT_GLOBAL_RATE": "1000000",
+            "RATE_LIMIT_GLOBAL_BURST": "1000000",
+            "RATE_LIMIT_SNAPSHOT_PATH": os.path.join(state_dir, "rate_limits.json"),
+            "VOICE_CATALOG_PATH": os.path.join(state_dir, "voice_catalog.json"),
+            "QUEUE_MAX_SIZE": "100000",
+            "QUEUE_UPDATE_INTERVAL": "1",
+        }
+        for key, value in defaults.items():
+            os.environ.setdefault(key, value)
+        os.environ["TELEGRAM_BASE_URL"] = self.fake_telegram.base_url
+        if self.args.progressive:
+            os.environ["PROGRESSIVE_DELIVERY"] = "1"
+        if self.args.audio_format:
+            os.environ["DEFAULT_AUDIO_FORMAT"] = self.args.audio_format
+        if self.args.hedge:
+            os.environ["EDGE_TTS_HEDGE"] = "1"
+
+        # database.py က import လုပ်တာနဲ့ connect လုပ်လို့ import မတိုင်ခင် mongomock နဲ့ အစားထိုးမယ်
+        import mongomock
+        import pymongo
+        pymongo.MongoClient = mongomock.MongoClient
+
+        self.main = importlib.import_module("main")
+        self.async_db = importlib.import_module("async_db")
+        if not self.args.verbose:
+            logging.getLogger().setLevel(logging.CRITICAL)
+
+        main = self.main
+        main.audio_cache.ensure_indexes()
+        self.application = main.build_application()
+        main.web_server = importlib.import_module("webserver").BotWebServer(self.application, host="127.0.0.1", port=0)
+        await self.application.initialize()
+        await main.on_startup(self.application)
+        await self.application.start()
+
+    async def stop(self):
+        await self.application.stop()
+        await self.main.on_shutdown(self.application)
+        await self.application.shutdown()
+        self.synth.uninstall()
+        await self.fake_telegram.stop()
+
+    def install_mongo_latency(self, seconds):
+        """Mongo call တိုင်းကို executor thread ပေါ်မှာ seconds ကြာအောင် နှေးစေမယ်"""
+        original = self.async_db._timed
+
+        def slow(op, submitted, func, *args, **kwargs):
+            time.sleep(seconds)
+            return original(op, submitted, func, *args, **kwargs)
+
+        self.async_db._timed = slow
+        return lambda: setattr(self.async_db, "_timed", original)
+
+    # --- Measurement ---
+
+    def mongo_ops(self):
+        return sum(state["count"] for state in self.async_db.MONGO_OP_SECONDS._values.values())
+
+    def snapshot(self):
+        return dict(self.fake_telegram.calls), self.mongo_ops(), self.synth.calls
+
+    def users(self, count):
+        first = self.next_user
+        self.next_user += count
+        return list(range(first, first + count))
+
+    async def replay(self, arrivals):
+        """arrivals: [(offset_seconds, update_dict)]; returns per-request latencies"""
+        from telegram import Update
+
+        latencies = []
+
+        async def process(update):
+            started = time.perf_counter()
+            await self.application.process_update(Update.de_json(update, self.application.bot))
+            latencies.append(time.perf_counter() - started)
+
+        tasks = []
+        started = time.perf_counter()
+        for offset, update in sorted(arrivals, key=lambda item: item[0]):
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(process(update)))
+        await asyncio.gather(*tasks)
+        return latencies
+
+    def first_audio(self):
+        """FIRST_AUDIO_SECONDS histogram ရဲ့ (sum, count)"""
+        states = list(self.main.FIRST_AUDIO_SECONDS._values.values())
+        return sum(state["sum"] for state in states), sum(state["count"] for state in states)
+
+    async def measure(self, name, arrivals, settle=None):
+        before_calls, before_mongo, before_synth = self.snapshot()
+        before_first = self.first_audio()
+        before_policy = self.main.synthesis_policy.stats()
+        self.monitor.start()
+        started = time.perf_counter()
+        latencies = await self.replay(arrivals)
+        if settle:
+            await settle()
+        elapsed = time.perf_counter() - started
+        # Write-behind flush တွေကိုပါ ထည့်တွက်ဖို့
+        await self.main.profile_cache.flush()
+        await self.main.stats_service.flush()
+        await self.monitor.stop()
+        after_calls, after_mongo, after_synth = self.snapshot()
+        after_first = self.first_audio()
+        first_count = after_first[1] - before_first[1]
+        after_policy = self.main.synthesis_policy.stats()
+
+        requests = len(arrivals)
+        calls = {
+            method: after_calls.get(method, 0) - before_calls.get(method, 0)
+            for method in after_calls
+            if after_calls.get(method, 0) != before_calls.get(method, 0)
+        }
+        result = {
+            "scenario": name,
+            "requests": requests,
+            "seconds": elapsed,
+            "req_per_s": requests / elapsed if elapsed else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "telegram_per_req": sum(calls.values()) / requests,
+            "mongo_per_req": (after_mongo - before_mongo) / requests,
+            "edge_tts_calls": after_synth - before_synth,
+            "first_audio_mean": (after_first[0] - before_first[0]) / first_count if first_count else None,
+            "loop_lag_p99": percentile(self.monitor.lags, 99),
+            "loop_lag_max": max(self.monitor.lags, default=0.0),
+            "telegram_calls": calls,
+            "edge_tts_policy": {
+                key: after_policy[key] - before_policy[key]
+                for key in ("retried", "retries_denied", "timeouts", "hedges", "hedge_wins")
+            },
+        }
+        return result
+
+    def text_updates(self, user_texts, rate):
+        """(user_id, text) list ကို rate req/s နှုန်းနဲ့ ရောက်လာမယ့် arrival list"""
+        return [
+            (index / rate, self.fake_telegram.text_update(user_id, text))
+            for index, (user_id, text) in enumerate(user_texts)
+        ]
+
+    # --- Scenarios ---
+
+    async def many_users(self, name="many_users"):
+        count = self.args.requests
+        user_texts = [
+            (user_id, make_text(self.rng, self.args.text_chars, f"#{user_id}"))
+            for user_id in self.users(count)
+        ]
+        return await self.measure(name, self.text_updates(user_texts, self.args.rate))
+
+    async def bursty(self):
+        users = self.users(self.args.burst_users)
+        phrases = [make_text(self.rng, self.args.text_chars, f"phrase{i}") for i in range(self.args.burst_phrases)]
+        arrivals = []
+        for burst in range(self.args.bursts):
+            for _ in range(self.args.burst_size):
+                update = self.fake_telegram.text_update(self.rng.choice(users), self.rng.choice(phrases))
+                arrivals.append((burst * self.args.burst_interval, update))
+        return await self.measure("bursty", arrivals)
+
+    async def long_texts(self):
+        user_texts = [
+            (user_id, make_text(self.rng, self.rng.randint(5000, 15000), f"#{user_id}"))
+            for user_id in self.users(self.args.long_requests)
+        ]
+        return await self.measure("long_texts", self.text_updates(user_texts, self.args.long_rate))
+
+    async def broadcast(self):
+        main = self.main
+        recipients = self.users(self.args.broadcast_users)
+        main.users_col.insert_many([
+            {"_id": user_id, "first_name": f"User{user_id}", "status": "active",
+             "voice_preference": main.DEFAULT_VOICE, "generated_count": 0}
+            for user_id in recipients
+        ])
+        original = make_message(1, ADMIN_ID, "Broadcast benchmark message")
+        update = {
+            "update_id": 0,
+            "message": make_message(
+                2, ADMIN_ID, "/broadcast",
+                entities=[{"type": "bot_command", "offset": 0, "length": 10}],
+                reply_to_message=original
+            ),
+        }
+
+        async def settle():
+            # Handler က background task စပြီး ချက်ချင်းပြန်လာလို့ task ပြီးတဲ့အထိ စောင့်မယ်
+            while main.broadcast_engine._tasks:
+                await asyncio.sleep(0.05)
+
+        result = await self.measure("broadcast", [(0, update)], settle)
+        active = main.users_col.count_documents({"status": "active"})
+        # Request တစ်ခုတည်းမို့ per-recipient နဲ့ ပြမယ်
+        result.update(
+            requests=active,
+            req_per_s=active / result["seconds"],
+            telegram_per_req=result["telegram_per_req"] / active,
+            mongo_per_req=result["mongo_per_req"] / active,
+        )
+        return result
+
+    async def slow_mongo(self):
+        restore = self.install_mongo_latency(self.args.mongo_latency)
+        try:
+            return await self.many_users("slow_mongo")
+        finally:
+            restore()
+
+    async def aimd(self):
+        controller = self.main.concurrency_controller
+        self.main.synthesis_observer = controller.record
+        # Benchmark ကြာချိန်တိုအောင် target / cooldown ကို လျှော့ထားမယ်
+        controller.latency_target = self.args.aimd_target
+        controller.decrease_cooldown = 0.5
+        history_before = len(controller.history)
+
+        fast = self.args.aimd_target / 1000 / 8
+        slow = self.args.aimd_target / 1000 * 3
+        phases = [(60, fast, 0.0), (40, slow, 0.0), (40, fast, 0.5), (100, fast, 0.0)]
+
+        def script(synth):
+            index = synth.calls - self._aimd_first_call
+            for calls, seconds_per_char, failure_rate in phases:
+                if index < calls:
+                    return 0.02, seconds_per_char, self.rng.random() < failure_rate
+                index -= calls
+            return 0.02, fast, False
+
+        self._aimd_first_call = self.synth.calls
+        self.synth.script = script
+        try:
+            count = sum(calls for calls, _, _ in phases)
+            user_texts = [
+                (user_id, make_text(self.rng, self.args.text_chars, f"#{user_id}"))
+                for user_id in self.users(count)
+            ]
+            result = await self.measure("aimd", self.text_updates(user_texts, self.args.rate))
+        finally:
+            self.synth.script = None
+
+        history = list(controller.history)[history_before:]
+        result["aimd_history"] = [(old, new, reason) for _, old, new, reason in history]
+        result["aimd_final_limit"] = controller.limit
+        return result
+
+
+def print_result(result):
+    print(
+        f"{result['scenario']:<11} n={result['requests']:<5} {result['req_per_s']:7.1f} req/s  "
+        f"p50={result['p50'] * 1000:7.1f}ms p95={result['p95'] * 1000:7.1f}ms p99={result['p99'] * 1000:7.1f}ms  "
+        f"tg/req={result['telegram_per_req']:5.2f} mongo/req={result['mongo_per_req']:5.2f}  "
+        f"edge-tts={result['edge_tts_calls']:<5} "
+        f"loop lag p99/max={result['loop_lag_p99'] * 1000:5.1f}/{result['loop_lag_max'] * 1000:5.1f}ms"
+    )
+    print(f"{'':<11} telegram: {json.dumps(result['telegram_calls'], sort_keys=True)}")
+    if any(result["edge_tts_policy"].values()):
+        print(f"{'':<11} edge-tts policy: {json.dumps(result['edge_tts_policy'], sort_keys=True)}")
+    if result["first_audio_mean"] is not None:
+        print(f"{'':<11} first audio after (mean): {result['first_audio_mean'] * 1000:.1f}ms")
+    if "aimd_history" in result:
+        history = result["aimd_history"]
+        path = "->".join(str(limit) for limit in [history[0][0]] + [new for _, new, _ in history]) if history else "-"
+        decreases = [reason.split(" ")[0] for old, new, reason in history if new < old]
+        print(
+            f"{'':<11} limit path: {path} (final {result['aimd_final_limit']}; "
+            f"{len(history) - len(decreases)} increases, {decreases.count('slow')} slow / "
+            f"{decreases.count('error')} error decreases)"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=SCENARIOS + ["all"], default="all")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=200, help="many_users / slow_mongo requests")
+    parser.add_argument("--rate", type=float, default=40, help="arrivals per second")
+    parser.add_argument("--text-chars", type=int, default=200)
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--burst-size", type=int, default=50)
+    parser.add_argument("--burst-interval", type=float, default=2.0)
+    parser.add_argument("--burst-users", type=int, default=20)
+    parser.add_argument("--burst-phrases", type=int, default=10)
+    parser.add_argument("--long-requests", type=int, default=20)
+    parser.add_argument("--long-rate", type=float, default=2)
+    parser.add_argument("--broadcast-users", type=int, default=250)
+    parser.add_argument("--mongo-latency", type=float, default=0.05, help="slow_mongo delay per call (s)")
+    parser.add_argument("--aimd-target", type=float, default=1.0, help="aimd latency target (s per 1k chars)")
+    parser.add_argument("--synth-ttfb", type=float, default=0.1)
+    parser.add_argument("--synth-seconds-per-char", type=float, default=0.0005)
+    parser.add_argument("--synth-failure-rate", type=float, default=0.0)
+    parser.add_argument("--synth-stall-rate", type=float, default=0.0, help="share of edge-tts calls that stall")
+    parser.add_argument("--synth-stall-seconds", type=float, default=5.0, help="time to first byte of a stalled call")
+    parser.add_argument("--hedge", action="store_true", help="run with EDGE_TTS_HEDGE=1")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="fake Bot API delay per call (s)")
+    parser.add_argument("--progressive", action="store_true", help="run with PROGRESSIVE_DELIVERY=1")
+    parser.add_argument("--audio-format", help="DEFAULT_AUDIO_FORMAT for every user (needs ffmpeg)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    parser.add_argument("--verbose", action="store_true", help="keep the bot's log output")
+    args = parser.parse_args()
+
+    bench = Bench(args)
+    await bench.start()
+    try:
+        for name in SCENARIOS if args.scenario == "all" else [args.scenario]:
+            result = await getattr(bench, name)()
+            if args.json:
+                print(json.dumps(result, sort_keys=True))
+            else:
+                print_result(result)
+    finally:
+        await bench.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,207 @@
+"""edge-tts time to first audio byte: fresh connections vs. EdgeConnectionPool.
+
+Starts a local TLS websocket stand-in for the speech service behind a relay
+that delays every packet by half the given round-trip time, points edge-tts
+at it (WSS_URL / _SSL_CTX) and runs the real synthesis._stream_audio with and
+without the pool. Needs the openssl command for the self-signed certificate.
+
+    python benchmarks/edge_tts_ttfb.py --requests 30 --rtt 0.05
+"""
+import argparse
+import asyncio
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from aiohttp import WSMsgType, web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import edge_tts.communicate as edge_communicate  # noqa: E402
+
+from edge_pool import EdgeConnectionPool  # noqa: E402
+from fake_edge_tts import FRAME  # noqa: E402
+import synthesis  # noqa: E402
+
+TEXT = "မင်္ဂလာပါ။ ဒီနေ့ ရာသီဥတု သာယာပါတယ်။"
+VOICE = "my-MM-ThihaNeural"
+
+
+def make_certificate(directory):
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", key, "-out", cert, "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1"],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+class SpeechStandIn:
+    """Minimal speech service: answers one SSML request per websocket with audio frames"""
+
+    def __init__(self, frames=20, frame_delay=0.001):
+        self.frames = frames
+        self.frame_delay = frame_delay
+        self.websockets = 0
+        self.app = web.Application()
+        self.app.router.add_route("*", "/{tail:.*}", self.handle)
+
+    async def handle(self, request):
+        if request.headers.get("Upgrade", "").lower() != "websocket":
+            return web.Response(status=404)
+        self.websockets += 1
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        messages = 0
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+            messages += 1
+            if messages < 2:  # speech.config, then the SSML request
+                continue
+            await ws.send_str("X-RequestId:bench\r\nContent-Type:application/json; charset=utf-8\r\nPath:turn.start\r\n\r\n{}")
+            header = b"X-RequestId:bench\r\nContent-Type:audio/mpeg\r\nPath:audio\r\n"
+            for _ in range(self.frames):
+                await ws.send_bytes(len(header).to_bytes(2, "big") + header + FRAME)
+                await asyncio.sleep(self.frame_delay)
+            await ws.send_str("X-RequestId:bench\r\nContent-Type:application/json; charset=utf-8\r\nPath:turn.end\r\n\r\n{}")
+            break
+        await ws.close()
+        return ws
+
+
+class LatencyRelay:
+    """TCP relay that delays each direction by rtt / 2 (simulates the network link)"""
+
+    def __init__(self, upstream_port, rtt):
+        self.upstream_port = upstream_port
+        self.delay = rtt / 2
+        self.server = None
+        self.connections = 0
+
+    async def _pipe(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        async def read():
+            while data := await reader.read(65536):
+                queue.put_nowait((loop.time() + self.delay, data))
+            queue.put_nowait((loop.time() + self.delay, None))
+
+        async def write():
+            while True:
+                due, data = await queue.get()
+                await asyncio.sleep(max(due - loop.time(), 0))
+                if data is None:
+                    break
+                writer.write(data)
+                await writer.drain()
+            writer.close()
+
+        try:
+            await asyncio.gather(read(), write())
+        except (ConnectionError, OSError):
+            writer.close()
+
+    async def _handle(self, client_reader, client_writer):
+        self.connections += 1
+        upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", self.upstream_port)
+        try:
+            await asyncio.gather(
+                self._pipe(client_reader, upstream_writer),
+                self._pipe(upstream_reader, client_writer),
+            )
+        except asyncio.CancelledError:
+            # Benchmark ပြီးလို့ loop ပိတ်တဲ့အခါ ကျန်နေတဲ့ pooled connection တွေ
+            client_writer.close()
+            upstream_writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+
+
+class FirstByteSink:
+    def __init__(self):
+        self.first_write = None
+        self.size = 0
+
+    def write(self, data):
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        self.size += len(data)
+
+
+async def measure(count, gap, pool=None):
+    ttfbs = []
+    for _ in range(count):
+        sink = FirstByteSink()
+        started = time.perf_counter()
+        await synthesis._stream_audio(TEXT, VOICE, sink, pool=pool)
+        ttfbs.append(sink.first_write - started)
+        # Pool က နောက် connection ကို background မှာ ပြန်ဖွင့်ဖို့ အချိန်
+        await asyncio.sleep(gap)
+    return ttfbs
+
+
+def report(name, values, relay_connections):
+    ms = sorted(value * 1000 for value in values)
+    print(
+        f"{name:<9} n={len(ms):<4} mean={statistics.mean(ms):7.1f}ms p50={ms[len(ms) // 2]:7.1f}ms "
+        f"p95={ms[min(int(len(ms) * 0.95), len(ms) - 1)]:7.1f}ms  tcp connections={relay_connections}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--rtt", type=float, default=0.05, help="simulated round-trip time (s)")
+    parser.add_argument("--gap", type=float, default=0.2, help="pause between requests (s)")
+    parser.add_argument("--pool-size", type=int, default=2)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="edge-ttfb-")
+    cert, key = make_certificate(directory)
+    server_ssl = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_ssl.load_cert_chain(cert, key)
+
+    standin = SpeechStandIn()
+    runner = web.AppRunner(standin.app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=server_ssl)
+    await site.start()
+    relay = LatencyRelay(site._server.sockets[0].getsockname()[1], args.rtt)
+    relay_port = await relay.start()
+
+    # edge-tts ကို local stand-in ဆီ ညွှန်မယ်
+    edge_communicate.WSS_URL = f"wss://127.0.0.1:{relay_port}/consumer/speech/synthesize/readaloud/edge/v1?TrustedClientToken=bench"
+    edge_communicate._SSL_CTX = ssl.create_default_context(cafile=cert)
+
+    try:
+        print(f"simulated RTT {args.rtt * 1000:.0f}ms, {args.requests} sequential requests")
+        unpooled = await measure(args.requests, args.gap)
+        report("unpooled", unpooled, relay.connections)
+
+        relay.connections = 0
+        pool = EdgeConnectionPool(size=args.pool_size, idle_timeout=30)
+        pool.start()
+        await pool.warm()
+        pooled = await measure(args.requests, args.gap, pool)
+        report("pooled", pooled, relay.connections)
+        print(f"pool stats: {pool.stats()}")
+        await pool.stop()
+    finally:
+        await relay.stop()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
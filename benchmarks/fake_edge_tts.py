@@ -0,0 +1,112 @@
+"""Local stand-in for edge-tts, used by the benchmarks.
+
+``FakeSynthesizer().install()`` replaces ``edge_tts.Communicate`` with a fake
+that streams silent MP3 frames in the same format edge-tts returns
+(24 kHz, 48 kbit/s, mono) after a configurable time to first byte, with a
+configurable per-character speed and failure rate; with ``stall_rate`` a
+request waits ``stall_seconds`` before its first byte instead. ``script`` can be set to a
+callable(synth) -> (ttfb, seconds_per_char, fail) to replay a latency pattern.
+``edge_tts.list_voices`` is replaced too and returns VOICES.
+"""
+import asyncio
+import random
+
+import edge_tts
+
+# MPEG-2 Layer III, 48 kbit/s, 24 kHz, mono: 144-byte frames of 24 ms each
+FRAME = bytes([0xFF, 0xF3, 0x64, 0xC0]) + bytes(140)
+FRAME_SECONDS = 0.024
+# Myanmar speech at normal speed (characters of text per second of audio)
+CHARS_PER_SECOND = 15
+FRAMES_PER_CHUNK = 40
+
+VOICES = [
+    {"ShortName": short_name, "Gender": gender, "Locale": short_name.rsplit("-", 1)[0]}
+    for short_name, gender in [
+        ("my-MM-ThihaNeural", "Male"), ("my-MM-NilarNeural", "Female"),
+        ("en-US-AndrewNeural", "Male"), ("en-US-AvaNeural", "Female"), ("en-US-EmmaNeural", "Female"),
+        ("en-GB-RyanNeural", "Male"), ("en-GB-SoniaNeural", "Female"),
+        ("th-TH-NiwatNeural", "Male"), ("th-TH-PremwadeeNeural", "Female"),
+        ("zh-CN-YunxiNeural", "Male"), ("zh-CN-XiaoxiaoNeural", "Female"),
+    ]
+]
+
+
+class _FakeCommunicate:
+    def __init__(self, synth, text, voice):
+        self.synth = synth
+        self.text = text
+        self.voice = voice
+
+    async def stream(self):
+        synth = self.synth
+        synth.calls += 1
+        synth.chars += len(self.text)
+        ttfb, seconds_per_char, fail = synth.profile()
+
+        synth.active += 1
+        synth.peak_active = max(synth.peak_active, synth.active)
+        try:
+            await asyncio.sleep(ttfb)
+            if fail:
+                synth.failures += 1
+                raise edge_tts.exceptions.NoAudioReceived("fake edge-tts failure")
+
+            frames = max(1, int(len(self.text) / CHARS_PER_SECOND / FRAME_SECONDS))
+            duration = len(self.text) * seconds_per_char
+            for start in range(0, frames, FRAMES_PER_CHUNK):
+                count = min(FRAMES_PER_CHUNK, frames - start)
+                yield {"type": "audio", "data": FRAME * count}
+                await asyncio.sleep(duration * count / frames)
+            yield {"type": "WordBoundary", "offset": 0, "duration": 0, "text": ""}
+        finally:
+            synth.active -= 1
+
+
+class FakeSynthesizer:
+    def __init__(self, ttfb=0.1, seconds_per_char=0.0005, failure_rate=0.0, seed=0, stall_rate=0.0, stall_seconds=5.0):
+        self.ttfb = ttfb
+        self.seconds_per_char = seconds_per_char
+        self.failure_rate = failure_rate
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.script = None
+        self._random = random.Random(seed)
+        self._original = None
+        self._original_list_voices = None
+
+        self.calls = 0
+        self.chars = 0
+        self.failures = 0
+        self.stalls = 0
+        self.active = 0
+        self.peak_active = 0
+
+    def profile(self):
+        if self.script:
+            return self.script(self)
+        ttfb = self.ttfb
+        if self.stall_rate and self._random.random() < self.stall_rate:
+            self.stalls += 1
+            ttfb = self.stall_seconds
+        return ttfb, self.seconds_per_char, self._random.random() < self.failure_rate
+
+    def __call__(self, text, voice, **kwargs):
+        return _FakeCommunicate(self, text, voice)
+
+    async def list_voices(self, **kwargs):
+        await asyncio.sleep(self.ttfb)
+        return [dict(voice) for voice in VOICES]
+
+    def install(self):
+        self._original = edge_tts.Communicate
+        self._original_list_voices = edge_tts.list_voices
+        edge_tts.Communicate = self
+        edge_tts.list_voices = self.list_voices
+        return self
+
+    def uninstall(self):
+        if self._original is not None:
+            edge_tts.Communicate = self._original
+            edge_tts.list_voices = self._original_list_voices
+            self._original = None
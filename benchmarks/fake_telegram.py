@@ -0,0 +1,150 @@
+"""Local stand-in for the Telegram Bot API, used by the benchmarks.
+
+Point an Application at it with ``.base_url(server.base_url)``. Updates pushed
+with ``push_update()`` are served to getUpdates long polls; every other method
+is recorded in ``calls`` and answered with a plausible result.
+"""
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+
+from aiohttp import web
+
+BOT_USER = {"id": 1000, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+
+
+def make_user(user_id):
+    return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"}
+
+
+def make_message(message_id, user_id, text=None, **extra):
+    message = {
+        "message_id": message_id,
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": make_user(user_id),
+    }
+    if text is not None:
+        message["text"] = text
+    message.update(extra)
+    return message
+
+
+class FakeTelegram:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency  # Bot API round trip တစ်ခုချင်းစီကို simulate လုပ်ဖို့
+        self.calls = Counter()
+        self.call_log = []
+        self._updates = asyncio.Queue()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._runner = None
+
+        self.app = web.Application(client_max_size=100 * 1024 * 1024)
+        self.app.router.add_route("*", "/bot{token}/{method}", self.handle)
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/bot"
+
+    def push_update(self, update):
+        update.setdefault("update_id", next(self._update_ids))
+        self._updates.put_nowait(update)
+        return update["update_id"]
+
+    def text_update(self, user_id, text):
+        return {"update_id": next(self._update_ids), "message": make_message(next(self._message_ids), user_id, text)}
+
+    async def _params(self, request):
+        if request.content_type == "application/json":
+            return await request.json()
+        if request.content_type.startswith("multipart/"):
+            params = {}
+            async for part in await request.multipart():
+                data = await part.read()
+                params[part.name] = data if part.filename else data.decode("utf-8", "replace")
+            return params
+        return dict(await request.post())
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        params = await self._params(request)
+        if method != "getUpdates":
+            self.calls[method] += 1
+            self.call_log.append((time.perf_counter(), method, params))
+        result = await getattr(self, f"_{method}", self._default)(params)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response({"ok": True, "result": result})
+
+    async def _getMe(self, params):
+        return BOT_USER
+
+    async def _getUpdates(self, params):
+        timeout = float(params.get("timeout", 0) or 0)
+        updates = []
+        try:
+            updates.append(await asyncio.wait_for(self._updates.get(), timeout=max(timeout, 0.01)))
+        except asyncio.TimeoutError:
+            return []
+        while not self._updates.empty():
+            updates.append(self._updates.get_nowait())
+        return updates
+
+    async def _default(self, params):
+        # deleteWebhook / setWebhook / answerCallbackQuery / sendChatAction ...
+        return True
+
+    def _sent_message(self, params, **extra):
+        chat_id = int(params.get("chat_id", 0))
+        message = make_message(next(self._message_ids), chat_id, **extra)
+        message["from"] = BOT_USER
+        return message
+
+    async def _sendMessage(self, params):
+        return self._sent_message(params, text=params.get("text", ""))
+
+    async def _editMessageText(self, params):
+        return self._sent_message(params, text=params.get("text", ""))
+
+    async def _deleteMessage(self, params):
+        return True
+
+    async def _sendAudio(self, params):
+        file_id = f"audio{next(self._file_ids)}"
+        audio = {"file_id": file_id, "file_unique_id": file_id, "duration": 1}
+        return self._sent_message(params, audio=audio)
+
+    async def _sendVoice(self, params):
+        file_id = f"voice{next(self._file_ids)}"
+        voice = {"file_id": file_id, "file_unique_id": file_id, "duration": 1}
+        return self._sent_message(params, voice=voice)
+
+    async def _sendDocument(self, params):
+        file_id = f"doc{next(self._file_ids)}"
+        document = {"file_id": file_id, "file_unique_id": file_id}
+        return self._sent_message(params, document=document)
+
+    async def _sendPhoto(self, params):
+        file_id = f"photo{next(self._file_ids)}"
+        photo = [{"file_id": file_id, "file_unique_id": file_id, "width": 1, "height": 1}]
+        return self._sent_message(params, photo=photo)
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def dump_calls(self):
+        return json.dumps(dict(self.calls), sort_keys=True)
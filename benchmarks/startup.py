@@ -0,0 +1,144 @@
+"""Cold start benchmark: import time and time to the first handled update.
+
+Each run starts a fresh `python` process that imports main.py and runs
+main.main() in polling mode against benchmarks/fake_telegram.py, with
+MongoDB replaced by mongomock whose client constructor sleeps for
+--mongo-connect (the DNS SRV lookup + TLS handshake to Atlas it stands in
+for). A /start update is queued before the process starts, so "first reply"
+is the time from spawning the process until the bot's first sendMessage.
+
+    python benchmarks/startup.py --runs 5 --mongo-connect 0.8
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(mongo_connect):
+    """Bot process: mongomock ကို အစားထိုးပြီး main.main() ကို run မယ်"""
+    started = time.perf_counter()
+    import mongomock
+    import pymongo
+
+    class SlowClient(mongomock.MongoClient):
+        def __init__(self, *args, **kwargs):
+            time.sleep(mongo_connect)
+            super().__init__()
+
+    pymongo.MongoClient = SlowClient
+    patched = time.perf_counter()
+
+    import main
+    imported = time.perf_counter()
+    print(json.dumps({"import": imported - patched, "setup": patched - started}), flush=True)
+    main.main()
+
+
+async def run_once(args, state_dir):
+    from fake_telegram import FakeTelegram
+
+    # Run တစ်ခုစီမှာ fake အသစ်သုံးမယ် (ပိတ်သွားတဲ့ process ရဲ့ long-poll getUpdates က နောက် run ရဲ့ update ကို မယူမိအောင်)
+    fake_telegram = FakeTelegram()
+    first_poll = []
+    original_get_updates = fake_telegram._getUpdates
+
+    async def get_updates(params):
+        if not first_poll:
+            first_poll.append(time.perf_counter())
+        return await original_get_updates(params)
+
+    fake_telegram._getUpdates = get_updates
+    await fake_telegram.start()
+    update = fake_telegram.text_update(4242, "/start")
+    update["message"]["entities"] = [{"type": "bot_command", "offset": 0, "length": 6}]
+    fake_telegram.push_update(update)
+    env = {
+        **os.environ,
+        "BOT_TOKEN": "1:bench",
+        "MONGO_URI": "mongodb://bench",
+        "ADMIN_ID": "999999",
+        "BOT_MODE": "polling",
+        "PORT": "0",
+        "TELEGRAM_BASE_URL": fake_telegram.base_url,
+        "RATE_LIMIT_SNAPSHOT_PATH": os.path.join(state_dir, "rate_limits.json"),
+        "VOICE_CATALOG_PATH": os.path.join(state_dir, "voice_catalog.json"),
+        "EDGE_TTS_POOL_SIZE": "0",
+    }
+    spawned = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.abspath(__file__), "--child", "--mongo-connect", str(args.mongo_connect),
+        cwd=ROOT, env=env, stdout=asyncio.subprocess.PIPE,
+        stderr=None if args.verbose else asyncio.subprocess.DEVNULL
+    )
+    try:
+        timings = json.loads(await asyncio.wait_for(process.stdout.readline(), args.timeout))
+        first_reply = None
+        deadline = spawned + args.timeout
+        while first_reply is None and time.perf_counter() < deadline:
+            for at, method, _ in fake_telegram.call_log:
+                if method == "sendMessage":
+                    first_reply = at - spawned
+                    break
+            await asyncio.sleep(0.002)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), 10)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        await fake_telegram.stop()
+    return {**timings, "first_poll": first_poll[0] - spawned if first_poll else None, "first_reply": first_reply}
+
+
+def summary(name, values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return f"{name}: -"
+    ms = sorted(value * 1000 for value in values)
+    return f"{name}: median {statistics.median(ms):7.1f}ms (min {ms[0]:.1f}, max {ms[-1]:.1f})"
+
+
+async def main(args):
+    from fake_edge_tts import VOICES
+
+    state_dir = tempfile.mkdtemp(prefix="tts-startup-")
+    # Voice catalog snapshot ကို ကြိုထည့်ထားလို့ bot က edge-tts ဆီ network မခေါ်ဘူး
+    with open(os.path.join(state_dir, "voice_catalog.json"), "w", encoding="utf-8") as f:
+        json.dump({"fetched_at": time.time(), "voices": VOICES}, f)
+
+    results = [await run_once(args, state_dir) for _ in range(args.runs)]
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result, sort_keys=True))
+        return
+    print(f"{args.runs} cold starts, simulated Mongo connect {args.mongo_connect * 1000:.0f}ms")
+    print(summary("import main      ", [r["import"] for r in results]))
+    print(summary("first getUpdates ", [r["first_poll"] for r in results]))
+    print(summary("first reply      ", [r["first_reply"] for r in results]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mongo-connect", type=float, default=0.5, help="simulated MongoClient connect time (s)")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", action="store_true", help="print each run as a JSON line")
+    parser.add_argument("--verbose", action="store_true", help="show the bot's log output")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.mongo_connect)
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,121 @@
+"""Update-to-handler latency: long polling vs. webhook delivery.
+
+Runs both delivery modes against the local fake Bot API (no token, no
+network) and prints latency percentiles from the moment an update is
+produced until the handler sees it.
+
+    python benchmarks/update_latency.py --updates 500 --interval 0.005
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from telegram.ext import Application, MessageHandler, filters
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_telegram import FakeTelegram  # noqa: E402
+from webserver import BotWebServer  # noqa: E402
+
+WEBHOOK_PATH = "/telegram"
+WEBHOOK_SECRET = "bench-secret"
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def build_app(fake, count, latencies, done):
+    async def handler(update, context):
+        latencies.append(time.perf_counter() - float(update.message.text))
+        if len(latencies) >= count:
+            done.set()
+
+    application = (
+        Application.builder()
+        .token("1:bench")
+        .base_url(fake.base_url)
+        .concurrent_updates(64)
+        .build()
+    )
+    application.add_handler(MessageHandler(filters.TEXT, handler))
+    return application
+
+
+async def bench_polling(fake, count, interval):
+    latencies, done = [], asyncio.Event()
+    application = build_app(fake, count, latencies, done)
+    async with application:
+        await application.updater.start_polling(poll_interval=0, timeout=10)
+        await application.start()
+        for user_id in range(count):
+            fake.push_update(fake.text_update(user_id, repr(time.perf_counter())))
+            await asyncio.sleep(interval)
+        await asyncio.wait_for(done.wait(), timeout=60)
+        await application.updater.stop()
+        await application.stop()
+    return latencies
+
+
+async def bench_webhook(fake, count, interval, port, network_latency):
+    latencies, done = [], asyncio.Event()
+    application = build_app(fake, count, latencies, done)
+    server = BotWebServer(application, host="127.0.0.1", port=port,
+                          webhook_path=WEBHOOK_PATH, secret_token=WEBHOOK_SECRET)
+    url = f"http://127.0.0.1:{port}{WEBHOOK_PATH}"
+    headers = {"X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET}
+
+    async with application, aiohttp.ClientSession() as session:
+        await server.start()
+        await application.start()
+
+        async def post(update):
+            # Telegram -> bot network delay (polling မှာ getUpdates response ကို ဒီလောက် ကြာစေတယ်)
+            await asyncio.sleep(network_latency)
+            async with session.post(url, json=update, headers=headers) as response:
+                response.raise_for_status()
+
+        posts = []
+        for user_id in range(count):
+            update = fake.text_update(user_id, repr(time.perf_counter()))
+            posts.append(asyncio.ensure_future(post(update)))
+            await asyncio.sleep(interval)
+        await asyncio.gather(*posts)
+        await asyncio.wait_for(done.wait(), timeout=60)
+        await application.stop()
+        await server.stop()
+    return latencies
+
+
+def report(name, latencies):
+    ms = [value * 1000 for value in latencies]
+    print(
+        f"{name:<8} n={len(ms):<5} mean={statistics.mean(ms):7.2f}ms "
+        f"p50={percentile(ms, 50):7.2f}ms p95={percentile(ms, 95):7.2f}ms p99={percentile(ms, 99):7.2f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=300)
+    parser.add_argument("--interval", type=float, default=0.005, help="seconds between updates")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="simulated one-way Telegram network delay (s)")
+    parser.add_argument("--port", type=int, default=8765, help="webhook server port")
+    args = parser.parse_args()
+
+    fake = FakeTelegram(latency=args.api_latency)
+    await fake.start()
+    try:
+        report("polling", await bench_polling(fake, args.updates, args.interval))
+        report("webhook", await bench_webhook(fake, args.updates, args.interval, args.port, args.api_latency))
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
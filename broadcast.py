@@ -0,0 +1,247 @@
+import asyncio
+import itertools
+import logging
+import time
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+from pymongo.errors import CursorNotFound
+from telegram.error import Forbidden, RetryAfter
+
+from rate_limit import TokenBucket
+
+
+def _retry_seconds(error):
+    value = error.retry_after
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class BroadcastEngine:
+    """Background broadcast with a global send rate and MongoDB checkpoints.
+
+    Active users are streamed in _id order from one cursor (batch_size ids
+    per getMore, served from the status+_id index), one batch at a time. A
+    batch is sent
+    concurrently, its blocked users are marked with one bulk_write, and then
+    the last _id is checkpointed, so an interrupted broadcast resumes from the
+    last finished batch instead of starting over.
+    """
+
+    def __init__(self, users_col, broadcasts_col, run_db, rate_per_second=25, workers=10,
+                 batch_size=200, status_interval=10, max_attempts=3, stats=None):
+        self.users_col = users_col
+        self.col = broadcasts_col
+        self._run_db = run_db
+        self.stats_service = stats  # Dashboard counters (optional)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.status_interval = status_interval
+        self.max_attempts = max_attempts
+        # Telegram ရဲ့ global limit (~30 msg/s) အောက်မှာ ထားဖို့
+        self._bucket = TokenBucket(capacity=rate_per_second, rate=rate_per_second)
+        self._paused_until = 0.0
+        self._tasks = {}
+
+    # --- Public API ---
+
+    async def start(self, bot, payload, status_chat_id, status_message_id):
+        """Broadcast document ဖန်တီးပြီး background task အဖြစ် စတင်မယ်"""
+        total = await self._run_db(self.users_col.count_documents, {"status": "active"})
+        doc = {
+            "status": "running",
+            "payload": payload,
+            "status_chat_id": status_chat_id,
+            "status_message_id": status_message_id,
+            "total": total,
+            "last_id": None,
+            "sent": 0,
+            "blocked": 0,
+            "failed": 0,
+            "started_at": datetime.now(),
+            "updated_at": datetime.now(),
+        }
+        result = await self._run_db(self.col.insert_one, doc)
+        doc["_id"] = result.inserted_id
+        self._spawn(bot, doc)
+        return doc["_id"]
+
+    async def resume_pending(self, bot):
+        """Restart မတိုင်ခင် မပြီးသေးတဲ့ broadcast တွေကို checkpoint ကနေ ဆက်မယ်"""
+        docs = await self._run_db(lambda: list(self.col.find({"status": "running"})))
+        for doc in docs:
+            logging.info(f"Resuming broadcast {doc['_id']} after user {doc['last_id']}")
+            self._spawn(bot, doc)
+        return len(docs)
+
+    async def stop(self):
+        # Checkpoint ရှိလို့ ရပ်လိုက်လည်း နောက်တစ်ခါ resume လုပ်နိုင်တယ်
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def _spawn(self, bot, doc):
+        task = asyncio.get_running_loop().create_task(self._run(bot, doc))
+        self._tasks[doc["_id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(doc["_id"], None))
+
+    # --- Sending ---
+
+    async def _throttle(self):
+        while True:
+            now = time.time()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            wait = self._bucket.wait_time(1, now)
+            if wait == 0:
+                self._bucket.take(1)
+                return
+            await asyncio.sleep(wait)
+
+    async def _send_one(self, bot, payload, user_id):
+        """Returns "sent", "blocked" or "failed"."""
+        for attempt in range(self.max_attempts):
+            await self._throttle()
+            try:
+                if payload["kind"] == "photo":
+                    await bot.send_photo(chat_id=user_id, photo=payload["file_id"], caption=payload.get("caption"))
+                else:
+                    await bot.send_message(chat_id=user_id, text=payload["text"])
+                return "sent"
+            except RetryAfter as e:
+                # Flood limit ထိရင် worker အားလုံးကို ခဏရပ်ပြီး ပြန်ပို့မယ်
+                self._paused_until = max(self._paused_until, time.time() + _retry_seconds(e))
+                logging.warning(f"Broadcast flood control, pausing {_retry_seconds(e)}s")
+            except Forbidden:
+                return "blocked"
+            except Exception:
+                logging.exception(f"Broadcast error for {user_id}")
+                return "failed"
+        return "failed"
+
+    async def _send_batch(self, bot, payload, user_ids):
+        queue = asyncio.Queue()
+        for user_id in user_ids:
+            queue.put_nowait(user_id)
+        results = {}
+
+        async def worker():
+            while not queue.empty():
+                user_id = queue.get_nowait()
+                results[user_id] = await self._send_one(bot, payload, user_id)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(user_ids)))))
+        return results
+
+    def _open_cursor(self, last_id):
+        query = {"status": "active"}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        return self.users_col.find(query, {"_id": 1}, batch_size=self.batch_size).sort("_id", 1)
+
+    def _next_batch(self, cursor):
+        # Server က batch တစ်ခုစာပဲ ပို့လို့ user list အကုန် memory ထဲ မရောက်ဘူး
+        return [user["_id"] for user in itertools.islice(cursor, self.batch_size)]
+
+    async def _read_batch(self, cursor, last_id):
+        """Returns (cursor, user_ids); a cursor the server dropped is reopened after last_id."""
+        try:
+            return cursor, await self._run_db(self._next_batch, cursor)
+        except CursorNotFound:
+            # Flood control ကြောင့် ကြာကြာရပ်ထားရင် server က idle cursor ကို ဖျက်နိုင်တယ်
+            logging.warning(f"Broadcast cursor expired, reopening after user {last_id}")
+            cursor = await self._run_db(self._open_cursor, last_id)
+            return cursor, await self._run_db(self._next_batch, cursor)
+
+    async def _run(self, bot, doc):
+        broadcast_id = doc["_id"]
+        payload = doc["payload"]
+        progress = {k: doc[k] for k in ("sent", "blocked", "failed")}
+        last_id = doc["last_id"]
+        started = time.monotonic()
+        done_this_run = 0
+        last_status = 0.0
+        cursor = None
+
+        try:
+            cursor = await self._run_db(self._open_cursor, last_id)
+            while True:
+                cursor, user_ids = await self._read_batch(cursor, last_id)
+                if not user_ids:
+                    break
+
+                results = await self._send_batch(bot, payload, user_ids)
+                blocked_ids = [uid for uid, result in results.items() if result == "blocked"]
+                if blocked_ids:
+                    await self._run_db(
+                        self.users_col.bulk_write,
+                        [UpdateOne({"_id": uid}, {"$set": {"status": "blocked"}}) for uid in blocked_ids],
+                        ordered=False
+                    )
+                    if self.stats_service:
+                        self.stats_service.status_changed("active", "blocked", len(blocked_ids))
+
+                for result in results.values():
+                    progress[result] += 1
+                done_this_run += len(user_ids)
+                last_id = user_ids[-1]
+
+                # Batch တစ်ခုပြီးတိုင်း checkpoint
+                await self._run_db(
+                    self.col.update_one,
+                    {"_id": broadcast_id},
+                    {"$set": {"last_id": last_id, **progress, "updated_at": datetime.now()}}
+                )
+
+                if time.monotonic() - last_status >= self.status_interval:
+                    last_status = time.monotonic()
+                    await self._report(bot, doc, progress, done_this_run, time.monotonic() - started)
+
+            await self._run_db(
+                self.col.update_one,
+                {"_id": broadcast_id},
+                {"$set": {"status": "done", "finished_at": datetime.now()}}
+            )
+            await self._edit_status(
+                bot, doc,
+                f"✅ Broadcast Done!\nSent: {progress['sent']}, Blocked: {progress['blocked']}, Failed: {progress['failed']}"
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.exception(f"Broadcast {broadcast_id} stopped, will resume on restart")
+            # "running" အတိုင်းထားမှ restart မှာ resume မယ်; Mongo ပြဿနာကြောင့် ရပ်တာဆိုရင် ဒီ update လည်း မအောင်မြင်နိုင်
+            await asyncio.gather(self._run_db(
+                self.col.update_one,
+                {"_id": broadcast_id},
+                {"$set": {"last_error": repr(e), "updated_at": datetime.now()}}
+            ), return_exceptions=True)
+            processed = progress["sent"] + progress["blocked"] + progress["failed"]
+            await self._edit_status(
+                bot, doc,
+                f"⚠️ Broadcast stopped at {processed}/{doc['total']} ({type(e).__name__}).\n"
+                f"Sent: {progress['sent']}, Blocked: {progress['blocked']}, Failed: {progress['failed']}\n"
+                f"Bot restart ရင် ရပ်ခဲ့တဲ့နေရာကနေ ဆက်ပို့ပါမယ်။"
+            )
+        finally:
+            if cursor is not None:
+                # killCursors က network call မို့ executor ပေါ်မှာ ပိတ်မယ်
+                await asyncio.gather(self._run_db(cursor.close), return_exceptions=True)
+
+    async def _report(self, bot, doc, progress, done_this_run, elapsed):
+        processed = progress["sent"] + progress["blocked"] + progress["failed"]
+        rate = done_this_run / elapsed if elapsed > 0 else 0.0
+        remaining = max(doc["total"] - processed, 0)
+        eta = int(remaining / rate) if rate > 0 else 0
+        await self._edit_status(
+            bot, doc,
+            f"🚀 Broadcasting... {processed}/{doc['total']}\n"
+            f"Sent: {progress['sent']}, Blocked: {progress['blocked']}, Failed: {progress['failed']}\n"
+            f"Speed: {rate:.1f} msg/s, ETA: {eta // 60}m {eta % 60}s"
+        )
+
+    async def _edit_status(self, bot, doc, text):
+        try:
+            await bot.edit_message_text(chat_id=doc["status_chat_id"], message_id=doc["status_message_id"], text=text)
+        except Exception:
+            logging.debug("Broadcast status edit failed", exc_info=True)
@@ -0,0 +1,83 @@
+import time
+from collections import deque
+
+
+class AIMDController:
+    """Adjusts synthesis concurrency from observed edge-tts latency and errors.
+
+    Every success under the latency target earns one credit; once credits reach
+    the current limit, the limit grows by one (additive increase). A failure or
+    a slow call multiplies the limit by decrease_factor (multiplicative
+    decrease), at most once per decrease_cooldown seconds.
+    """
+
+    def __init__(self, min_limit=1, max_limit=8, initial=2, latency_target=8.0,
+                 decrease_factor=0.5, decrease_cooldown=5.0, on_change=None,
+                 clock=time.monotonic, history_size=50):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = max(min_limit, min(initial, max_limit))
+        self.latency_target = latency_target  # seconds per 1000 characters
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.on_change = on_change
+        self._clock = clock
+
+        self._credit = 0
+        self._last_decrease = float("-inf")
+        self.history = deque(maxlen=history_size)
+
+        self.samples = 0
+        self.failures = 0
+        self.slow = 0
+
+    @staticmethod
+    def normalized_latency(seconds, chars):
+        # စာတို request တွေမှာ connection overhead က လွှမ်းမိုးတာမို့ 100 chars အောက်ကို 100 လို့ယူမယ်
+        return seconds / max(chars, 100) * 1000
+
+    def _set_limit(self, limit, reason):
+        if limit == self.limit:
+            return
+        self.history.append((time.time(), self.limit, limit, reason))
+        self.limit = limit
+        if self.on_change:
+            self.on_change(limit)
+
+    def record(self, seconds, ok, chars=1000):
+        """edge-tts call တစ်ခု ပြီးတိုင်း ခေါ်ရမယ်"""
+        self.samples += 1
+        latency = self.normalized_latency(seconds, chars)
+
+        if ok and latency <= self.latency_target:
+            self._credit += 1
+            if self._credit >= self.limit and self.limit < self.max_limit:
+                self._credit = 0
+                self._set_limit(self.limit + 1, f"increase ({latency:.1f}s/1k chars)")
+            return
+
+        if ok:
+            self.slow += 1
+            reason = f"slow ({latency:.1f}s/1k chars)"
+        else:
+            self.failures += 1
+            reason = "error"
+
+        self._credit = 0
+        now = self._clock()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        new_limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        self._set_limit(new_limit, reason)
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "min": self.min_limit,
+            "max": self.max_limit,
+            "samples": self.samples,
+            "failures": self.failures,
+            "slow": self.slow,
+            "history": list(self.history),
+        }
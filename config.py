@@ -0,0 +1,170 @@
+import os
+
+TOKEN = os.environ.get("BOT_TOKEN")
+MONGO_URI = os.environ.get("MONGO_URI")
+ADMIN_ID = os.environ.get("ADMIN_ID")
+
+if not TOKEN or not MONGO_URI or not ADMIN_ID:
+    raise ValueError("Missing Config Variables!")
+
+ADMIN_ID = int(ADMIN_ID)
+
+# Update Delivery: "polling" (default) or "webhook"
+BOT_MODE = os.environ.get("BOT_MODE", "polling")
+PORT = int(os.environ.get("PORT", 5000))
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL")  # Public base URL, e.g. https://example.com
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET")
+
+if BOT_MODE == "webhook" and (not WEBHOOK_URL or not WEBHOOK_SECRET):
+    raise ValueError("Webhook mode needs WEBHOOK_URL and WEBHOOK_SECRET!")
+
+# Bot API server (local telegram-bot-api server / benchmark fake သုံးရင် ပြောင်းပါ)
+TELEGRAM_BASE_URL = os.environ.get("TELEGRAM_BASE_URL", "https://api.telegram.org/bot")
+
+# Prometheus metrics route (အလွတ်ထားရင် ပိတ်မယ်)
+METRICS_PATH = os.environ.get("METRICS_PATH", "/metrics")
+
+# Update queue ပြည့်ရင် webhook က 503 ပြန်မယ် / polling က ခဏရပ်မယ်
+UPDATE_QUEUE_MAX_SIZE = int(os.environ.get("UPDATE_QUEUE_MAX_SIZE", 1000))
+# Handler တစ်ပြိုင်နက် run နိုင်မယ့် update အရေအတွက်
+CONCURRENT_UPDATES = int(os.environ.get("CONCURRENT_UPDATES", 64))
+
+# Voice Configuration
+AVAILABLE_VOICES = {
+    "male": "my-MM-ThihaNeural",
+    "female": "my-MM-NilarNeural"
+}
+DEFAULT_VOICE = "my-MM-ThihaNeural"
+VOICE_DISPLAY_NAMES = {
+    "my-MM-ThihaNeural": "Thiha (Male)",
+    "my-MM-NilarNeural": "Nilar (Female)"
+}
+
+# Voice Catalog: edge-tts voice list ကို ဒီ file + Mongo ထဲ သိမ်းပြီး TTL ကုန်မှ background မှာ ပြန်ယူမယ်
+VOICE_CATALOG_PATH = os.environ.get("VOICE_CATALOG_PATH", "voice_catalog.json")
+VOICE_CATALOG_TTL_SECONDS = int(os.environ.get("VOICE_CATALOG_TTL_SECONDS", 7 * 24 * 3600))
+# ပြမယ့် locale prefix တွေ (comma-separated၊ ဥပမာ "my,en-US")၊ အလွတ်ဆိုရင် အကုန်ပြမယ်
+VOICE_CATALOG_LOCALES = [l.strip() for l in os.environ.get("VOICE_CATALOG_LOCALES", "").split(",") if l.strip()]
+
+# Output Format: "mp3" (edge-tts 48 kbps)၊ "mp3_low" (24 kbps)၊ "opus" (Telegram voice note)
+# mp3 မဟုတ်တာတွေကို ffmpeg နဲ့ ပြောင်းမယ် (ffmpeg မရှိရင် mp3 ပဲ ပို့မယ်)
+DEFAULT_AUDIO_FORMAT = os.environ.get("DEFAULT_AUDIO_FORMAT", "mp3")
+AUDIO_FORMAT_DISPLAY_NAMES = {
+    "mp3": "MP3 (Standard)",
+    "mp3_low": "MP3 (Small)",
+    "opus": "Voice Note (Opus)"
+}
+FFMPEG_PATH = os.environ.get("FFMPEG_PATH", "ffmpeg")
+FFMPEG_TIMEOUT = float(os.environ.get("FFMPEG_TIMEOUT", 60))
+
+MAX_CHARS = int(os.environ.get("MAX_CHARS", 20000))
+COOLDOWN_SECONDS = 30 
+
+# Audio Cache (file_id ပြန်သုံးခြင်း)
+AUDIO_CACHE_MAX_ITEMS = int(os.environ.get("AUDIO_CACHE_MAX_ITEMS", 5000))
+AUDIO_CACHE_TTL_SECONDS = int(os.environ.get("AUDIO_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+
+# ဒီ size ထက်ကျော်မှသာ temp file ပေါ် spill လုပ်မယ် (ကျန်တာ memory ထဲမှာပဲ)
+AUDIO_SPOOL_MAX_BYTES = int(os.environ.get("AUDIO_SPOOL_MAX_BYTES", 8 * 1024 * 1024))
+
+# Long Text (ဝါကျအလိုက် ခွဲပြီး ပြိုင်တူထုတ်ခြင်း)
+CHUNK_CHARS = int(os.environ.get("CHUNK_CHARS", 1200))
+CHUNK_CONCURRENCY = int(os.environ.get("CHUNK_CONCURRENCY", 4))
+CHUNK_RETRIES = int(os.environ.get("CHUNK_RETRIES", 2))
+
+# edge-tts request တစ်ခုချင်းရဲ့ timeout / retry / hedge (resilience.SynthesisPolicy)
+# Audio ဒီလောက်ကြာကြာ မရောက်ရင် (stall) / request တစ်ခုလုံး ဒီထက်ကြာရင် ဖြတ်ပြီး retry မယ်
+EDGE_TTS_STALL_TIMEOUT = float(os.environ.get("EDGE_TTS_STALL_TIMEOUT", 15))
+EDGE_TTS_ATTEMPT_TIMEOUT = float(os.environ.get("EDGE_TTS_ATTEMPT_TIMEOUT", 90))
+EDGE_TTS_RETRY_BACKOFF = float(os.environ.get("EDGE_TTS_RETRY_BACKOFF", 0.5))
+EDGE_TTS_RETRY_BACKOFF_MAX = float(os.environ.get("EDGE_TTS_RETRY_BACKOFF_MAX", 5))
+# Retry + hedge ကို request တစ်ခုမှာ ဒီအချိုးလောက်ပဲ ခွင့်ပြုမယ် (+ တစ်စက္ကန့် ဒီလောက် အနည်းဆုံး)
+EDGE_TTS_RETRY_BUDGET_RATIO = float(os.environ.get("EDGE_TTS_RETRY_BUDGET_RATIO", 0.2))
+EDGE_TTS_RETRY_BUDGET_MIN_PER_SECOND = float(os.environ.get("EDGE_TTS_RETRY_BUDGET_MIN_PER_SECOND", 0.5))
+# ပထမ audio ရောက်ချိန် percentile ကျော်ပြီး မရောက်သေးရင် ဒုတိယ request တစ်ခု ထပ်ပို့မယ်
+EDGE_TTS_HEDGE = os.environ.get("EDGE_TTS_HEDGE", "0") == "1"
+EDGE_TTS_HEDGE_PERCENTILE = float(os.environ.get("EDGE_TTS_HEDGE_PERCENTILE", 95))
+EDGE_TTS_HEDGE_MIN_DELAY = float(os.environ.get("EDGE_TTS_HEDGE_MIN_DELAY", 1.0))
+
+# Progressive Delivery: ဒီထက်ရှည်တဲ့စာကို segment လိုက် ပြီးတာနဲ့ ပို့မယ် (opt-in)
+PROGRESSIVE_DELIVERY = os.environ.get("PROGRESSIVE_DELIVERY", "0") == "1"
+PROGRESSIVE_SEGMENT_CHARS = int(os.environ.get("PROGRESSIVE_SEGMENT_CHARS", 3000))
+
+# Status Message: ဒီစက္ကန့်အတွင်း ပြီးတဲ့ request တွေမှာ chat action ("recording voice...") ပဲပြပြီး message မပို့ဘူး
+STATUS_SHOW_DELAY_SECONDS = float(os.environ.get("STATUS_SHOW_DELAY_SECONDS", 2))
+# Chat တစ်ခုမှာ status send/edit တစ်ခါနဲ့ တစ်ခါကြား အနည်းဆုံး စက္ကန့် (ကြားထဲ ရောက်လာတဲ့ text တွေကို နောက်ဆုံးတစ်ခုပဲ ပို့မယ်)
+STATUS_EDIT_INTERVAL_SECONDS = float(os.environ.get("STATUS_EDIT_INTERVAL_SECONDS", 3))
+
+# edge-tts Connection Pool (TLS handshake ကြိုလုပ်ထားမယ့် connection အရေအတွက်၊ 0 ဆိုရင် ပိတ်မယ်)
+EDGE_TTS_POOL_SIZE = int(os.environ.get("EDGE_TTS_POOL_SIZE", 4))
+EDGE_TTS_POOL_IDLE_SECONDS = float(os.environ.get("EDGE_TTS_POOL_IDLE_SECONDS", 30))
+
+# Queue System (Fair Scheduler)
+SYNTH_CONCURRENCY = int(os.environ.get("SYNTH_CONCURRENCY", 2))
+QUEUE_MAX_SIZE = int(os.environ.get("QUEUE_MAX_SIZE", 100))
+QUEUE_UPDATE_INTERVAL = float(os.environ.get("QUEUE_UPDATE_INTERVAL", 3))
+
+# Synthesis Mode: "local" (bot process ထဲမှာ ထုတ်မယ်) or "queue" (worker.py process တွေဆီ Mongo queue နဲ့ ပို့မယ်)
+SYNTH_MODE = os.environ.get("SYNTH_MODE", "local")
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", 60))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_DELAY = float(os.environ.get("JOB_RETRY_DELAY", 5))
+WORKER_PROCESSES = int(os.environ.get("WORKER_PROCESSES", 2))
+WORKER_CONCURRENCY = int(os.environ.get("WORKER_CONCURRENCY", 2))
+WORKER_POLL_INTERVAL = float(os.environ.get("WORKER_POLL_INTERVAL", 1.0))
+
+# Adaptive Concurrency (edge-tts latency / error ပေါ်မူတည်ပြီး SYNTH_CONCURRENCY ကို ချိန်မယ်)
+ADAPTIVE_CONCURRENCY = os.environ.get("ADAPTIVE_CONCURRENCY", "1") == "1"
+ADAPTIVE_MIN_CONCURRENCY = int(os.environ.get("ADAPTIVE_MIN_CONCURRENCY", 1))
+ADAPTIVE_MAX_CONCURRENCY = int(os.environ.get("ADAPTIVE_MAX_CONCURRENCY", 8))
+# စာလုံး 1000 အတွက် ဒီထက်ကြာရင် "slow" လို့ သတ်မှတ်မယ်
+ADAPTIVE_LATENCY_TARGET = float(os.environ.get("ADAPTIVE_LATENCY_TARGET", 8))
+ADAPTIVE_DECREASE_FACTOR = float(os.environ.get("ADAPTIVE_DECREASE_FACTOR", 0.5))
+ADAPTIVE_DECREASE_COOLDOWN = float(os.environ.get("ADAPTIVE_DECREASE_COOLDOWN", 5))
+
+# User Profile Cache (write-behind)
+PROFILE_CACHE_MAX_ITEMS = int(os.environ.get("PROFILE_CACHE_MAX_ITEMS", 10000))
+PROFILE_CACHE_TTL_SECONDS = int(os.environ.get("PROFILE_CACHE_TTL_SECONDS", 600))
+PROFILE_FLUSH_INTERVAL_SECONDS = float(os.environ.get("PROFILE_FLUSH_INTERVAL_SECONDS", 5))
+PROFILE_FLUSH_MAX_PENDING = int(os.environ.get("PROFILE_FLUSH_MAX_PENDING", 500))
+
+# Rate Limit (in-memory token bucket)
+# User တစ်ယောက်ကို COOLDOWN_SECONDS တိုင်း 1 token ပြန်ဖြည့်ပေးမယ်
+RATE_LIMIT_USER_BURST = float(os.environ.get("RATE_LIMIT_USER_BURST", 1))
+# စာလုံး ဒီလောက်စီတိုင်း token 1 ခု ထပ်ကုန်မယ်
+RATE_LIMIT_CHARS_PER_TOKEN = int(os.environ.get("RATE_LIMIT_CHARS_PER_TOKEN", 3000))
+# Bot တစ်ခုလုံးအတွက် (tokens / second)
+RATE_LIMIT_GLOBAL_RATE = float(os.environ.get("RATE_LIMIT_GLOBAL_RATE", 1.0))
+RATE_LIMIT_GLOBAL_BURST = float(os.environ.get("RATE_LIMIT_GLOBAL_BURST", 10))
+RATE_LIMIT_SNAPSHOT_PATH = os.environ.get("RATE_LIMIT_SNAPSHOT_PATH", "rate_limits.json")
+RATE_LIMIT_SNAPSHOT_INTERVAL = int(os.environ.get("RATE_LIMIT_SNAPSHOT_INTERVAL", 60))
+
+# Broadcast (background task)
+BROADCAST_RATE_PER_SECOND = float(os.environ.get("BROADCAST_RATE_PER_SECOND", 25))
+BROADCAST_WORKERS = int(os.environ.get("BROADCAST_WORKERS", 10))
+BROADCAST_BATCH_SIZE = int(os.environ.get("BROADCAST_BATCH_SIZE", 200))
+BROADCAST_STATUS_INTERVAL = float(os.environ.get("BROADCAST_STATUS_INTERVAL", 10))
+
+# User Export
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+
+# Dashboard Stats (materialized counters)
+# ဒီထက်ဟောင်းသွားရင် $facet နဲ့ အစကနေ ပြန်ရေတွက်မယ်
+STATS_MAX_STALENESS_SECONDS = int(os.environ.get("STATS_MAX_STALENESS_SECONDS", 3600))
+
+# Usage Event Log (buffered, hourly/daily summaries)
+USAGE_FLUSH_INTERVAL_SECONDS = float(os.environ.get("USAGE_FLUSH_INTERVAL_SECONDS", 10))
+USAGE_FLUSH_MAX_PENDING = int(os.environ.get("USAGE_FLUSH_MAX_PENDING", 500))
+# Raw event bucket တွေကို ဒီရက်အထိ ထားမယ် (summary တွေကတော့ မဖျက်ဘူး)
+USAGE_EVENTS_RETENTION_DAYS = int(os.environ.get("USAGE_EVENTS_RETENTION_DAYS", 30))
+
+# MongoDB Connection Pool / Timeouts
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 20))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 10000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", 20000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 10000))
+
+# Event loop မပိတ်မိအောင် pymongo call တွေကို run မယ့် thread အရေအတွက်
+DB_EXECUTOR_WORKERS = int(os.environ.get("DB_EXECUTOR_WORKERS", 8))
@@ -0,0 +1,159 @@
+import csv
+import gzip
+import io
+import re
+import tempfile
+import threading
+
+# MongoDB Driver
+import pymongo
+
+from config import (
+    MONGO_URI,
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS
+)
+
+# --- MongoDB Functions ---
+
+# mongodb+srv URI ဆိုရင် MongoClient constructor ထဲမှာ DNS SRV lookup လုပ်လို့ import time မှာ မဆောက်ဘဲ
+# ပထမဆုံး သုံးတဲ့အချိန် (async_db.connect က executor ပေါ်မှာ) မှ ဆောက်မယ်
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # tlsCAFile ပေးလိုက်ရင် TLS အလိုလိုဖွင့်လို့ Atlas (mongodb+srv) / tls=true URI တွေမှာပဲ ထည့်မယ်
+                # (ဒါမှ local mongod နဲ့ worker တွေ စမ်းလို့ရမယ်)
+                tls_options = {}
+                if MONGO_URI.startswith("mongodb+srv://") or re.search(r"[?&](tls|ssl)=true", MONGO_URI, re.IGNORECASE):
+                    import certifi
+                    tls_options["tlsCAFile"] = certifi.where()
+                _client = pymongo.MongoClient(
+                    MONGO_URI,
+                    **tls_options,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    minPoolSize=MONGO_MIN_POOL_SIZE,
+                    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+                    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                )
+    return _client
+
+
+def connect():
+    """Client ဆောက်ပြီး ping နဲ့ ပထမ connection (TLS + auth) ကို ကြိုဖွင့်မယ်"""
+    get_client().admin.command("ping")
+
+
+def is_connected():
+    return _client is not None
+
+
+class _DeferredMethod:
+    """Client မဆောက်ရသေးခင် ယူထားတဲ့ collection method (executor ပေါ်မှာ ခေါ်မှ resolve မယ်)"""
+
+    def __init__(self, collection, name):
+        self._collection = collection
+        self._name = name
+        self.__qualname__ = f"{collection.name}.{name}"
+
+    def __call__(self, *args, **kwargs):
+        return getattr(self._collection.resolve(), self._name)(*args, **kwargs)
+
+
+class LazyCollection:
+    """pymongo Collection stand-in that needs no client until it is used.
+
+    Once the client exists, attribute access goes straight to the real
+    Collection. Before that, methods come back as deferred callables, so a
+    handler evaluating ``col.find_one`` on the event loop never builds the
+    client (and never waits on DNS or the client lock) there; the call itself
+    runs on the Mongo executor via async_db.run_db.
+    """
+
+    def __init__(self, database, name):
+        self._database = database
+        self.name = name
+        self._collection = None
+
+    def resolve(self):
+        if self._collection is None:
+            self._collection = self._database.resolve()[self.name]
+        return self._collection
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        if not is_connected():
+            return _DeferredMethod(self, attr)
+        return getattr(self.resolve(), attr)
+
+
+class LazyDatabase:
+    def __init__(self, name):
+        self.name = name
+        self._collections = {}
+
+    def resolve(self):
+        return get_client()[self.name]
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = LazyCollection(self, name)
+        return self._collections[name]
+
+
+db = LazyDatabase("telegram_bot_db")
+users_col = db["users"]
+meta_col = db["meta"]
+
+EXPORT_PROJECTION = {
+    "name": 1, "username": 1, "status": 1, "joined_at": 1,
+    "last_active": 1, "generated_count": 1, "voice_preference": 1
+}
+
+def export_users_csv(since=None, batch_size=1000, spool_max_bytes=8 * 1024 * 1024):
+    """Users ကို cursor နဲ့ batch လိုက်ဖတ်ပြီး gzip CSV buffer ထဲ တိုက်ရိုက်ရေးခြင်း
+
+    since ပေးရင် အဲဒီအချိန်နောက်ပိုင်း active ဖြစ်ခဲ့တဲ့ user တွေပဲ ထုတ်မယ်။
+    Returns (buffer, rows); the caller owns the buffer and must close it.
+    """
+    query = {"last_active": {"$gte": since}} if since else {}
+    users = users_col.find(query, EXPORT_PROJECTION, batch_size=batch_size)
+
+    buffer = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes, suffix=".csv.gz")
+    rows = 0
+    try:
+        # TextIOWrapper ကိုပိတ်ရင် gzip trailer ရေးပြီး buffer ကိုတော့ ဖွင့်ထားမယ်
+        gz = gzip.GzipFile(filename="users.csv", mode="wb", fileobj=buffer)
+        with io.TextIOWrapper(gz, encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["User ID", "Name", "Username", "Status", "Joined Date", "Last Active", "Generated Count", "Voice Preference"])
+            for user in users:
+                writer.writerow([
+                    user["_id"], user.get("name", "N/A"), user.get("username", "None"),
+                    user.get("status", "unknown"), user.get("joined_at", "N/A"),
+                    user.get("last_active", "N/A"), user.get("generated_count", 0),
+                    user.get("voice_preference", "N/A")
+                ])
+                rows += 1
+    except BaseException:
+        buffer.close()
+        raise
+    finally:
+        users.close()
+
+    buffer.seek(0)
+    return buffer, rows
+
+def get_last_export_time():
+    doc = meta_col.find_one({"_id": "last_export"})
+    return doc["at"] if doc else None
+
+def set_last_export_time(at):
+    meta_col.update_one({"_id": "last_export"}, {"$set": {"at": at}}, upsert=True)
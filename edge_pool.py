@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+import aiohttp
+import edge_tts.communicate as edge_communicate
+
+from metrics import Counter
+
+POOL_WARMED = Counter("tts_edge_pool_warmed_total", "Warm-up requests that left an open connection to edge-tts")
+POOL_RECYCLES = Counter("tts_edge_pool_recycles_total", "Times the edge-tts connection pool was replaced after an error")
+
+
+class _SharedConnector(aiohttp.TCPConnector):
+    """edge-tts က request တိုင်း ClientSession ကိုပိတ်ရင် connector ကိုပါ ပိတ်လို့ အဲဒီ close ကို မလုပ်စေဘူး"""
+
+    def close(self, *, abort_ssl=False):
+        return asyncio.sleep(0)
+
+    def shutdown(self):
+        return super().close()
+
+
+class EdgeConnectionPool:
+    """Keeps warm TLS connections to the edge-tts host for Communicate to reuse.
+
+    Warm-up is a plain HTTPS request to the websocket host with edge-tts's own
+    SSL context, so the idle keep-alive connection it leaves behind matches the
+    key ws_connect looks up and the TCP + TLS handshake is skipped. A websocket
+    upgrade consumes its connection, so the pool re-warms in the background
+    after every use and every idle_timeout / 2 seconds. An edge-tts error
+    retires the whole connector (it is closed once its in-flight requests
+    finish) and warms a fresh one.
+    """
+
+    def __init__(self, size=4, idle_timeout=30.0):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.connector = None
+        self._in_use = {}  # connector -> in-flight requests
+        self._retired = set()
+        self._warming = None
+        self._keeper = None
+
+        self.uses = 0
+        self.warmed = 0
+        self.warm_errors = 0
+        self.recycles = 0
+
+    def _new_connector(self):
+        return _SharedConnector(keepalive_timeout=self.idle_timeout, ttl_dns_cache=300)
+
+    @staticmethod
+    def _warm_url():
+        # WSS_URL / _SSL_CTX ကို ခေါ်တဲ့အချိန်မှာ ဖတ်မယ် (benchmark က local stand-in နဲ့ အစားထိုးလို့ရအောင်)
+        parts = urlsplit(edge_communicate.WSS_URL)
+        return f"https://{parts.netloc}/"
+
+    # --- Synthesis API ---
+
+    def acquire(self):
+        """Communicate(connector=...) အတွက် connector ယူမယ်"""
+        connector = self.connector
+        if connector is not None:
+            self._in_use[connector] = self._in_use.get(connector, 0) + 1
+        return connector
+
+    def release(self, connector, ok):
+        if connector is None:
+            return
+        self.uses += 1
+        self._in_use[connector] -= 1
+        if not self._in_use[connector]:
+            del self._in_use[connector]
+            if connector in self._retired:
+                self._retire(connector)
+
+        if not ok and connector is self.connector:
+            self.recycle()
+        else:
+            self.schedule_warm()
+
+    # --- Pool maintenance ---
+
+    async def warm(self):
+        connector = self.connector
+        if connector is None:
+            return 0
+        url = self._warm_url()
+
+        async def open_one(session):
+            async with session.get(url, ssl=edge_communicate._SSL_CTX, allow_redirects=False) as response:
+                await response.read()
+
+        async with aiohttp.ClientSession(connector=connector, connector_owner=False) as session:
+            results = await asyncio.gather(*(open_one(session) for _ in range(self.size)), return_exceptions=True)
+
+        opened = sum(1 for result in results if not isinstance(result, BaseException))
+        self.warmed += opened
+        self.warm_errors += len(results) - opened
+        POOL_WARMED.inc(opened)
+        if opened < len(results):
+            logging.debug(f"edge-tts pool warm-up: {len(results) - opened} failed", exc_info=results[-1])
+        return opened
+
+    async def _warm_safe(self):
+        try:
+            await self.warm()
+        except Exception:
+            logging.debug("edge-tts pool warm-up failed", exc_info=True)
+
+    def schedule_warm(self):
+        if self.connector is None or (self._warming and not self._warming.done()):
+            return
+        self._warming = asyncio.get_running_loop().create_task(self._warm_safe())
+
+    def _retire(self, connector):
+        self._retired.discard(connector)
+        asyncio.get_running_loop().create_task(connector.shutdown())
+
+    def recycle(self):
+        """Error တက်ခဲ့တဲ့ connector ကို အသစ်နဲ့လဲမယ် (သုံးနေဆဲ request တွေ ပြီးမှ ပိတ်မယ်)"""
+        old, self.connector = self.connector, self._new_connector()
+        self.recycles += 1
+        POOL_RECYCLES.inc()
+        if old is not None:
+            if old in self._in_use:
+                self._retired.add(old)
+            else:
+                self._retire(old)
+        if self._warming and not self._warming.done():
+            self._warming.cancel()
+        self.schedule_warm()
+
+    async def _keep_warm(self):
+        while True:
+            await asyncio.sleep(self.idle_timeout / 2)
+            self.schedule_warm()
+
+    def start(self):
+        if self.connector is None:
+            self.connector = self._new_connector()
+            self.schedule_warm()
+            self._keeper = asyncio.get_running_loop().create_task(self._keep_warm())
+
+    async def stop(self):
+        for task in (self._keeper, self._warming):
+            if task:
+                task.cancel()
+        connectors = {self.connector, *self._in_use, *self._retired} - {None}
+        self.connector = None
+        self._retired.clear()
+        await asyncio.gather(*(connector.shutdown() for connector in connectors), return_exceptions=True)
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "uses": self.uses,
+            "warmed": self.warmed,
+            "warm_errors": self.warm_errors,
+            "recycles": self.recycles,
+        }
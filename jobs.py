@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, ReturnDocument
+
+
+class JobQueue:
+    """Durable synthesis job queue stored in a MongoDB collection.
+
+    The front end inserts "queued" jobs; workers claim them atomically with
+    find_one_and_update and hold a lease that their heartbeat keeps extending.
+    A job whose lease ran out (worker crashed or hung) becomes claimable again,
+    so delivery is at-least-once. Every claim counts as an attempt; a job
+    that used up max_attempts is never claimed again. If it failed, it is
+    marked "failed" right away. If its lease expired (the job keeps killing
+    its worker), fail_exhausted() marks it "failed" instead.
+    """
+
+    def __init__(self, collection, run_db, lease_seconds=60, max_attempts=3, retry_delay=5):
+        self.col = collection
+        self._run_db = run_db
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def ensure_indexes(self):
+        self.col.create_index([("status", ASCENDING), ("available_at", ASCENDING), ("created_at", ASCENDING)])
+        self.col.create_index([("status", ASCENDING), ("lease_until", ASCENDING)])
+        # ပြီးသွားတဲ့ job တွေကို တစ်ရက်နေရင် Mongo က အလိုလို ဖျက်မယ်
+        self.col.create_index("finished_at", expireAfterSeconds=24 * 3600)
+
+    # --- Front end ---
+
+    async def enqueue(self, job):
+        now = datetime.now()
+        doc = {
+            **job,
+            "status": "queued",
+            "attempts": 0,
+            "created_at": now,
+            "available_at": now,
+            "lease_until": None,
+            "worker": None,
+        }
+        result = await self._run_db(self.col.insert_one, doc)
+        return result.inserted_id
+
+    async def queued_count(self):
+        return await self._run_db(self.col.count_documents, {"status": "queued"})
+
+    async def counts(self):
+        rows = await self._run_db(
+            lambda: list(self.col.aggregate([{"$group": {"_id": "$status", "n": {"$sum": 1}}}]))
+        )
+        return {row["_id"]: row["n"] for row in rows}
+
+    # --- Worker ---
+
+    def _claim(self, worker):
+        now = datetime.now()
+        return self.col.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued", "available_at": {"$lte": now}},
+                    # Lease ကုန်သွားတဲ့ job (worker ပျက်သွားတာ) ကို ပြန်ယူမယ်
+                    {"status": "running", "lease_until": {"$lt": now}},
+                ],
+                # Attempt ကုန်သွားတဲ့ job ကို ထပ်မပေးဘူး (fail_exhausted က failed လုပ်မယ်)
+                "attempts": {"$lt": self.max_attempts},
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "worker": worker,
+                    "claimed_at": now,
+                    "lease_until": now + timedelta(seconds=self.lease_seconds),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def claim(self, worker):
+        """Returns the claimed job document, or None if nothing is runnable"""
+        return await self._run_db(self._claim, worker)
+
+    def _fail_exhausted(self, worker):
+        now = datetime.now()
+        return self.col.find_one_and_update(
+            {"status": "running", "lease_until": {"$lt": now}, "attempts": {"$gte": self.max_attempts}},
+            {"$set": {
+                "status": "failed",
+                "worker": worker,
+                "finished_at": now,
+                "lease_until": None,
+                "error": "lease expired too many times",
+            }},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def fail_exhausted(self, worker):
+        """Attempt ကုန်ပြီး lease လည်းကုန်သွားတဲ့ job တစ်ခုကို failed လုပ်ပြီး ပြန်ပေးမယ် (user ကို အကြောင်းကြားဖို့)"""
+        return await self._run_db(self._fail_exhausted, worker)
+
+    async def heartbeat(self, job_id, worker):
+        """Lease ကို သက်တမ်းတိုးမယ်; job က တခြား worker ဆီ ရောက်သွားပြီဆိုရင် False"""
+        result = await self._run_db(
+            self.col.update_one,
+            {"_id": job_id, "status": "running", "worker": worker},
+            {"$set": {"lease_until": datetime.now() + timedelta(seconds=self.lease_seconds)}}
+        )
+        return result.matched_count == 1
+
+    async def complete(self, job_id, worker, **fields):
+        await self._run_db(
+            self.col.update_one,
+            {"_id": job_id, "worker": worker},
+            {"$set": {"status": "done", "finished_at": datetime.now(), "lease_until": None, **fields}}
+        )
+
+    async def fail(self, job_id, worker, error):
+        await self._run_db(
+            self.col.update_one,
+            {"_id": job_id, "worker": worker},
+            {"$set": {"status": "failed", "finished_at": datetime.now(), "lease_until": None, "error": error}}
+        )
+
+    async def retry_or_fail(self, job, worker, error):
+        """Returns True if the job was put back for another attempt"""
+        if job["attempts"] >= self.max_attempts:
+            await self.fail(job["_id"], worker, error)
+            return False
+        delay = self.retry_delay * 2 ** (job["attempts"] - 1)
+        await self._run_db(
+            self.col.update_one,
+            {"_id": job["_id"], "worker": worker},
+            {"$set": {
+                "status": "queued",
+                "worker": None,
+                "lease_until": None,
+                "available_at": datetime.now() + timedelta(seconds=delay),
+                "error": error,
+            }}
+        )
+        return True
+
+    async def release(self, job_id, worker):
+        """Worker ပိတ်တဲ့အခါ မပြီးသေးတဲ့ job ကို attempt မကုန်စေဘဲ queue ထဲ ပြန်ထည့်မယ်"""
+        await self._run_db(
+            self.col.update_one,
+            {"_id": job_id, "worker": worker, "status": "running"},
+            {"$set": {"status": "queued", "worker": None, "lease_until": None, "available_at": datetime.now()},
+             "$inc": {"attempts": -1}}
+        )
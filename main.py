@@ -1,179 +1,178 @@
-import os
 import logging
-import uuid
-import csv
-import time
 import asyncio
+import importlib
+import signal
+import time
+from contextlib import aclosing
 from datetime import datetime, timedelta
-from flask import Flask
-from threading import Thread
-import edge_tts
 from telegram import Update, ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
-from telegram.error import Forbidden
-
-# MongoDB Driver
-import pymongo
-import certifi
-
-# 1. Flask App (Keep-Alive)
-app = Flask(__name__)
-
-@app.route('/')
-def home():
-    return "Bot is running with Advanced Logic!"
-
-def run_flask():
-    port = int(os.environ.get("PORT", 5000)) 
-    app.run(host='0.0.0.0', port=port)
-
-def keep_alive():
-    t = Thread(target=run_flask, daemon=True)
-    t.start()
-
-# 2. Configuration
-TOKEN = os.environ.get("BOT_TOKEN")
-MONGO_URI = os.environ.get("MONGO_URI")
-ADMIN_ID = os.environ.get("ADMIN_ID")
-
-if not TOKEN or not MONGO_URI or not ADMIN_ID:
-    raise ValueError("Missing Config Variables!")
-
-ADMIN_ID = int(ADMIN_ID)
-
-# Voice Configuration
-AVAILABLE_VOICES = {
-    "male": "my-MM-ThihaNeural",
-    "female": "my-MM-NilarNeural"
-}
-DEFAULT_VOICE = "my-MM-ThihaNeural"
-VOICE_DISPLAY_NAMES = {
-    "my-MM-ThihaNeural": "Thiha (Male)",
-    "my-MM-NilarNeural": "Nilar (Female)"
-}
-
-MAX_CHARS = 3000
-COOLDOWN_SECONDS = 30 
-
-# Queue System (Semaphore)
-CONCURRENT_LIMIT = asyncio.Semaphore(2) 
+from telegram.error import BadRequest
+
+import async_db
+from database import db, users_col
+import schema
+from audio_cache import AudioCache, cache_key
+from user_cache import UserProfileCache
+from rate_limit import RateLimiter
+from scheduler import FairScheduler, QueueFull
+from concurrency import AIMDController
+from broadcast import BroadcastEngine
+from stats import StatsService
+from usage_log import UsageLog
+from jobs import JobQueue
+from audio_format import AudioTranscoder, AUDIO_FORMATS
+from single_flight import SingleFlight
+from voice_catalog import VoiceCatalog
+from synthesis import synthesize_long, synthesize_segments
+from resilience import RetryBudget, SynthesisPolicy
+from status_messages import StatusManager
+from metrics import Counter, Gauge, Histogram
+
+# 1. Configuration
+from config import (
+    TOKEN, ADMIN_ID, TELEGRAM_BASE_URL, BOT_MODE, PORT, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, METRICS_PATH,
+    UPDATE_QUEUE_MAX_SIZE, CONCURRENT_UPDATES, AVAILABLE_VOICES, DEFAULT_VOICE, VOICE_DISPLAY_NAMES, MAX_CHARS, COOLDOWN_SECONDS,
+    VOICE_CATALOG_PATH, VOICE_CATALOG_TTL_SECONDS, VOICE_CATALOG_LOCALES,
+    DEFAULT_AUDIO_FORMAT, AUDIO_FORMAT_DISPLAY_NAMES, FFMPEG_PATH, FFMPEG_TIMEOUT,
+    AUDIO_CACHE_MAX_ITEMS, AUDIO_CACHE_TTL_SECONDS, AUDIO_SPOOL_MAX_BYTES,
+    CHUNK_CHARS, CHUNK_CONCURRENCY, CHUNK_RETRIES, EDGE_TTS_POOL_SIZE, EDGE_TTS_POOL_IDLE_SECONDS,
+    EDGE_TTS_STALL_TIMEOUT, EDGE_TTS_ATTEMPT_TIMEOUT, EDGE_TTS_RETRY_BACKOFF, EDGE_TTS_RETRY_BACKOFF_MAX,
+    EDGE_TTS_RETRY_BUDGET_RATIO, EDGE_TTS_RETRY_BUDGET_MIN_PER_SECOND,
+    EDGE_TTS_HEDGE, EDGE_TTS_HEDGE_PERCENTILE, EDGE_TTS_HEDGE_MIN_DELAY,
+    PROGRESSIVE_DELIVERY, PROGRESSIVE_SEGMENT_CHARS, STATUS_SHOW_DELAY_SECONDS, STATUS_EDIT_INTERVAL_SECONDS,
+    PROFILE_CACHE_MAX_ITEMS, PROFILE_CACHE_TTL_SECONDS, PROFILE_FLUSH_INTERVAL_SECONDS, PROFILE_FLUSH_MAX_PENDING,
+    RATE_LIMIT_USER_BURST, RATE_LIMIT_CHARS_PER_TOKEN, RATE_LIMIT_GLOBAL_RATE, RATE_LIMIT_GLOBAL_BURST,
+    RATE_LIMIT_SNAPSHOT_PATH, RATE_LIMIT_SNAPSHOT_INTERVAL,
+    SYNTH_CONCURRENCY, QUEUE_MAX_SIZE, QUEUE_UPDATE_INTERVAL,
+    SYNTH_MODE, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY,
+    ADAPTIVE_CONCURRENCY, ADAPTIVE_MIN_CONCURRENCY, ADAPTIVE_MAX_CONCURRENCY, ADAPTIVE_LATENCY_TARGET,
+    ADAPTIVE_DECREASE_FACTOR, ADAPTIVE_DECREASE_COOLDOWN,
+    BROADCAST_RATE_PER_SECOND, BROADCAST_WORKERS, BROADCAST_BATCH_SIZE, BROADCAST_STATUS_INTERVAL,
+    EXPORT_BATCH_SIZE, STATS_MAX_STALENESS_SECONDS,
+    USAGE_FLUSH_INTERVAL_SECONDS, USAGE_FLUSH_MAX_PENDING, USAGE_EVENTS_RETENTION_DAYS
+)
+
+# Queue System (User တစ်ယောက်ချင်းစီ အလှည့်ကျ + Queue အရှည် ကန့်သတ်)
+scheduler = FairScheduler(
+    concurrency=SYNTH_CONCURRENCY, max_queue=QUEUE_MAX_SIZE, update_interval=QUEUE_UPDATE_INTERVAL
+)
+
+# Queue mode: job တွေကို Mongo ထဲထည့်ပြီး worker.py process တွေက ထုတ်ပို့မယ်
+job_queue = JobQueue(
+    db["jobs"], async_db.run_db,
+    lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS, retry_delay=JOB_RETRY_DELAY
+)
+
+# edge-tts မြန်နေရင် slot တိုးမယ်၊ error / နှေးလာရင် လျှော့မယ်
+concurrency_controller = AIMDController(
+    min_limit=ADAPTIVE_MIN_CONCURRENCY, max_limit=ADAPTIVE_MAX_CONCURRENCY, initial=SYNTH_CONCURRENCY,
+    latency_target=ADAPTIVE_LATENCY_TARGET, decrease_factor=ADAPTIVE_DECREASE_FACTOR,
+    decrease_cooldown=ADAPTIVE_DECREASE_COOLDOWN, on_change=scheduler.set_concurrency
+)
+synthesis_observer = concurrency_controller.record if ADAPTIVE_CONCURRENCY else None
+
+# edge-tts တစ်ခါတလေ stall ဖြစ်တာကို timeout / retry / hedge နဲ့ ကာမယ် (retry တွေက budget ထဲကပဲ)
+synthesis_policy = SynthesisPolicy(
+    retries=CHUNK_RETRIES, attempt_timeout=EDGE_TTS_ATTEMPT_TIMEOUT, stall_timeout=EDGE_TTS_STALL_TIMEOUT,
+    backoff_base=EDGE_TTS_RETRY_BACKOFF, backoff_max=EDGE_TTS_RETRY_BACKOFF_MAX,
+    hedge=EDGE_TTS_HEDGE, hedge_percentile=EDGE_TTS_HEDGE_PERCENTILE, hedge_min_delay=EDGE_TTS_HEDGE_MIN_DELAY,
+    budget=RetryBudget(ratio=EDGE_TTS_RETRY_BUDGET_RATIO, min_per_second=EDGE_TTS_RETRY_BUDGET_MIN_PER_SECOND)
+)
+
+# Status message တွေကို chat အလိုက် rate limit နဲ့ ပို့/edit မယ် (မြန်တဲ့ request တွေမှာ မပို့ဘူး)
+status_manager = StatusManager(show_delay=STATUS_SHOW_DELAY_SECONDS, edit_interval=STATUS_EDIT_INTERVAL_SECONDS)
+
+# edge-tts websocket တွေကို ကြိုဖွင့်ထားတဲ့ TLS connection ပေါ်မှာ ဖွင့်မယ်
+# (edge-tts/aiohttp import က ကြာလို့ startup ပြီးမှ deferred_startup က ဆောက်မယ်၊ မဆောက်ခင် pool မပါဘဲ ထုတ်မယ်)
+edge_pool = None
 
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 
-# --- MongoDB Functions ---
-
-client = pymongo.MongoClient(MONGO_URI, tlsCAFile=certifi.where())
-db = client["telegram_bot_db"]
-users_col = db["users"]
-
-def add_or_update_user(user):
-    user_id = user.id
-    try:
-        users_col.update_one(
-            {"_id": user_id},
-            {
-                "$setOnInsert": {
-                    "joined_at": datetime.now(), 
-                    "generated_count": 0,
-                    "last_generated": datetime.min, # Cooldown အတွက် Initial Value
-                    "voice_preference": DEFAULT_VOICE  # New field for voice preference
-                },
-                "$set": {
-                    "name": user.first_name,
-                    "username": user.username or "None",
-                    "status": "active",
-                    "last_active": datetime.now()
-                }
-            },
-            upsert=True
-        )
-    except Exception as e:
-        logging.exception("MongoDB Update Error")
-
-def check_cooldown(user_id):
-    """Database ထဲက last_generated ကို စစ်ဆေးခြင်း"""
-    user = users_col.find_one({"_id": user_id}, {"last_generated": 1})
-    if not user: return True # User မရှိသေးရင် Allow
-    
-    last_gen = user.get("last_generated", datetime.min)
-    
-    # အချိန်ကွာခြားချက် တွက်ချက်ခြင်း
-    if (datetime.now() - last_gen).total_seconds() < COOLDOWN_SECONDS:
-        remaining = int(COOLDOWN_SECONDS - (datetime.now() - last_gen).total_seconds())
-        return remaining # စောင့်ရမည့် စက္ကန့် ပြန်ပို့
-    
-    return 0 # 0 ဆိုရင် Allow
-
-def update_usage_stats(user_id):
-    """အောင်မြင်သွားရင် Count တိုးပြီး Time မှတ်မယ်"""
-    try:
-        users_col.update_one(
-            {"_id": user_id},
-            {
-                "$inc": {"generated_count": 1},
-                "$set": {"last_generated": datetime.now()} # Database Cooldown Storage
-            }
-        )
-    except Exception as e:
-        logging.exception("DB Stats Update Error")
-
-def update_voice_preference(user_id, voice_code):
-    """User ရဲ့ voice preference ကို update လုပ်မယ်"""
-    try:
-        users_col.update_one(
-            {"_id": user_id},
-            {"$set": {"voice_preference": voice_code}}
-        )
-        return True
-    except Exception as e:
-        logging.exception("DB Voice Update Error")
-        return False
-
-def get_user_voice_preference(user_id):
-    """User ရဲ့ voice preference ကို ထုတ်ယူမယ်"""
-    user = users_col.find_one({"_id": user_id}, {"voice_preference": 1})
-    if user and user.get("voice_preference"):
-        return user["voice_preference"]
-    return DEFAULT_VOICE
-
-def get_all_active_users():
-    users = users_col.find({"status": "active"}, {"_id": 1})
-    return [user["_id"] for user in users]
-
-def get_stats():
-    total = users_col.count_documents({})
-    active = users_col.count_documents({"status": "active"})
-    blocked = users_col.count_documents({"status": "blocked"})
-    pipeline = [{"$group": {"_id": None, "total_generated": {"$sum": "$generated_count"}}}]
-    result = list(users_col.aggregate(pipeline))
-    total_generated = result[0]["total_generated"] if result else 0
-    return total, active, blocked, total_generated
-
-def mark_user_blocked(user_id):
-    users_col.update_one({"_id": user_id}, {"$set": {"status": "blocked"}})
-
-def generate_csv_file():
-    # Filename Conflict မဖြစ်အောင် Timestamp သုံးမယ်
-    filename = f"users_{int(time.time())}.csv"
-    users = users_col.find({})
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(["User ID", "Name", "Username", "Status", "Joined Date", "Last Active", "Generated Count", "Voice Preference"])
-        for user in users:
-            writer.writerow([
-                user["_id"], user.get("name", "N/A"), user.get("username", "None"),
-                user.get("status", "unknown"), user.get("joined_at", "N/A"),
-                user.get("last_active", "N/A"), user.get("generated_count", 0),
-                user.get("voice_preference", "N/A")
-            ])
-    return filename
+audio_cache = AudioCache(
+    db["audio_cache"], async_db.run_db,
+    max_items=AUDIO_CACHE_MAX_ITEMS, ttl_seconds=AUDIO_CACHE_TTL_SECONDS
+)
+
+# Voice list ကို file / Mongo snapshot ကနေ memory ထဲ တင်ထားမယ် (request path မှာ network မခေါ်ဘူး)
+voice_catalog = VoiceCatalog(
+    db["voice_catalog"], async_db.run_db, VOICE_CATALOG_PATH, ttl_seconds=VOICE_CATALOG_TTL_SECONDS,
+    fallback_voices=[
+        {"ShortName": code, "Gender": gender.capitalize(), "Locale": code.rsplit("-", 1)[0]}
+        for gender, code in AVAILABLE_VOICES.items()
+    ],
+    display_names=VOICE_DISPLAY_NAMES, locales=VOICE_CATALOG_LOCALES
+)
+# Language list တစ်မျက်နှာမှာ ပြမယ့် locale အရေအတွက်
+LOCALES_PER_PAGE = 18
+
+# User ရွေးထားတဲ့ output format (Opus voice note / low-bitrate MP3) ကို ffmpeg နဲ့ ပြောင်းမယ်
+transcoder = AudioTranscoder(FFMPEG_PATH, spool_max_bytes=AUDIO_SPOOL_MAX_BYTES, timeout=FFMPEG_TIMEOUT)
+
+# တူညီတဲ့ စာ + အသံ တစ်ပြိုင်နက် ရောက်လာရင် synthesis တစ်ခုတည်း run ပြီး file_id ကို မျှသုံးမယ်
+single_flight = SingleFlight()
+
+# Dashboard အတွက် counters document တစ်ခုတည်းကို ဖတ်မယ်
+stats_service = StatsService(
+    users_col, db["counters"], async_db.run_db,
+    max_staleness=STATS_MAX_STALENESS_SECONDS, flush_interval=PROFILE_FLUSH_INTERVAL_SECONDS
+)
+
+# Request တစ်ခုချင်းရဲ့ usage ကို buffer ထဲစုပြီး hourly/daily summary တွေနဲ့ တစ်ပြိုင်နက် bulk ရေးမယ်
+usage_log = UsageLog(
+    db["usage_events"], db["usage_summaries"], async_db.run_db,
+    flush_interval=USAGE_FLUSH_INTERVAL_SECONDS, flush_max_pending=USAGE_FLUSH_MAX_PENDING,
+    retention_days=USAGE_EVENTS_RETENTION_DAYS
+)
+
+# Broadcast ကို background မှာ rate limit နဲ့ ပို့ပြီး progress ကို DB ထဲ checkpoint လုပ်မယ်
+broadcast_engine = BroadcastEngine(
+    users_col, db["broadcasts"], async_db.run_db,
+    rate_per_second=BROADCAST_RATE_PER_SECOND, workers=BROADCAST_WORKERS,
+    batch_size=BROADCAST_BATCH_SIZE, status_interval=BROADCAST_STATUS_INTERVAL,
+    stats=stats_service
+)
+
+# Metrics: reply နှေးရင် edge-tts / Mongo / Telegram ဘယ်အဆင့်က နှေးလဲ ခွဲကြည့်ဖို့
+TTS_REQUESTS = Counter("tts_requests_total", "Text-to-speech requests by outcome", ["result"])
+SYNTHESIS_SECONDS = Histogram("tts_synthesis_seconds", "Total synthesis time for one request (all chunks)")
+TELEGRAM_UPLOAD_SECONDS = Histogram(
+    "tts_telegram_upload_seconds", "Time to send the audio to Telegram", ["source"]
+)
+FIRST_AUDIO_SECONDS = Histogram(
+    "tts_first_audio_seconds", "Time from getting a synthesis slot to the first audio reply", ["mode"]
+)
+AUDIO_BYTES = Counter("tts_audio_bytes_total", "Audio bytes uploaded to Telegram")
+AUDIO_SIZE_BYTES = Histogram(
+    "tts_audio_size_bytes", "Size of generated audio files",
+    buckets=(16e3, 64e3, 256e3, 1e6, 4e6, 16e6, 50e6)
+)
+Gauge("tts_queue_depth", "Jobs waiting for a synthesis slot").set_function(lambda: scheduler.depth)
+Gauge("tts_synthesis_running", "Jobs currently synthesizing").set_function(lambda: scheduler.running)
+Gauge("tts_synthesis_concurrency", "Current synthesis concurrency limit").set_function(lambda: scheduler.concurrency)
+
+# User profile ကို memory ထဲမှာထားပြီး write တွေကို batch နဲ့ ရေးမယ်
+profile_cache = UserProfileCache(
+    users_col, async_db.run_db, DEFAULT_VOICE,
+    max_items=PROFILE_CACHE_MAX_ITEMS, ttl_seconds=PROFILE_CACHE_TTL_SECONDS,
+    flush_interval=PROFILE_FLUSH_INTERVAL_SECONDS, flush_max_pending=PROFILE_FLUSH_MAX_PENDING,
+    stats=stats_service
+)
+
+# Fair Usage: DB မဖတ်ဘဲ memory ထဲက token bucket နဲ့ စစ်မယ်
+rate_limiter = RateLimiter(
+    user_capacity=RATE_LIMIT_USER_BURST, user_rate=1 / COOLDOWN_SECONDS,
+    global_capacity=RATE_LIMIT_GLOBAL_BURST, global_rate=RATE_LIMIT_GLOBAL_RATE,
+    chars_per_token=RATE_LIMIT_CHARS_PER_TOKEN,
+    snapshot_path=RATE_LIMIT_SNAPSHOT_PATH, snapshot_interval=RATE_LIMIT_SNAPSHOT_INTERVAL
+)
 
 # --- Bot Commands ---
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
-    add_or_update_user(user)
+    profile = await profile_cache.touch(user)
+    current_voice = profile["voice_preference"]
 
     if user.id == ADMIN_ID:
         admin_keyboard = [
@@ -183,22 +182,25 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         reply_markup = ReplyKeyboardMarkup(admin_keyboard, resize_keyboard=True, one_time_keyboard=False)
         await update.message.reply_text(
             f"Welcome Admin {user.first_name}!\n\n"
-            f"🔊 Current voice: {VOICE_DISPLAY_NAMES.get(get_user_voice_preference(user.id), 'Thiha (Male)')}",
+            f"🔊 Current voice: {voice_catalog.display_name(current_voice)}",
             reply_markup=reply_markup
         )
     else:
         user_keyboard = [[KeyboardButton("🔊 Voices")]]
         reply_markup = ReplyKeyboardMarkup(user_keyboard, resize_keyboard=True, one_time_keyboard=False)
         
-        current_voice = get_user_voice_preference(user.id)
-        voice_display = VOICE_DISPLAY_NAMES.get(current_voice, "Thiha (Male)")
+        voice_display = voice_catalog.display_name(current_voice)
+        format_display = AUDIO_FORMAT_DISPLAY_NAMES[user_audio_format(profile)]
+        # Format ခလုတ်တွေက Voices menu ထဲမှာ ရှိတယ် (ffmpeg မရှိရင် MP3 တစ်မျိုးတည်း)
+        choose_text = "အသံနဲ့ Audio format ရွေးချယ်ရန်" if len(available_formats()) > 1 else "အသံရွေးချယ်ရန်"
         
         await update.message.reply_text(
             f"မင်္ဂလာပါ {user.first_name}!\n\n"
-            f"🔊 Current voice: {voice_display}\n\n"
-            f"ဤဘော့သည် စာလုံးရေ {MAX_CHARS} အထိ အသံဖိုင် (MP3) ပြောင်းပေးပါသည်။\n"
+            f"🔊 Current voice: {voice_display}\n"
+            f"🎧 Audio format: {format_display}\n\n"
+            f"ဤဘော့သည် စာလုံးရေ {MAX_CHARS} အထိ အသံဖိုင် ပြောင်းပေးပါသည်။\n"
             f"Fair Usage: တစ်ခါသုံးပြီးရင် {COOLDOWN_SECONDS} စက္ကန့် စောင့်ပေးပါ။\n\n"
-            f"အသံရွေးချယ်ရန် '🔊 Voices' ခလုတ်ကို နှိပ်ပါ။",
+            f"{choose_text} '🔊 Voices' ခလုတ်ကို နှိပ်ပါ။",
             reply_markup=reply_markup
         )
 
@@ -212,28 +214,64 @@ async def voices_button_handler(update: Update, context: ContextTypes.DEFAULT_TY
     user = update.effective_user
     await show_voice_selection(update, context, user.id)
 
-async def show_voice_selection(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id):
-    """Voice selection inline keyboard ကိုပြသမယ်"""
-    current_voice = get_user_voice_preference(user_id)
+def user_audio_format(profile):
+    """Profile ထဲက format preference (မရွေးရသေးရင် config default)"""
+    return transcoder.resolve(profile.get("format_preference") or DEFAULT_AUDIO_FORMAT)
+
+def available_formats():
+    """ffmpeg မရှိရင် MP3 တစ်မျိုးတည်း ကျန်မယ်"""
+    return [fmt for fmt in AUDIO_FORMATS if transcoder.resolve(fmt) == fmt]
+
+async def show_voice_selection(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id, locale=None):
+    """Voice selection inline keyboard ကိုပြသမယ် (locale မပေးရင် လက်ရှိ voice ရဲ့ locale)"""
+    profile = await profile_cache.get(user_id)
+    current_voice = profile.get("voice_preference") or DEFAULT_VOICE
+    current_format = user_audio_format(profile)
+    if locale is None:
+        voice = voice_catalog.find(current_voice) or voice_catalog.find(DEFAULT_VOICE)
+        locales = voice_catalog.locales()
+        if voice:
+            locale = voice["Locale"]
+        elif locales:
+            locale = locales[0]
+        else:
+            # VOICE_CATALOG_LOCALES က fallback voice တွေကို အကုန်ဖယ်ထားပြီး catalog snapshot မရောက်သေးရင်
+            message_text = "⏳ Voice list ကို load လုပ်နေဆဲပါ။ ခဏနေမှ ပြန်ကြိုးစားပေးပါ။"
+            if update.callback_query:
+                await update.callback_query.edit_message_text(text=message_text)
+            else:
+                await update.message.reply_text(message_text)
+            return
     
-    # Create inline keyboard with two voice options
-    keyboard = [
-        [
-            InlineKeyboardButton("🗣️ Thiha (Male)", callback_data=f"voice_male_{user_id}"),
-            InlineKeyboardButton("👩 Nilar (Female)", callback_data=f"voice_female_{user_id}")
-        ]
+    # Locale + gender index ကနေ ခလုတ်တွေ ဆောက်မယ် (callback_data: vc:<voice id>:<user id>)
+    buttons = [
+        InlineKeyboardButton(
+            f"{'👩' if gender == 'Female' else '🗣️'} {voice_catalog.display_name(voice['ShortName'])}",
+            callback_data=f"vc:{voice['id']}:{user_id}"
+        )
+        for gender in ("Male", "Female")
+        for voice in voice_catalog.voices(locale, gender)
     ]
+    keyboard = [buttons[i:i + 2] for i in range(0, len(buttons), 2)]
+    if len(voice_catalog.locales()) > 1:
+        keyboard.append([InlineKeyboardButton("🌐 Languages", callback_data=f"vl:0:{user_id}")])
+    # ffmpeg မရှိရင် MP3 တစ်မျိုးတည်းမို့ format ခလုတ် မပြဘူး
+    formats = available_formats()
+    if len(formats) > 1:
+        keyboard.append([
+            InlineKeyboardButton(AUDIO_FORMAT_DISPLAY_NAMES[fmt], callback_data=f"format_{fmt}_{user_id}")
+            for fmt in formats
+        ])
     
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    current_display = VOICE_DISPLAY_NAMES.get(current_voice, "Thiha (Male)")
+    current_display = voice_catalog.display_name(current_voice)
     
     message_text = (
         f"🔊 **Voice Selection**\n\n"
-        f"Current voice: **{current_display}**\n\n"
-        f"အောက်ပါအသံများမှ ရွေးချယ်နိုင်ပါသည်:\n"
-        f"• **Thiha (Male)**\n"
-        f"• **Nilar (Female)**\n"
+        f"Current voice: **{current_display}**\n"
+        f"Audio format: **{AUDIO_FORMAT_DISPLAY_NAMES[current_format]}**\n\n"
+        f"**{locale}** အသံများမှ ရွေးချယ်နိုင်ပါသည်:\n"
     )
     
     if update.callback_query:
@@ -249,34 +287,74 @@ async def show_voice_selection(update: Update, context: ContextTypes.DEFAULT_TYP
             parse_mode="Markdown"
         )
 
+async def show_language_selection(update: Update, user_id, page):
+    """Locale list ကို စာမျက်နှာခွဲပြမယ် (callback_data: vp:<locale>:<user id>)"""
+    locales = voice_catalog.locales()
+    pages = max((len(locales) + LOCALES_PER_PAGE - 1) // LOCALES_PER_PAGE, 1)
+    page = min(max(page, 0), pages - 1)
+    shown = locales[page * LOCALES_PER_PAGE:(page + 1) * LOCALES_PER_PAGE]
+    
+    buttons = [
+        InlineKeyboardButton(f"{locale} ({len(voice_catalog.voices(locale))})", callback_data=f"vp:{locale}:{user_id}")
+        for locale in shown
+    ]
+    keyboard = [buttons[i:i + 3] for i in range(0, len(buttons), 3)]
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton("◀️", callback_data=f"vl:{page - 1}:{user_id}"))
+    if page < pages - 1:
+        navigation.append(InlineKeyboardButton("▶️", callback_data=f"vl:{page + 1}:{user_id}"))
+    if navigation:
+        keyboard.append(navigation)
+    
+    await update.callback_query.edit_message_text(
+        text=f"🌐 **Languages** ({page + 1}/{pages})\n\nဘာသာစကား ရွေးချယ်ပါ:",
+        reply_markup=InlineKeyboardMarkup(keyboard),
+        parse_mode="Markdown"
+    )
+
 async def voice_callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Inline keyboard မှာ voice ရွေးတဲ့အခါ"""
+    """Inline keyboard မှာ voice / language ရွေးတဲ့အခါ (<kind>:<arg>:<user id>)"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
     callback_data = query.data
     
-    # Extract voice type and user ID from callback data
-    if callback_data.startswith("voice_male_"):
-        voice_code = AVAILABLE_VOICES["male"]
-        voice_name = "Thiha (Male)"
-        callback_user_id = int(callback_data.replace("voice_male_", ""))
-    elif callback_data.startswith("voice_female_"):
-        voice_code = AVAILABLE_VOICES["female"]
-        voice_name = "Nilar (Female)"
-        callback_user_id = int(callback_data.replace("voice_female_", ""))
+    # အရင် keyboard တွေမှာ ကျန်နေတဲ့ voice_male_<id> / voice_female_<id> ကိုလည်း လက်ခံမယ်
+    if callback_data.startswith("voice_"):
+        gender, _, callback_user_id = callback_data[len("voice_"):].partition("_")
+        legacy = voice_catalog.find(AVAILABLE_VOICES.get(gender, ""))
+        kind, arg = "vc", legacy["id"] if legacy else ""
     else:
+        kind, _, rest = callback_data.partition(":")
+        arg, _, callback_user_id = rest.rpartition(":")
+    
+    if not callback_user_id.isdigit():
         await query.edit_message_text("Invalid selection")
         return
     
     # Check if the user who clicked is the same as in callback data
-    if user_id != callback_user_id:
+    if user_id != int(callback_user_id):
         await query.edit_message_text("ကျေးဇူးပြု၍ မိမိ၏အသံကိုသာ ပြောင်းလဲနိုင်ပါသည်။")
         return
     
+    if kind == "vl" and arg.isdigit():
+        await show_language_selection(update, user_id, int(arg))
+        return
+    if kind == "vp" and voice_catalog.voices(arg):
+        await show_voice_selection(update, context, user_id, locale=arg)
+        return
+    
+    voice = voice_catalog.get(arg) if kind == "vc" else None
+    if voice is None:
+        await query.edit_message_text("Invalid selection")
+        return
+    voice_code = voice["ShortName"]
+    voice_name = voice_catalog.display_name(voice_code)
+    
     # Update voice preference in database
-    success = update_voice_preference(user_id, voice_code)
+    success = await profile_cache.set_voice_preference(user_id, voice_code)
     
     if success:
         await query.edit_message_text(
@@ -289,49 +367,206 @@ async def voice_callback_handler(update: Update, context: ContextTypes.DEFAULT_T
             "❌ အမှားတစ်ခုခုဖြစ်နေပါသည်။ ကျေးဇူးပြု၍ နောက်မှထပ်ကြိုးစားကြည့်ပါ။"
         )
 
+async def format_callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Inline keyboard မှာ output format ရွေးတဲ့အခါ (format_<code>_<user_id>)"""
+    query = update.callback_query
+    await query.answer()
+    
+    fmt, _, callback_user_id = query.data[len("format_"):].rpartition("_")
+    if fmt not in AUDIO_FORMATS or not callback_user_id.isdigit():
+        await query.edit_message_text("Invalid selection")
+        return
+    
+    if query.from_user.id != int(callback_user_id):
+        await query.edit_message_text("ကျေးဇူးပြု၍ မိမိ၏အသံကိုသာ ပြောင်းလဲနိုင်ပါသည်။")
+        return
+    
+    success = await profile_cache.set_format_preference(query.from_user.id, fmt)
+    
+    if success:
+        await query.edit_message_text(
+            f"✅ **Audio format changed successfully!**\n\n"
+            f"Your audio will be sent as: **{AUDIO_FORMAT_DISPLAY_NAMES[fmt]}**\n\n",
+            parse_mode="Markdown"
+        )
+    else:
+        await query.edit_message_text(
+            "❌ အမှားတစ်ခုခုဖြစ်နေပါသည်။ ကျေးဇူးပြု၍ နောက်မှထပ်ကြိုးစားကြည့်ပါ။"
+        )
+
 # --- Admin Handlers (Admin Only) ---
 async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    total, active, blocked, total_gen = get_stats()
+    # Counters document တစ်ခုတည်းကနေ ဖတ်မယ် (stale ဖြစ်မှသာ recount)
+    stats = await stats_service.get()
+    total, active, blocked, total_gen = stats["total"], stats["active"], stats["blocked"], stats["total_generated"]
     
     # Get voice usage statistics
-    voice_stats_pipeline = [
-        {"$group": {"_id": "$voice_preference", "count": {"$sum": 1}}}
-    ]
-    voice_stats = list(users_col.aggregate(voice_stats_pipeline))
-    
     voice_stats_text = ""
-    for stat in voice_stats:
-        voice_code = stat["_id"] or "Not Set"
-        voice_display = VOICE_DISPLAY_NAMES.get(voice_code, voice_code)
-        voice_stats_text += f"• {voice_display}: {stat['count']} users\n"
+    for voice_code, count in stats["voices"].items():
+        voice_display = "Not Set" if voice_code == "none" else voice_catalog.display_name(voice_code)
+        voice_stats_text += f"• {voice_display}: {count} users\n"
+    
+    cache = audio_cache.stats()
+    profiles = profile_cache.stats()
+    usage = usage_log.stats()
+    queue = scheduler.stats()
+    adaptive = concurrency_controller.stats()
+    flights = single_flight.stats()
+    formats = transcoder.stats()
+    resilience = synthesis_policy.stats()
+    status_stats = status_manager.stats()
+    api_calls_text = ", ".join(
+        f"{source} {row['per_request']:.2f}" for source, row in sorted(status_stats["sources"].items())
+    ) or "no requests yet"
+    hedge_text = f"{resilience['hedge_delay']:.2f}s" if resilience["hedge_delay"] is not None else "off"
+    catalog = voice_catalog.stats()
+    catalog_age = f"{catalog['age_hours']:.1f}h old" if catalog["age_hours"] is not None else "not loaded"
+    formats_text = "".join(
+        f"• {AUDIO_FORMAT_DISPLAY_NAMES.get(fmt, fmt)}: {row['bytes_per_char']:.0f} bytes/char "
+        f"({row['results']} results, {row['bytes'] / 1e6:.1f} MB)\n"
+        for fmt, row in formats["formats"].items()
+    ) or "• No audio generated yet\n"
+    pool_text = ""
+    if edge_pool:
+        pool = edge_pool.stats()
+        pool_text = (
+            f"• edge-tts pool: {pool['size']} warm, {pool['uses']} uses, "
+            f"{pool['warmed']} warm-ups ({pool['warm_errors']} failed), {pool['recycles']} recycles\n"
+        )
+    jobs_text = ""
+    if SYNTH_MODE == "queue":
+        jobs = await job_queue.counts()
+        jobs_text = (
+            f"• Worker jobs: queued {jobs.get('queued', 0)}, running {jobs.get('running', 0)}, "
+            f"done {jobs.get('done', 0)}, failed {jobs.get('failed', 0)}\n"
+        )
+    decisions_text = "".join(
+        f"  - {datetime.fromtimestamp(ts).strftime('%H:%M:%S')} {old}→{new} ({reason})\n"
+        for ts, old, new, reason in adaptive["history"][-3:]
+    )
     
     msg = (
         f"📈 **Bot Statistics**\n\n"
         f"👥 Total Users: {total}\n"
         f"✅ Active Users: {active}\n"
         f"🚫 Blocked Users: {blocked}\n"
-        f"🔊 Total Generated: {total_gen}\n\n"
+        f"🔊 Total Generated: {total_gen}\n"
+        f"🕒 Last full recount: {stats['recounted_at'].strftime('%H:%M:%S')}\n\n"
         f"**Voice Preferences:**\n{voice_stats_text}"
+        f"• Catalog: {catalog['voices']} voices / {catalog['locales']} locales from {catalog['source']} ({catalog_age}, "
+        f"{catalog['fetches']} fetches, {catalog['fetch_errors']} failed)\n\n"
+        f"**Audio Cache (since restart):**\n"
+        f"• Hits: {cache['hits']} / Misses: {cache['misses']} ({cache['hit_rate']:.1f}%)\n"
+        f"• Characters not re-synthesized: {cache['chars_saved']}\n"
+        f"• In-memory entries: {cache['memory_items']}\n"
+        f"• Coalesced in flight: {flights['coalesced']} requests ({flights['leaders']} syntheses, "
+        f"{flights['fallbacks']} retried after a failure, {flights['in_flight']} running)\n\n"
+        f"**Audio Formats (ffmpeg {'on' if formats['ffmpeg'] else 'missing'}, {formats['fallbacks']} MP3 fallbacks):**\n"
+        f"{formats_text}\n"
+        f"**User Profile Cache:**\n"
+        f"• DB ops / request: {profiles['ops_per_request']:.2f} ({profiles['db_ops']} ops, {profiles['requests']} requests)\n"
+        f"• Cached profiles: {profiles['cached']}, pending writes: {profiles['pending']}\n"
+        f"• Usage events: {usage['written']} written in {usage['flushes']} flushes, "
+        f"{usage['pending']} buffered, {usage['dropped']} dropped (`/usage` for the report)\n"
+        f"• Bot API calls / request: {api_calls_text} ({status_stats['coalesced']} status edits coalesced)\n\n"
+        f"**Queue:**\n"
+        f"• Waiting: {queue['depth']} ({queue['waiting_users']} users), Running: {queue['running']}/{queue['concurrency']}\n"
+        f"• Wait avg/p95/max: {queue['avg_wait']:.1f}s / {queue['p95_wait']:.1f}s / {queue['max_wait']:.1f}s\n"
+        f"• Completed: {queue['completed']}, Rejected (queue full): {queue['shed']}\n"
+        f"{jobs_text}"
+        f"• Adaptive limit: {adaptive['limit']} ({adaptive['min']}-{adaptive['max']}), "
+        f"edge-tts calls: {adaptive['samples']}, errors: {adaptive['failures']}, slow: {adaptive['slow']}\n"
+        f"• edge-tts retries: {resilience['retried']} ({resilience['retries_denied']} denied by budget), "
+        f"timeouts: {resilience['timeouts']}, hedges: {resilience['hedges']} ({resilience['hedge_wins']} won, "
+        f"delay {hedge_text})\n"
+        f"{decisions_text}"
+        f"{pool_text}"
     )
     await update.message.reply_text(msg, parse_mode="Markdown")
 
-async def admin_export(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def send_user_export(update: Update, incremental):
     status_msg = await update.message.reply_text("⏳ Generating CSV...")
-    file_path = None
+    export_file = None
+    started_at = datetime.now()
     try:
-        file_path = generate_csv_file()
-        await update.message.reply_document(document=open(file_path, 'rb'), caption="User Data with Voice Preferences")
+        since = None
+        if incremental:
+            since = await async_db.get_last_export_time()
+            if since:
+                # Write-behind flush မရောက်သေးတဲ့ last_active တွေ မလွတ်သွားအောင် အနည်းငယ် ထပ်ယူမယ်
+                since -= timedelta(seconds=PROFILE_FLUSH_INTERVAL_SECONDS * 2)
+
+        export_file, rows = await async_db.export_users_csv(since, EXPORT_BATCH_SIZE, AUDIO_SPOOL_MAX_BYTES)
+        caption = "User Data with Voice Preferences"
+        if since:
+            caption += f"\nChanged since {since.strftime('%Y-%m-%d %H:%M')}: {rows} users"
+        else:
+            caption += f"\nAll users: {rows}"
+
+        await update.message.reply_document(
+            # PTB က file တစ်ခုလုံးကို အရင်ဖတ်တာမို့ bytes ပေးမယ် (memory ထဲမှာရှိတဲ့ spooled file မှာ name မရှိလို့)
+            document=export_file.read(),
+            filename=f"users_{started_at.strftime('%Y%m%d_%H%M%S')}.csv.gz",
+            caption=caption
+        )
+        await async_db.set_last_export_time(started_at)
+        await status_msg.delete()
     except Exception as e:
         logging.exception("Export Error")
         await status_msg.edit_text(f"Error: {e}")
     finally:
-        # File Cleanup (သေချာပေါက် ဖျက်မယ့်နေရာ)
-        if file_path and os.path.exists(file_path):
-            os.remove(file_path)
-            await status_msg.delete()
+        # Buffer Cleanup (spill ဖြစ်ထားရင် temp file ပါ ပျက်သွားမယ်)
+        if export_file is not None:
+            export_file.close()
+
+async def admin_export(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await send_user_export(update, incremental=False)
+
+async def admin_export_changes(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """နောက်ဆုံး export ပြီးနောက် active ဖြစ်ခဲ့တဲ့ user တွေပဲ ထုတ်မယ်"""
+    await send_user_export(update, incremental=True)
+
+async def admin_usage(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/usage [days] - hourly/daily summary document တွေကိုပဲ ဖတ်မယ် (event history မဖတ်ဘူး)"""
+    try:
+        days = min(max(int(context.args[0]), 1), 90) if context.args else 7
+    except ValueError:
+        await update.message.reply_text("Usage: `/usage [days]`", parse_mode="Markdown")
+        return
+    report = await usage_log.report(days)
+
+    days_text = "".join(
+        f"• {day}: {doc.get('requests', 0)} req ({doc.get('ok', 0)} ok), "
+        f"{doc.get('chars', 0)} chars, {doc.get('audio_bytes', 0) / 1e6:.1f} MB\n"
+        for day, doc in report["days"] if doc
+    ) or "• No usage recorded yet\n"
+    top_voices = sorted(report["voices"].items(), key=lambda item: item[1]["chars"], reverse=True)[:5]
+    voices_text = "".join(
+        f"• {voice_catalog.display_name(voice)}: {row['chars']} chars ({row['requests']} req)\n"
+        for voice, row in top_voices
+    ) or "• -\n"
+    peak_hours = sorted(report["hours"].items(), key=lambda item: item[1], reverse=True)[:3]
+    peak_text = ", ".join(f"{hour}:00 ({n} req)" for hour, n in peak_hours) or "-"
+    last = report["last_24h"]
+    synthesized = last["synthesized"] or 1
+
+    await update.message.reply_text(
+        f"📊 **Usage (last {days} days)**\n\n"
+        f"{days_text}\n"
+        f"**Last 24h:** {last['requests']} req, {last['failed']} failed, {last['chars']} chars\n"
+        f"• Avg queue wait: {last['queue_wait_seconds'] / synthesized:.1f}s, "
+        f"avg synthesis: {last['synthesis_seconds'] / synthesized:.1f}s ({last['synthesized']} synthesized)\n\n"
+        f"**Top voices (chars):**\n{voices_text}\n"
+        f"**Peak hours:** {peak_text}",
+        parse_mode="Markdown"
+    )
 
 async def admin_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text("Reply to a message with `/broadcast` to send to all users.")
+    await update.message.reply_text(
+        "Reply to a message with `/broadcast` to send to all users.\n"
+        "Use `/export_changes` to export only users active since the last export.\n"
+        "Use `/usage [days]` for per-day usage, top voices and peak hours."
+    )
 
 async def broadcast_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != ADMIN_ID: return
@@ -340,32 +575,28 @@ async def broadcast_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     original_msg = update.message.reply_to_message
-    users = get_all_active_users()
-    status_msg = await update.message.reply_text(f"🚀 Broadcasting to {len(users)} users...")
-    
-    success, blocked = 0, 0
-    for user_id in users:
-        try:
-            if original_msg.photo:
-                await context.bot.send_photo(chat_id=user_id, photo=original_msg.photo[-1].file_id, caption=original_msg.caption)
-            elif original_msg.text:
-                await context.bot.send_message(chat_id=user_id, text=original_msg.text)
-            success += 1
-        except Forbidden:
-            mark_user_blocked(user_id)
-            blocked += 1
-        except Exception: 
-            logging.exception(f"Broadcast error for {user_id}")
-        
-        # Broadcast Safe Limit (0.15s)
-        await asyncio.sleep(0.15) 
+    if original_msg.photo:
+        payload = {"kind": "photo", "file_id": original_msg.photo[-1].file_id, "caption": original_msg.caption}
+    elif original_msg.text:
+        payload = {"kind": "text", "text": original_msg.text}
+    else:
+        await update.message.reply_text("Text (သို့) Photo ကိုသာ Broadcast လုပ်နိုင်ပါသည်။")
+        return
 
-    await status_msg.edit_text(f"✅ Broadcast Done!\nSent: {success}, Blocked: {blocked}")
+    status_msg = await update.message.reply_text("🚀 Broadcast starting...")
+    
+    # Handler ကို မပိတ်ထားဘဲ background task အဖြစ် run မယ်
+    await broadcast_engine.start(context.bot, payload, status_msg.chat_id, status_msg.message_id)
 
 # --- Text Handler (General Users) ---
+def log_usage(user_id, voice, text, result, **fields):
+    """Request outcome ကို metrics နဲ့ usage log နှစ်ခုလုံးမှာ မှတ်မယ်"""
+    TTS_REQUESTS.inc(result=result)
+    usage_log.record(user_id, voice, len(text), result, **fields)
+
 async def text_to_speech(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
-    add_or_update_user(user)
+    profile = await profile_cache.touch(user)
     text = update.message.text
     
     # စာမရှိရင် Return
@@ -373,62 +604,348 @@ async def text_to_speech(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # 1. Check Character Limit
     if len(text) > MAX_CHARS:
+        log_usage(user.id, profile["voice_preference"], text, "too_long")
+        status_manager.record("rejected", 1)
         await update.message.reply_text(f"❌ စာလုံးရေများလွန်းသည် ({len(text)}/{MAX_CHARS})")
         return
 
-    # 2. Check Cooldown from DB
-    remaining_time = check_cooldown(user.id)
+    # 2. Rate Limit (စစ်တာနဲ့ token reserve လုပ်တာ တစ်ဆက်တည်း)
+    cost = rate_limiter.cost(len(text))
+    remaining_time, scope = rate_limiter.try_acquire(user.id, cost)
     if remaining_time > 0:
-        await update.message.reply_text(f"⏳ Fair Usage: ကျေးဇူးပြု၍ {remaining_time} စက္ကန့် စောင့်ပေးပါ။")
+        log_usage(user.id, profile["voice_preference"], text, "rate_limited")
+        status_manager.record("rejected", 1)
+        if scope == "global":
+            await update.message.reply_text(f"⏳ Bot အလုပ်များနေပါသည်။ {remaining_time} စက္ကန့်အကြာ ပြန်ကြိုးစားပေးပါ။")
+        else:
+            await update.message.reply_text(f"⏳ Fair Usage: ကျေးဇူးပြု၍ {remaining_time} စက္ကန့် စောင့်ပေးပါ။")
         return
 
     # Get user's voice preference
-    selected_voice = get_user_voice_preference(user.id)
-    voice_display = VOICE_DISPLAY_NAMES.get(selected_voice, "Thiha (Male)")
+    selected_voice = profile["voice_preference"]
+    voice_display = voice_catalog.display_name(selected_voice)
+    audio_format = user_audio_format(profile)
     
-    status_msg = await update.message.reply_text(f"Processing with {voice_display}... (Queue ဝင်နေပါသည်)")
-    output_file = f"{uuid.uuid4()}.mp3"
+    # 3. Audio Cache: တူညီတဲ့ စာ + အသံ + format ဆိုရင် အရင် upload ထားတဲ့ file_id ကို ပြန်ပို့မယ်
+    cached_file_id = await audio_cache.get(text, selected_voice, audio_format)
+    if cached_file_id:
+        try:
+            await reply_with_file_id(update, user, cached_file_id, audio_format, voice_display, cost, "cache")
+            log_usage(user.id, selected_voice, text, "cache_hit")
+            status_manager.record("cache", 1)
+            return
+        except BadRequest:
+            # file_id မသုံးနိုင်တော့ရင် cache ကဖယ်ပြီး အသစ်ပြန်ထုတ်မယ်
+            logging.warning("Cached file_id rejected, regenerating")
+            await audio_cache.invalidate(text, selected_voice, audio_format)
+    
+    if SYNTH_MODE == "queue":
+        await enqueue_synthesis(update, user, text, selected_voice, voice_display, audio_format, cost)
+        return
+    
+    # 4. Single-flight: တူညီတဲ့ request တစ်ခု ထုတ်နေဆဲဆိုရင် အဲဒါပြီးတာကို စောင့်ပြီး file_id ပြန်သုံးမယ်
+    # (Progressive delivery က file_id တစ်ခုတည်း မထွက်လို့ မပေါင်းဘူး)
+    progressive = PROGRESSIVE_DELIVERY and len(text) > PROGRESSIVE_SEGMENT_CHARS
+    flight_key = None if progressive else cache_key(text, selected_voice, audio_format)
+    while flight_key:
+        flight = single_flight.join(flight_key)
+        if flight is None:
+            break  # ဒီ request က leader
+        file_id = await single_flight.wait(flight)
+        if file_id:
+            try:
+                await reply_with_file_id(update, user, file_id, audio_format, voice_display, cost, "coalesced")
+                log_usage(user.id, selected_voice, text, "coalesced")
+                status_manager.record("coalesced", 1)
+                return
+            except BadRequest:
+                logging.warning("Coalesced file_id rejected, regenerating")
+    
+    audio = None
+    file_id = None
+    success = False
+    queue_wait = 0.0
+    # မြန်တဲ့ request မှာ chat action ပဲပြမယ်၊ ကြာမှ status message ပို့ပြီး နောက်ဆုံး text ကိုပဲ edit မယ်
+    status = status_manager.open(update.message, f"Processing with {voice_display}... (Queue ဝင်နေပါသည်)")
+    final_text = None
+
+    async def show_queue_position(position, eta):
+        status.update(f"⏳ Queue: #{position} ({voice_display}) - ခန့်မှန်းချိန် {int(eta) + 1} စက္ကန့်")
 
     try:
-        # 3. Queue System
-        async with CONCURRENT_LIMIT:
-            await status_msg.edit_text(f"Generating Audio with {voice_display}... 🎵")
+        # 5. Queue System
+        queued = time.monotonic()
+        async with scheduler.slot(user.id, len(text), show_queue_position):
+            status.update(f"Generating Audio with {voice_display}... 🎵")
+            started = time.monotonic()
+            queue_wait = started - queued
             
-            communicate = edge_tts.Communicate(text, selected_voice)
-            await communicate.save(output_file)
+            if progressive:
+                sent_bytes = await send_progressive(
+                    update, status, text, selected_voice, voice_display, audio_format, started
+                )
+                profile_cache.record_generation(user.id)
+                log_usage(
+                    user.id, selected_voice, text, "generated",
+                    audio_bytes=sent_bytes, queue_wait=queue_wait, synthesis_seconds=time.monotonic() - started
+                )
+                success = True
+                return
             
-            if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-                with open(output_file, 'rb') as audio:
-                    await update.message.reply_audio(
-                        audio=audio, 
-                        title=f"Voice-{datetime.now().strftime('%H%M%S')}",
-                        performer=f"Bot AI ({voice_display})",
-                        caption=f"Generated with {voice_display}"
+            with SYNTHESIS_SECONDS.time():
+                audio, audio_size = await synthesize_long(
+                    text, selected_voice, AUDIO_SPOOL_MAX_BYTES,
+                    chunk_chars=CHUNK_CHARS, concurrency=CHUNK_CONCURRENCY, retries=CHUNK_RETRIES,
+                    observer=synthesis_observer, pool=edge_pool, policy=synthesis_policy
+                )
+            synthesis_seconds = time.monotonic() - started
+            
+            if audio_size > 0:
+                audio, audio_size, sent_format = await transcoder.convert(audio, audio_size, audio_format, len(text))
+                AUDIO_SIZE_BYTES.observe(audio_size)
+                # PTB က file တစ်ခုလုံးကို အရင်ဖတ်တာမို့ bytes ပေးမယ် (memory ထဲမှာရှိတဲ့ spooled file မှာ name မရှိလို့)
+                with TELEGRAM_UPLOAD_SECONDS.time(source="upload"):
+                    sent_file_id = await send_audio_result(
+                        update, audio.read(), sent_format, voice_display,
+                        title=f"Voice-{datetime.now().strftime('%H%M%S')}", filename="voice"
                     )
+                status.count()
+                FIRST_AUDIO_SECONDS.observe(time.monotonic() - started, mode="single")
+                AUDIO_BYTES.inc(audio_size)
+                
+                # Transcode မအောင်မြင်လို့ MP3 ပို့လိုက်ရရင် MP3 key အောက်မှာပဲ သိမ်းမယ်
+                if sent_file_id:
+                    if sent_format == audio_format:
+                        file_id = sent_file_id
+                        # စောင့်နေတဲ့ တူညီ request တွေကို cache write မစောင့်ဘဲ ချက်ချင်း ပို့ခိုင်းမယ်
+                        if flight_key:
+                            single_flight.finish(flight_key, file_id)
+                    await audio_cache.put(text, selected_voice, sent_file_id, sent_format)
                 
-                # Success: Update stats & cooldown in DB
-                update_usage_stats(user.id)
+                # Success: Update stats & cooldown (write-behind)
+                profile_cache.record_generation(user.id)
+                log_usage(
+                    user.id, selected_voice, text, "generated",
+                    audio_bytes=audio_size, queue_wait=queue_wait, synthesis_seconds=synthesis_seconds
+                )
+                success = True
             else:
-                await status_msg.edit_text("Error: Audio file empty.")
+                log_usage(
+                    user.id, selected_voice, text, "empty",
+                    queue_wait=queue_wait, synthesis_seconds=synthesis_seconds
+                )
+                final_text = "Error: Audio file empty."
+
+    except QueueFull:
+        log_usage(user.id, selected_voice, text, "queue_full")
+        final_text = "⏳ Queue ပြည့်နေပါသည်။ ခဏနေမှ ပြန်ကြိုးစားပေးပါ။"
 
     except Exception as e:
+        log_usage(user.id, selected_voice, text, "error", queue_wait=queue_wait)
         logging.exception("TTS Generation Error")
-        await status_msg.edit_text("Sorry, an error occurred during generation.")
+        final_text = "Sorry, an error occurred during generation."
     
     finally:
-        # 4. File Cleanup (အရေးအကြီးဆုံး ပြင်ဆင်ချက်)
-        # Error တက်တက်၊ မတက်တက် ဖိုင်ကျန်နေရင် ဖျက်မယ်
-        if os.path.exists(output_file):
-            os.remove(output_file)
+        # မအောင်မြင်ရင် file_id None နဲ့ပြီးလို့ စောင့်နေသူတွေက ကိုယ်တိုင် ပြန်ထုတ်မယ်
+        if flight_key:
+            single_flight.finish(flight_key, file_id)
         
-        # Processing message ကို ဖျက်မယ် (Optional)
-        try:
-            await status_msg.delete()
-        except:
-            pass
+        # မအောင်မြင်ရင် user ကို cooldown မစောင့်ခိုင်းဘဲ token ပြန်ပေးမယ်
+        if not success:
+            rate_limiter.refund(user.id, cost)
+        
+        # 6. Buffer Cleanup
+        # Error တက်တက်၊ မတက်တက် buffer ကို ပိတ်မယ် (spill ဖြစ်ထားရင် temp file ပါ ပျက်သွားမယ်)
+        if audio is not None:
+            audio.close()
+        
+        # Processing message ကို ဖျက်မယ် (error ဆိုရင် ဖျက်မယ့်အစား error text ပြထားမယ်)
+        await status.close(final_text)
+
+async def send_audio_result(update: Update, audio, fmt, voice_display, title, filename, caption_suffix=""):
+    """Opus ကို voice note (reply_voice)၊ ကျန်တာကို audio (reply_audio) အဖြစ်ပို့ပြီး file_id ပြန်ပေးမယ်"""
+    caption = f"Generated with {voice_display}{caption_suffix}"
+    spec = AUDIO_FORMATS[fmt]
+    if spec["voice_note"]:
+        sent = await update.message.reply_voice(
+            voice=audio, filename=f"{filename}.{spec['extension']}", caption=caption
+        )
+        return sent.voice.file_id if sent.voice else None
+    sent = await update.message.reply_audio(
+        audio=audio,
+        filename=f"{filename}.{spec['extension']}",
+        title=title,
+        performer=f"Bot AI ({voice_display})",
+        caption=caption
+    )
+    return sent.audio.file_id if sent.audio else None
+
+async def reply_with_file_id(update: Update, user, file_id, fmt, voice_display, cost, source):
+    """Upload ပြီးသား file_id နဲ့ ပြန်ပို့ခြင်း (file_id မသုံးနိုင်ရင် BadRequest)"""
+    with TELEGRAM_UPLOAD_SECONDS.time(source=source):
+        await send_audio_result(
+            update, file_id, fmt, voice_display,
+            title=f"Voice-{datetime.now().strftime('%H%M%S')}", filename="voice"
+        )
+    profile_cache.record_generation(user.id)
+    # Synthesis မလိုတော့လို့ global token ကို ပြန်ပေးမယ်
+    rate_limiter.refund(None, cost)
 
-def main():
-    application = Application.builder().token(TOKEN).build()
+async def enqueue_synthesis(update: Update, user, text, voice, voice_display, audio_format, cost):
+    """Queue mode: validate ပြီးသား job ကို Mongo queue ထဲထည့်ရုံပဲ (worker က ထုတ်ပြီး ပို့မယ်)"""
+    status_msg = None
+    try:
+        if await job_queue.queued_count() >= QUEUE_MAX_SIZE:
+            log_usage(user.id, voice, text, "queue_full")
+            rate_limiter.refund(user.id, cost)
+            await update.message.reply_text("⏳ Queue ပြည့်နေပါသည်။ ခဏနေမှ ပြန်ကြိုးစားပေးပါ။")
+            return
+
+        status_msg = await update.message.reply_text(f"Processing with {voice_display}... (Queue ဝင်နေပါသည်)")
+        await job_queue.enqueue({
+            "user_id": user.id,
+            "chat_id": update.effective_chat.id,
+            "status_message_id": status_msg.message_id,
+            "text": text,
+            "voice": voice,
+            "voice_display": voice_display,
+            "format": audio_format,
+        })
+        # Outcome ကို worker က usage log ထဲ မှတ်မယ်
+        TTS_REQUESTS.inc(result="queued")
+    except Exception:
+        log_usage(user.id, voice, text, "error")
+        logging.exception("Job Enqueue Error")
+        rate_limiter.refund(user.id, cost)
+        if status_msg:
+            await status_msg.edit_text("Sorry, an error occurred during generation.")
+
+async def send_progressive(update: Update, status, text, voice, voice_display, audio_format, started):
+    """စာရှည်ကို segment လိုက်ထုတ်ပြီး ပြီးတဲ့ segment ကို အစဉ်လိုက် ချက်ချင်းပို့မယ်
+
+    Segments are not cached: the audio cache maps one text to one file_id.
+    Returns the total bytes sent.
+    """
+    sent_bytes = 0
+    stamp = datetime.now().strftime('%H%M%S')
+    segments = synthesize_segments(
+        text, voice, PROGRESSIVE_SEGMENT_CHARS, AUDIO_SPOOL_MAX_BYTES,
+        chunk_chars=CHUNK_CHARS, concurrency=CHUNK_CONCURRENCY, retries=CHUNK_RETRIES,
+        observer=synthesis_observer, pool=edge_pool, policy=synthesis_policy
+    )
+    with SYNTHESIS_SECONDS.time():
+        async with aclosing(segments):
+            async for number, count, audio, audio_size in segments:
+                try:
+                    audio, audio_size, sent_format = await transcoder.convert(
+                        audio, audio_size, audio_format, len(text) // count
+                    )
+                    AUDIO_SIZE_BYTES.observe(audio_size)
+                    with TELEGRAM_UPLOAD_SECONDS.time(source="upload"):
+                        await send_audio_result(
+                            update, audio.read(), sent_format, voice_display,
+                            title=f"Voice-{stamp} ({number}/{count})", filename=f"voice_{number}",
+                            caption_suffix=f" ({number}/{count})"
+                        )
+                    status.count()
+                    AUDIO_BYTES.inc(audio_size)
+                    sent_bytes += audio_size
+                finally:
+                    audio.close()
+
+                if number == 1:
+                    FIRST_AUDIO_SECONDS.observe(time.monotonic() - started, mode="progressive")
+                if number < count:
+                    status.update(f"Generating Audio with {voice_display}... 🎵 ({number}/{count} sent)")
+    return sent_bytes
+
+# 2. Web Server (Health check + Webhook) - bot နဲ့ event loop တစ်ခုတည်းမှာ run မယ်
+# Polling mode မှာ deferred_startup က ဆောက်မယ် (webhook mode မှာတော့ update ဝင်ပေါက်မို့ main() က ဆောက်ထားမယ်)
+web_server = None
+startup_task = None
+
+async def import_in_thread(name):
+    """Module import ကို event loop အပြင်မှာ လုပ်မယ် (update handling ကို မပိတ်အောင်)"""
+    return await asyncio.to_thread(importlib.import_module, name)
+
+async def deferred_startup(application: Application):
+    """Cold start: polling စပြီးမှ လုပ်ရမယ့် အလုပ်တွေ (DB လိုတဲ့ handler တွေက run_db ထဲမှာ connect ကို စောင့်မယ်)"""
+    global web_server, edge_pool
+    started = time.perf_counter()
+    if web_server is None:
+        try:
+            web_server = (await import_in_thread("webserver")).BotWebServer(
+                application, port=PORT, metrics_path=METRICS_PATH
+            )
+            await web_server.start()
+        except Exception:
+            logging.exception("Web Server Start Error")
+
+    if SYNTH_MODE == "local":
+        try:
+            # ပထမ request က import ကို မစောင့်ရအောင် ကြို import လုပ်ထားမယ်
+            await import_in_thread("edge_tts")
+            if EDGE_TTS_POOL_SIZE > 0:
+                edge_pool = (await import_in_thread("edge_pool")).EdgeConnectionPool(
+                    size=EDGE_TTS_POOL_SIZE, idle_timeout=EDGE_TTS_POOL_IDLE_SECONDS
+                )
+                edge_pool.start()
+        except Exception:
+            logging.exception("edge-tts Warm-up Error")
+
+    await async_db.wait_ready()
+    try:
+        await async_db.run_db(schema.ensure_indexes, db)
+        await async_db.run_db(audio_cache.ensure_indexes)
+        await async_db.run_db(usage_log.ensure_indexes)
+        if SYNTH_MODE == "queue":
+            await async_db.run_db(job_queue.ensure_indexes)
+        await broadcast_engine.resume_pending(application.bot)
+    except Exception:
+        logging.exception("Startup DB Task Error")
+    logging.info(f"Deferred startup finished in {time.perf_counter() - started:.2f}s")
+
+async def on_startup(application: Application):
+    # Mongo ကို background မှာ ဖွင့်မယ် (TLS / SRV lookup ကို polling က မစောင့်ဘူး)
+    async_db.connect()
+    if web_server:
+        await web_server.start()
+    profile_cache.start()
+    stats_service.start()
+    usage_log.start()
+    rate_limiter.start()
+    voice_catalog.start()
+    global startup_task
+    startup_task = asyncio.get_running_loop().create_task(deferred_startup(application))
+
+async def on_shutdown(application: Application):
+    # Write-behind queue ထဲ ကျန်နေတာတွေကို flush ပြီးမှ Mongo executor ကို ပိတ်မယ်
+    if startup_task and not startup_task.done():
+        startup_task.cancel()
+        await asyncio.gather(startup_task, return_exceptions=True)
+    await broadcast_engine.stop()
+    await profile_cache.stop()
+    await stats_service.stop()
+    await usage_log.stop()
+    await rate_limiter.stop()
+    await voice_catalog.stop()
+    if edge_pool:
+        await edge_pool.stop()
+    if web_server:
+        await web_server.stop()
+    async_db.shutdown()
+
+def build_application():
+    application = (
+        Application.builder()
+        .token(TOKEN)
+        .base_url(TELEGRAM_BASE_URL)
+        .update_queue(asyncio.Queue(maxsize=UPDATE_QUEUE_MAX_SIZE))
+        .concurrent_updates(CONCURRENT_UPDATES)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
     
     # Command Handlers
     application.add_handler(CommandHandler("start", start))
@@ -442,15 +959,54 @@ def main():
     application.add_handler(MessageHandler(filters.Regex("^📊 Dashboard Stats$") & filters.User(ADMIN_ID), admin_stats))
     application.add_handler(MessageHandler(filters.Regex("^📂 Export User Data$") & filters.User(ADMIN_ID), admin_export))
     application.add_handler(MessageHandler(filters.Regex("^📢 Broadcast Help$") & filters.User(ADMIN_ID), admin_help))
+    application.add_handler(CommandHandler("export_changes", admin_export_changes, filters=filters.User(ADMIN_ID)))
+    application.add_handler(CommandHandler("usage", admin_usage, filters=filters.User(ADMIN_ID)))
     
     # Callback Query Handler (Voice selection)
-    application.add_handler(CallbackQueryHandler(voice_callback_handler, pattern="^voice_"))
+    application.add_handler(CallbackQueryHandler(voice_callback_handler, pattern="^(voice_|v[clp]:)"))
+    application.add_handler(CallbackQueryHandler(format_callback_handler, pattern="^format_"))
     
     # General Text Handler (Admin Command တွေ မပါတော့ပါ)
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_to_speech))
+    return application
+
+async def run_webhook(application: Application):
+    """Telegram က update တွေကို web_server ဆီ တိုက်ရိုက် POST လုပ်မယ်"""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    # run_polling မသုံးတဲ့အတွက် post_init / post_shutdown ကို ကိုယ်တိုင်ခေါ်ရမယ်
+    await application.initialize()
+    await on_startup(application)
+    try:
+        await application.bot.set_webhook(
+            url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES
+        )
+        await application.start()
+        await stop_event.wait()
+        await application.stop()
+    finally:
+        await on_shutdown(application)
+        await application.shutdown()
 
-    application.run_polling()
+def main():
+    global web_server
+    # Index တွေကို deferred_startup က background မှာ ဆောက်မယ်
+    application = build_application()
+
+    if BOT_MODE == "webhook":
+        from webserver import BotWebServer
+        web_server = BotWebServer(
+            application, port=PORT, webhook_path=WEBHOOK_PATH, secret_token=WEBHOOK_SECRET,
+            metrics_path=METRICS_PATH
+        )
+        asyncio.run(run_webhook(application))
+    else:
+        application.run_polling()
 
 if __name__ == "__main__":
-    keep_alive()
     main()
\ No newline at end of file
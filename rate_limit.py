@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+
+
+class TokenBucket:
+    """Token bucket that may go into debt, so one long text costs more than one short text."""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity, rate, tokens=None, updated=None):
+        self.capacity = capacity
+        self.rate = rate  # tokens per second
+        self.tokens = capacity if tokens is None else tokens
+        self.updated = time.time() if updated is None else updated
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost, now):
+        """Admission ရဖို့ စောင့်ရမယ့် စက္ကန့် (0 ဆိုရင် ချက်ချင်းရ)"""
+        self._refill(now)
+        # Capacity ထက်ကြီးတဲ့ cost ဆိုရင် bucket ပြည့်တာနဲ့ ခွင့်ပြုပြီး ကျန်တာ debt အဖြစ်ယူမယ်
+        needed = min(cost, self.capacity)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def take(self, cost):
+        self.tokens -= cost
+
+    def give(self, cost):
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+    def is_full(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    """In-memory per-user + global token buckets replacing the DB cooldown check.
+
+    try_acquire() checks and reserves in one synchronous step (no await in
+    between), so a burst of messages from one user cannot all pass the check.
+    """
+
+    def __init__(self, user_capacity, user_rate, global_capacity, global_rate,
+                 chars_per_token, snapshot_path=None, snapshot_interval=60):
+        self.user_capacity = user_capacity
+        self.user_rate = user_rate
+        self.chars_per_token = chars_per_token
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self._snapshotter = None
+        self.global_bucket = TokenBucket(global_capacity, global_rate)
+        self._users = {}
+
+        self.allowed = 0
+        self.denied_user = 0
+        self.denied_global = 0
+
+    def cost(self, text_len):
+        """စာတိုတစ်ခု = 1 token၊ chars_per_token စီတိုင်း 1 token ထပ်တိုး"""
+        return 1 + text_len / self.chars_per_token
+
+    def _user_bucket(self, user_id):
+        bucket = self._users.get(user_id)
+        if bucket is None:
+            bucket = self._users[user_id] = TokenBucket(self.user_capacity, self.user_rate)
+        return bucket
+
+    def try_acquire(self, user_id, cost, use_global=True):
+        """Returns (wait_seconds, scope). wait_seconds == 0 means the cost was reserved."""
+        now = time.time()
+        bucket = self._user_bucket(user_id)
+
+        wait = bucket.wait_time(cost, now)
+        if wait > 0:
+            self.denied_user += 1
+            return math.ceil(wait), "user"
+
+        if use_global:
+            wait = self.global_bucket.wait_time(cost, now)
+            if wait > 0:
+                self.denied_global += 1
+                return math.ceil(wait), "global"
+            self.global_bucket.take(cost)
+
+        bucket.take(cost)
+        self.allowed += 1
+        return 0, None
+
+    def refund(self, user_id, cost, use_global=True):
+        """Generation မအောင်မြင်ရင် (သို့) synthesis မလိုရင် ယူထားတဲ့ token ပြန်ပေးမယ်"""
+        if user_id is not None:
+            self._user_bucket(user_id).give(cost)
+        if use_global:
+            self.global_bucket.give(cost)
+
+    def prune(self):
+        """ပြည့်နေတဲ့ bucket တွေက default နဲ့အတူတူမို့ memory ထဲက ဖယ်မယ်"""
+        now = time.time()
+        for user_id in [uid for uid, b in self._users.items() if b.is_full(now)]:
+            del self._users[user_id]
+
+    # --- Snapshot (restart ဖြစ်လည်း limit မပျောက်အောင်) ---
+
+    def save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        self.prune()
+        data = {
+            "global": [self.global_bucket.tokens, self.global_bucket.updated],
+            "users": {str(uid): [b.tokens, b.updated] for uid, b in self._users.items()},
+        }
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError:
+            logging.exception("Rate Limit Snapshot Error")
+
+    def load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                data = json.load(f)
+            tokens, updated = data["global"]
+            self.global_bucket.tokens, self.global_bucket.updated = tokens, updated
+            for uid, (tokens, updated) in data["users"].items():
+                self._users[int(uid)] = TokenBucket(self.user_capacity, self.user_rate, tokens, updated)
+        except (OSError, ValueError, KeyError, TypeError):
+            logging.exception("Rate Limit Snapshot Load Error")
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            self.save_snapshot()
+
+    def start(self):
+        self.load_snapshot()
+        if self.snapshot_path and self._snapshotter is None:
+            self._snapshotter = asyncio.get_running_loop().create_task(self._snapshot_loop())
+
+    async def stop(self):
+        if self._snapshotter:
+            self._snapshotter.cancel()
+            try:
+                await self._snapshotter
+            except asyncio.CancelledError:
+                pass
+            self._snapshotter = None
+        self.save_snapshot()
+
+    def stats(self):
+        return {
+            "allowed": self.allowed,
+            "denied_user": self.denied_user,
+            "denied_global": self.denied_global,
+            "tracked_users": len(self._users),
+            "global_tokens": self.global_bucket.tokens,
+        }
@@ -0,0 +1,253 @@
+import asyncio
+import io
+import logging
+import random
+import time
+from collections import deque
+
+from metrics import Counter
+from rate_limit import TokenBucket
+
+EDGE_TTS_RETRIES = Counter(
+    "tts_edge_retries_total", "edge-tts attempts that failed transiently, by whether a retry was allowed", ["result"]
+)
+EDGE_TTS_HEDGES = Counter(
+    "tts_edge_hedges_total", "Hedged edge-tts attempts, by whether the hedge delivered the audio", ["result"]
+)
+EDGE_TTS_ATTEMPT_TIMEOUTS = Counter(
+    "tts_edge_attempt_timeouts_total", "edge-tts attempts abandoned by a timeout", ["kind"]
+)
+
+
+class AttemptTimeout(Exception):
+    """An edge-tts attempt stalled (no audio for stall_timeout) or ran past attempt_timeout."""
+
+
+def is_transient(error):
+    """Network / edge-tts service error တွေကိုပဲ retry မယ် (voice မှား စတဲ့ ValueError တွေကို မလုပ်ဘူး)"""
+    if isinstance(error, (AttemptTimeout, asyncio.TimeoutError, TimeoutError, ConnectionError, OSError)):
+        return True
+    # Error ရောက်လာချိန်မှာ edge-tts / aiohttp က import ပြီးသား (cold start မှာ ကြိုမ import ဘူး)
+    import aiohttp
+    import edge_tts
+    return isinstance(error, (edge_tts.exceptions.EdgeTTSException, aiohttp.ClientError))
+
+
+class RetryBudget:
+    """Caps retries + hedges to a fraction of requests, so an outage is not multiplied.
+
+    Every request deposits `ratio` of a token (up to `capacity`) and every
+    retry or hedge withdraws one. A small time-based reserve of
+    `min_per_second` keeps retries possible while traffic is low.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=0.5, capacity=20):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.balance = 0.0
+        self._reserve = TokenBucket(capacity=max(min_per_second * 10, 1), rate=min_per_second)
+        self.denied = 0
+
+    def deposit(self):
+        self.balance = min(self.capacity, self.balance + self.ratio)
+
+    def withdraw(self):
+        if self.balance >= 1:
+            self.balance -= 1
+            return True
+        if self._reserve.rate > 0 and self._reserve.wait_time(1, time.time()) == 0:
+            self._reserve.take(1)
+            return True
+        self.denied += 1
+        return False
+
+
+class _Sink:
+    """Attempt တစ်ခုရဲ့ audio ကို သူ့ buffer ထဲရေးပြီး ပထမ audio / နောက်ဆုံး audio ရောက်ချိန် မှတ်မယ်"""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.started = time.monotonic()
+        self.last_write = self.started
+        self.first_audio_at = None
+        self.first_audio = asyncio.Event()
+
+    def write(self, data):
+        self.buffer.write(data)
+        self.last_write = time.monotonic()
+        if self.first_audio_at is None:
+            self.first_audio_at = self.last_write
+            self.first_audio.set()
+
+    def tell(self):
+        return self.buffer.tell()
+
+
+class SynthesisPolicy:
+    """Timeouts, budgeted jittered retries and hedging around one edge-tts request.
+
+    run(attempt) calls attempt(sink), a coroutine that streams audio into
+    sink.write(). An attempt that gets no audio for stall_timeout seconds,
+    or runs past attempt_timeout, is cancelled. Transient failures are
+    retried up to `retries` times after a full-jitter backoff. With hedging
+    on, a second attempt starts when the first has produced no audio after
+    the hedge_percentile of recent times to first audio (at least
+    hedge_min_delay); whichever finishes first wins and the other is
+    cancelled. Retries and hedges both spend from one RetryBudget.
+    Every attempt writes into its own new_buffer(); the winner's buffer is
+    returned rewound and all the others are closed.
+    on_timeout(seconds) is called for every attempt abandoned by a timeout,
+    but not for a hedge loser, which was cancelled only because the other
+    attempt won.
+    """
+
+    def __init__(self, retries=2, attempt_timeout=90.0, stall_timeout=15.0, backoff_base=0.5, backoff_max=5.0,
+                 hedge=False, hedge_percentile=95, hedge_min_delay=1.0, budget=None, window=200, min_samples=20):
+        self.retries = retries
+        self.attempt_timeout = attempt_timeout
+        self.stall_timeout = stall_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.budget = budget or RetryBudget()
+        self.min_samples = min_samples
+        self._ttfb = deque(maxlen=window)  # ပထမ audio ရောက်ဖို့ ကြာချိန် (seconds)
+
+        self.requests = 0
+        self.attempts = 0
+        self.retried = 0
+        self.retries_denied = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def hedge_delay(self):
+        """Sample မလုံလောက်သေးရင် (သို့) hedge ပိတ်ထားရင် None"""
+        if not self.hedge or len(self._ttfb) < self.min_samples:
+            return None
+        samples = sorted(self._ttfb)
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_percentile / 100))
+        return max(self.hedge_min_delay, samples[index])
+
+    # --- One attempt ---
+
+    async def _attempt(self, attempt, sink, on_timeout=None):
+        """Attempt တစ်ခုကို stall / total timeout နဲ့ run ပြီး audio ရေးထားတဲ့ buffer ကို ပြန်ပေးမယ်"""
+        self.attempts += 1
+        task = asyncio.ensure_future(attempt(sink))
+        ok = False
+        try:
+            while True:
+                deadline = min(sink.started + self.attempt_timeout, sink.last_write + self.stall_timeout)
+                done, _ = await asyncio.wait({task}, timeout=max(deadline - time.monotonic(), 0))
+                if done:
+                    await task
+                    sink.buffer.seek(0)
+                    ok = True
+                    return sink.buffer
+                now = time.monotonic()
+                if now >= sink.started + self.attempt_timeout:
+                    kind = "total"
+                elif now >= sink.last_write + self.stall_timeout:
+                    kind = "stall"
+                else:
+                    continue  # စောင့်နေတုန်း audio ထပ်ရောက်လာလို့ deadline ရွှေ့မယ်
+                self.timeouts += 1
+                EDGE_TTS_ATTEMPT_TIMEOUTS.inc(kind=kind)
+                if on_timeout:
+                    on_timeout(now - sink.started)
+                raise AttemptTimeout(f"edge-tts {kind} timeout after {now - sink.started:.1f}s")
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            if sink.first_audio_at is not None:
+                self._ttfb.append(sink.first_audio_at - sink.started)
+            if not ok:
+                sink.buffer.close()
+
+    # --- Hedging ---
+
+    async def _hedged(self, attempt, on_timeout, new_buffer):
+        primary_sink = _Sink(new_buffer())
+        primary = asyncio.ensure_future(self._attempt(attempt, primary_sink, on_timeout))
+        tasks = [primary]
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                first_audio = asyncio.ensure_future(primary_sink.first_audio.wait())
+                try:
+                    await asyncio.wait({primary, first_audio}, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    first_audio.cancel()
+                # Audio စရောက်နေပြီဆိုရင် connection ကောင်းနေလို့ hedge မလုပ်ဘူး
+                if not primary.done() and not primary_sink.first_audio.is_set() and self.budget.withdraw():
+                    self.hedges += 1
+                    tasks.append(asyncio.ensure_future(self._attempt(attempt, _Sink(new_buffer()), on_timeout)))
+
+            pending, error, winner = set(tasks), None, None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if len(tasks) > 1:
+                            won = task is tasks[1]
+                            self.hedge_wins += won
+                            EDGE_TTS_HEDGES.inc(result="won" if won else "lost")
+                        winner = task.result()
+                        return winner
+                    error = error or task.exception()
+            if len(tasks) > 1:
+                EDGE_TTS_HEDGES.inc(result="failed")
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            for result in await asyncio.gather(*tasks, return_exceptions=True):
+                # နှစ်ခုလုံး တစ်ပြိုင်နက် ပြီးသွားရင် ရှုံးတဲ့ဘက်ရဲ့ buffer ကို ပိတ်မယ်
+                if result is not winner and not isinstance(result, BaseException):
+                    result.close()
+
+    # --- Retries ---
+
+    async def run(self, attempt, label="edge-tts request", on_timeout=None, new_buffer=io.BytesIO):
+        """attempt(sink) ကို policy အတိုင်း run ပြီး audio buffer ပြန်ပေးမယ် (caller က ပိတ်ရမယ်)"""
+        self.requests += 1
+        self.budget.deposit()
+        failures = 0
+        while True:
+            try:
+                return await self._hedged(attempt, on_timeout, new_buffer)
+            except Exception as e:
+                if failures >= self.retries or not is_transient(e):
+                    raise
+                if not self.budget.withdraw():
+                    # Outage ဖြစ်နေချိန်မှာ retry တွေက edge-tts ကို ပိုမဖိအောင်
+                    self.retries_denied += 1
+                    EDGE_TTS_RETRIES.inc(result="denied")
+                    logging.warning(f"{label} failed ({e!r}), retry budget exhausted")
+                    raise
+                failures += 1
+                self.retried += 1
+                EDGE_TTS_RETRIES.inc(result="retried")
+                # Full jitter: retry တွေ တစ်ပြိုင်နက် ပြန်မဝင်အောင်
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (failures - 1)))
+                logging.warning(f"{label} failed ({e!r}), retry {failures}/{self.retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    def stats(self):
+        delay = self.hedge_delay()
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retried": self.retried,
+            "retries_denied": self.retries_denied,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+            "hedge_delay": delay,
+            "budget": self.budget.balance,
+        }
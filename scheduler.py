@@ -0,0 +1,215 @@
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from metrics import Histogram
+
+QUEUE_WAIT_SECONDS = Histogram(
+    "tts_queue_wait_seconds", "Time a job waited in the scheduler queue before getting a slot",
+    buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+
+
+class QueueFull(Exception):
+    """Queue ပြည့်နေလို့ job အသစ်ကို လက်မခံနိုင်ခြင်း (load shedding)"""
+
+
+class Job:
+    __slots__ = ("user_id", "cost", "seq", "enqueued_at", "granted", "changed")
+
+    def __init__(self, user_id, cost, seq):
+        self.user_id = user_id
+        self.cost = cost
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.granted = asyncio.get_running_loop().create_future()
+        self.changed = asyncio.Event()
+
+    def sort_key(self):
+        # User တစ်ယောက်ထဲရဲ့ job တွေထဲမှာ စာတိုတာ အရင်ရမယ်
+        return (self.cost, self.seq)
+
+
+class FairScheduler:
+    """Per-user round-robin scheduler with a bounded queue.
+
+    Users take turns for free synthesis slots; within one user's queue the
+    cheapest job (fewest characters) goes first. Waiting jobs can get live
+    queue position / ETA callbacks.
+    """
+
+    def __init__(self, concurrency=2, max_queue=100, update_interval=3.0,
+                 initial_seconds_per_char=0.01, base_seconds=1.0):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.update_interval = update_interval
+        self.base_seconds = base_seconds
+        self._seconds_per_char = initial_seconds_per_char
+
+        self._queues = {}  # user_id -> list[Job] sorted by sort_key
+        self._turns = deque()  # Round-robin အလှည့်ကျ user_id များ
+        self._seq = itertools.count()
+        self.running = 0
+        self.depth = 0
+
+        self.submitted = 0
+        self.completed = 0
+        self.shed = 0
+        self._wait_times = deque(maxlen=500)
+
+    # --- Queue ---
+
+    def submit(self, user_id, cost):
+        if self.depth >= self.max_queue:
+            self.shed += 1
+            raise QueueFull()
+
+        job = Job(user_id, cost, next(self._seq))
+        queue = self._queues.get(user_id)
+        if queue is None:
+            queue = self._queues[user_id] = []
+            self._turns.append(user_id)
+        bisect.insort(queue, job, key=Job.sort_key)
+        self.depth += 1
+        self.submitted += 1
+
+        self._dispatch()
+        self._notify()
+        return job
+
+    def _remove(self, job):
+        queue = self._queues.get(job.user_id)
+        if not queue or job not in queue:
+            return
+        queue.remove(job)
+        self.depth -= 1
+        if not queue:
+            del self._queues[job.user_id]
+            self._turns.remove(job.user_id)
+        self._notify()
+
+    def _dispatch(self):
+        while self.running < self.concurrency and self._turns:
+            user_id = self._turns.popleft()
+            queue = self._queues[user_id]
+            job = queue.pop(0)
+            self.depth -= 1
+            if queue:
+                self._turns.append(user_id)
+            else:
+                del self._queues[user_id]
+
+            self.running += 1
+            waited = time.monotonic() - job.enqueued_at
+            self._wait_times.append(waited)
+            QUEUE_WAIT_SECONDS.observe(waited)
+            job.granted.set_result(True)
+
+    def _notify(self):
+        for queue in self._queues.values():
+            for job in queue:
+                job.changed.set()
+
+    def set_concurrency(self, concurrency):
+        self.concurrency = concurrency
+        self._dispatch()
+        self._notify()
+
+    def release(self, job, duration=None):
+        self.running -= 1
+        self.completed += 1
+        if duration is not None and job.cost > 0:
+            # Character တစ်လုံးချင်းစီအတွက် ကြာချိန်ကို EWMA နဲ့ ခန့်မှန်းမယ်
+            sample = max(duration - self.base_seconds, 0) / job.cost
+            self._seconds_per_char = 0.8 * self._seconds_per_char + 0.2 * sample
+        self._dispatch()
+        self._notify()
+
+    # --- Position / ETA ---
+
+    def estimate(self, cost):
+        return self.base_seconds + cost * self._seconds_per_char
+
+    def _dispatch_order(self):
+        """အသစ်မဝင်လာဘူးဆိုရင် job တွေ run ရမယ့် အစဉ်"""
+        order = []
+        for round_index in itertools.count():
+            added = False
+            for user_id in self._turns:
+                queue = self._queues[user_id]
+                if round_index < len(queue):
+                    order.append(queue[round_index])
+                    added = True
+            if not added:
+                return order
+
+    def position(self, job):
+        """Returns (position, eta_seconds); position 1 means next in line."""
+        ahead = 0.0
+        for index, queued in enumerate(self._dispatch_order()):
+            if queued is job:
+                eta = (ahead + self.estimate(job.cost)) / max(self.concurrency, 1)
+                return index + 1, eta
+            ahead += self.estimate(queued.cost)
+        return 0, 0.0
+
+    # --- Handler API ---
+
+    async def _wait(self, job, on_update):
+        last_update = 0.0
+        while not job.granted.done():
+            now = time.monotonic()
+            if on_update and now - last_update >= self.update_interval:
+                last_update = now
+                position, eta = self.position(job)
+                try:
+                    await on_update(position, eta)
+                except Exception:
+                    logging.debug("Queue status update failed", exc_info=True)
+
+            job.changed.clear()
+            changed = asyncio.ensure_future(job.changed.wait())
+            timeout = max(self.update_interval - (time.monotonic() - last_update), 0.1)
+            try:
+                await asyncio.wait({job.granted, changed}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                changed.cancel()
+
+    @asynccontextmanager
+    async def slot(self, user_id, cost, on_update=None):
+        """Synthesis slot တစ်ခုရအောင် စောင့်ခြင်း (Queue ပြည့်နေရင် QueueFull)"""
+        job = self.submit(user_id, cost)
+        try:
+            await self._wait(job, on_update)
+        except BaseException:
+            if job.granted.done():
+                self.release(job)
+            else:
+                job.granted.cancel()
+                self._remove(job)
+            raise
+
+        started = time.monotonic()
+        try:
+            yield job
+        finally:
+            self.release(job, time.monotonic() - started)
+
+    def stats(self):
+        waits = sorted(self._wait_times)
+        return {
+            "depth": self.depth,
+            "running": self.running,
+            "concurrency": self.concurrency,
+            "waiting_users": len(self._turns),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "shed": self.shed,
+            "avg_wait": (sum(waits) / len(waits)) if waits else 0.0,
+            "p95_wait": waits[int(len(waits) * 0.95)] if waits else 0.0,
+            "max_wait": waits[-1] if waits else 0.0,
+        }
@@ -0,0 +1,134 @@
+import argparse
+import logging
+import sys
+from datetime import datetime
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from config import BROADCAST_BATCH_SIZE, DEFAULT_VOICE
+from database import EXPORT_PROJECTION, db
+from user_cache import PROFILE_PROJECTION
+
+# users collection ရဲ့ hot query တွေ လိုတဲ့ index တွေ (နာမည်က Mongo default နာမည်အတိုင်း)
+USER_INDEXES = [
+    # Broadcast batch cursor ({status, _id > last} sort _id) နဲ့ active count ကို document မဖတ်ဘဲ index ထဲကပဲ ဖြေမယ်
+    IndexModel([("status", ASCENDING), ("_id", ASCENDING)], name="status_1__id_1"),
+    # /export_changes (last_active >= since)
+    IndexModel([("last_active", ASCENDING)], name="last_active_1"),
+    # Voice အလိုက် user ရှာ/ရေ
+    IndexModel([("voice_preference", ASCENDING)], name="voice_preference_1"),
+]
+
+# main.py (နဲ့ သူသုံးတဲ့ module တွေ) က run တဲ့ query တွေ၊ covered=True ဆိုရင် FETCH stage မပါရ
+# (Dashboard recount ရဲ့ $facet ကတော့ collection တစ်ခုလုံးကို တမင် scan တာမို့ မပါဘူး၊ stats.py ကြည့်)
+HOT_QUERIES = {
+    "profile lookup": {
+        "collection": "users", "filter": {"_id": 0}, "projection": PROFILE_PROJECTION, "covered": False,
+    },
+    "broadcast batch": {
+        "collection": "users", "filter": {"status": "active", "_id": {"$gt": 0}}, "projection": {"_id": 1},
+        "sort": {"_id": 1}, "batchSize": BROADCAST_BATCH_SIZE, "covered": True,
+    },
+    "active user count": {
+        "collection": "users", "filter": {"status": "active"}, "projection": {"_id": 1}, "covered": True,
+    },
+    "export changes": {
+        "collection": "users", "filter": {"last_active": {"$gte": datetime.min}}, "projection": EXPORT_PROJECTION,
+        "covered": False,
+    },
+    "users by voice": {
+        "collection": "users", "filter": {"voice_preference": DEFAULT_VOICE}, "projection": {"_id": 1},
+        "covered": False,
+    },
+    "audio cache lookup": {
+        "collection": "audio_cache", "filter": {"_id": ""}, "projection": {"file_id": 1}, "covered": False,
+    },
+}
+
+
+def ensure_indexes(database):
+    """မရှိသေးတဲ့ index တွေကိုပဲ ဆောက်မယ် (ရှိပြီးသားဆို round trip တစ်ခုနဲ့ ပြီးမယ်)
+
+    MongoDB 4.2+ index builds only lock the collection briefly at the start
+    and end, so reads and writes continue while a build on a large users
+    collection runs; call this from a background task, never before polling.
+    Returns the names of the indexes that were created.
+    """
+    users = database["users"]
+    existing = set(users.index_information())
+    missing = [index for index in USER_INDEXES if index.document["name"] not in existing]
+    if not missing:
+        return []
+    try:
+        created = users.create_indexes(missing)
+    except OperationFailure:
+        # တူညီတဲ့ key ကို နာမည်/option ကွဲပြီး တစ်ယောက်ယောက် ဆောက်ထားရင် ဒီမှာ ပြဿနာမရှိဘဲ ဆက်သွားမယ်
+        logging.exception("Users Index Error")
+        return []
+    logging.info(f"Created users indexes: {', '.join(created)}")
+    return created
+
+
+def _stages(plan):
+    """Plan tree ထဲက stage နာမည်တွေနဲ့ index နာမည်တွေ"""
+    stages, indexes = [], []
+    pending = [plan]
+    while pending:
+        node = pending.pop()
+        stages.append(node.get("stage"))
+        if node.get("indexName"):
+            indexes.append(node["indexName"])
+        if "inputStage" in node:
+            pending.append(node["inputStage"])
+        pending.extend(node.get("inputStages", []))
+    return stages, indexes
+
+
+def explain_query(database, query):
+    """queryPlanner verbosity နဲ့ explain မယ် (query ကို တကယ် မ run ဘူး)"""
+    command = {"find": query["collection"], "filter": query["filter"], "projection": query["projection"]}
+    for option in ("sort", "batchSize"):
+        if option in query:
+            command[option] = query[option]
+    result = database.command("explain", command, verbosity="queryPlanner")
+    winning = result["queryPlanner"]["winningPlan"]
+    # Slot-based engine (MongoDB 7+) မှာ classic plan က queryPlan အောက်မှာ ရှိတယ်
+    stages, indexes = _stages(winning.get("queryPlan", winning))
+    uses_index = "COLLSCAN" not in stages
+    covered = uses_index and "FETCH" not in stages
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "covered": covered,
+        "ok": uses_index and (covered or not query["covered"]),
+    }
+
+
+def check_hot_queries(database):
+    """Returns {name: explain_query result}; an entry with ok False scans the collection or needs a FETCH it should not."""
+    return {name: explain_query(database, query) for name, query in HOT_QUERIES.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ensure users indexes and check hot queries with explain")
+    parser.add_argument("--no-create", action="store_true", help="only run the explain check")
+    args = parser.parse_args()
+    logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
+
+    database = db.resolve()
+    if not args.no_create:
+        ensure_indexes(database)
+
+    failed = 0
+    for name, report in check_hot_queries(database).items():
+        failed += not report["ok"]
+        print(
+            f"{'ok  ' if report['ok'] else 'FAIL'} {name:20} covered={report['covered']!s:5} "
+            f"index={','.join(report['indexes']) or '-'} stages={'>'.join(report['stages'])}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
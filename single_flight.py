@@ -0,0 +1,56 @@
+import asyncio
+
+from metrics import Counter
+
+COALESCED_REQUESTS = Counter(
+    "tts_coalesced_requests_total", "Requests that reused an identical in-flight synthesis instead of running their own"
+)
+
+
+class SingleFlight:
+    """One synthesis per (text, voice) at a time; identical requests wait for it.
+
+    The first request for a key becomes the leader and gets None from join();
+    it must call finish(key, file_id) when done (file_id None on failure).
+    Requests arriving meanwhile get the leader's future and resend its
+    Telegram file_id instead of synthesizing and uploading again. If the
+    leader fails they join again, so one of them leads the next attempt.
+    """
+
+    def __init__(self):
+        self._flights = {}  # key -> Future[file_id | None]
+        self.leaders = 0
+        self.coalesced = 0
+        self.fallbacks = 0
+
+    def join(self, key):
+        """Leader ဆိုရင် None၊ မဟုတ်ရင် leader ရဲ့ file_id ကို ပေးမယ့် future"""
+        flight = self._flights.get(key)
+        if flight is not None:
+            return flight
+        self._flights[key] = asyncio.get_running_loop().create_future()
+        self.leaders += 1
+        return None
+
+    async def wait(self, flight):
+        # Follower တစ်ယောက် cancel ဖြစ်လို့ shared future ပါ cancel မဖြစ်အောင်
+        file_id = await asyncio.shield(flight)
+        if file_id:
+            self.coalesced += 1
+            COALESCED_REQUESTS.inc()
+        else:
+            self.fallbacks += 1
+        return file_id
+
+    def finish(self, key, file_id):
+        flight = self._flights.pop(key, None)
+        if flight is not None and not flight.done():
+            flight.set_result(file_id)
+
+    def stats(self):
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "fallbacks": self.fallbacks,
+        }
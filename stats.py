@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+STATS_DOC_ID = "user_stats"
+
+# Collection တစ်ခုလုံးကို တစ်ခါတည်း scan ပြီး dashboard အတွက် လိုတာအကုန် တွက်မယ်
+FACET_PIPELINE = [
+    {"$facet": {
+        "total": [{"$count": "n"}],
+        "by_status": [{"$group": {"_id": "$status", "n": {"$sum": 1}}}],
+        "by_voice": [{"$group": {"_id": "$voice_preference", "n": {"$sum": 1}}}],
+        "generated": [{"$group": {"_id": None, "n": {"$sum": "$generated_count"}}}],
+    }}
+]
+
+
+def _field(name):
+    # Mongo field name ထဲမှာ "." နဲ့ "$" မပါရလို့
+    return str(name or "none").replace(".", "_").replace("$", "_")
+
+
+def compute_stats(users_col):
+    """$facet pipeline တစ်ခုတည်းနဲ့ counters document ပုံစံ တွက်ခြင်း"""
+    result = list(users_col.aggregate(FACET_PIPELINE))[0]
+    total = result["total"][0]["n"] if result["total"] else 0
+    generated = result["generated"][0]["n"] if result["generated"] else 0
+    return {
+        "total": total,
+        "status": {_field(row["_id"]): row["n"] for row in result["by_status"]},
+        "voices": {_field(row["_id"]): row["n"] for row in result["by_voice"]},
+        "total_generated": generated,
+        "recounted_at": datetime.now(),
+    }
+
+
+class StatsService:
+    """Materialized dashboard counters.
+
+    User events (new user, blocked/unblocked, generation, voice change) are
+    accumulated as $inc deltas and flushed periodically to one counters
+    document, so the dashboard reads a single document. A full $facet recount
+    runs when the document is older than max_staleness seconds.
+    """
+
+    def __init__(self, users_col, counters_col, run_db, max_staleness=3600, flush_interval=5.0):
+        self.users_col = users_col
+        self.col = counters_col
+        self._run_db = run_db
+        self.max_staleness = max_staleness
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._write_buffers = []  # Delta ပို့ပြီး user write ကို နောက်မှ flush တဲ့ cache တွေရဲ့ flush()
+        self._flusher = None
+        self.recounts = 0
+
+    def add_write_buffer(self, flush):
+        """Register the flush() of a write-behind cache that reports events here.
+
+        recount() awaits it first, so the users it has counted already are in
+        the collection the recount reads.
+        """
+        self._write_buffers.append(flush)
+
+    # --- Events ---
+
+    def _inc(self, field, amount=1):
+        self._pending[field] = self._pending.get(field, 0) + amount
+
+    def user_added(self, voice, status="active"):
+        self._inc("total")
+        self._inc(f"status.{_field(status)}")
+        self._inc(f"voices.{_field(voice)}")
+
+    def status_changed(self, old, new, count=1):
+        if old == new:
+            return
+        self._inc(f"status.{_field(old)}", -count)
+        self._inc(f"status.{_field(new)}", count)
+
+    def generated(self, count=1):
+        self._inc("total_generated", count)
+
+    def voice_changed(self, old, new):
+        if old == new:
+            return
+        self._inc(f"voices.{_field(old)}", -1)
+        self._inc(f"voices.{_field(new)}", 1)
+
+    # --- Reads ---
+
+    async def recount(self):
+        # ဒီအချိန်အထိ delta တွေရဲ့ user write တွေကို DB ထဲ အရင်ရောက်အောင် flush ပြီးမှ recount မယ်
+        # (အဲဒီ delta တွေက recount ထဲ ပါသွားပြီမို့ ဖယ်မယ်၊ recount နေတုန်း ရောက်လာတဲ့ delta တွေကတော့ ထားမယ်)
+        counted, self._pending = self._pending, {}
+        try:
+            for flush in self._write_buffers:
+                await flush()
+            doc = await self._run_db(compute_stats, self.users_col)
+            await self._run_db(self.col.replace_one, {"_id": STATS_DOC_ID}, doc, upsert=True)
+        except BaseException:
+            for field, amount in counted.items():
+                self._inc(field, amount)
+            raise
+        self.recounts += 1
+        return doc
+
+    async def get(self):
+        """Counters document တစ်ခုတည်းဖတ်မယ် (stale ဖြစ်နေရင် recount)"""
+        doc = await self._run_db(self.col.find_one, {"_id": STATS_DOC_ID})
+        stale_before = datetime.now() - timedelta(seconds=self.max_staleness)
+        if not doc or doc.get("recounted_at", datetime.min) < stale_before:
+            doc = await self.recount()
+
+        # Flush မလုပ်ရသေးတဲ့ delta တွေကို ပေါင်းပြမယ်
+        for field, amount in self._pending.items():
+            target = doc
+            *parents, leaf = field.split(".")
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[leaf] = target.get(leaf, 0) + amount
+
+        return {
+            "total": doc.get("total", 0),
+            "active": doc.get("status", {}).get("active", 0),
+            "blocked": doc.get("status", {}).get("blocked", 0),
+            "total_generated": doc.get("total_generated", 0),
+            "voices": {voice: n for voice, n in doc.get("voices", {}).items() if n},
+            "recounted_at": doc.get("recounted_at"),
+        }
+
+    # --- Flush ---
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            await self._run_db(self.col.update_one, {"_id": STATS_DOC_ID}, {"$inc": pending})
+        except Exception:
+            logging.exception("Stats Counter Flush Error")
+            for field, amount in pending.items():
+                self._inc(field, amount)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._flusher is None:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
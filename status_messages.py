@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+
+from metrics import Counter, Histogram
+
+BOT_API_CALLS_PER_REQUEST = Histogram(
+    "tts_bot_api_calls_per_request", "Bot API calls made for one text-to-speech request", ["source"],
+    buckets=(1, 2, 3, 4, 6, 8, 12, 20)
+)
+STATUS_API_CALLS = Counter(
+    "tts_status_api_calls_total", "Bot API calls made for status feedback, by method", ["method"]
+)
+STATUS_TEXTS_COALESCED = Counter(
+    "tts_status_texts_coalesced_total", "Status texts replaced by a newer one before they were sent"
+)
+
+
+class StatusMessage:
+    """Status feedback for one request, created by StatusManager.open().
+
+    For the first show_delay seconds the user only sees a chat action, so a
+    fast request needs no status message at all. After that the latest
+    text is sent as a reply and later texts become edits, at most one per
+    chat every edit_interval seconds; a text replaced before its turn is
+    never sent. close() deletes the message, or shows a final text (an
+    error) instead.
+    """
+
+    def __init__(self, manager, message, text):
+        self.manager = manager
+        self.message = message  # User ရဲ့ message (reply ပြန်ဖို့)
+        self.text = text  # ပြချင်တဲ့ နောက်ဆုံး text
+        self.shown_text = None
+        self.status_msg = None
+        self.api_calls = 0
+        self.closed = False
+        self._changed = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task = None
+
+    async def _call(self, method, coro):
+        self.api_calls += 1
+        STATUS_API_CALLS.inc(method=method)
+        return await coro
+
+    def count(self, calls=1):
+        """Audio ပို့တာလို status မဟုတ်တဲ့ Bot API call တွေကိုလည်း ဒီ request ထဲ ထည့်တွက်မယ်"""
+        self.api_calls += calls
+
+    def update(self, text):
+        """နောက်ဆုံး text ကိုပဲ မှတ်ထားမယ် (ဘယ်အချိန်ပို့မလဲဆိုတာ background task က ဆုံးဖြတ်မယ်)"""
+        if self.closed or text == self.text:
+            return
+        if self.text != self.shown_text:
+            self.manager.coalesced += 1
+            STATUS_TEXTS_COALESCED.inc()
+        self.text = text
+        self._changed.set()
+
+    async def _sleep(self, seconds):
+        # close() ခေါ်ရင် ချက်ချင်း နိုးမယ်
+        try:
+            await asyncio.wait_for(self._closing.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        try:
+            await self._call("sendChatAction", self.message.reply_chat_action(self.manager.chat_action))
+        except Exception:
+            logging.debug("Chat action failed", exc_info=True)
+        await self._sleep(self.manager.show_delay)
+
+        while not self.closed:
+            if self.text == self.shown_text:
+                self._changed.clear()
+                await self._changed.wait()
+                continue
+            wait = self.manager.reserve_edit(self.message.chat_id)
+            if wait > 0:
+                await self._sleep(wait)
+                if self.closed:
+                    break
+            # စောင့်နေတုန်း ရောက်လာတဲ့ နောက်ဆုံး text ကိုပဲ ပို့မယ်
+            text = self.text
+            try:
+                if self.status_msg is None:
+                    self.status_msg = await self._call("sendMessage", self.message.reply_text(text))
+                else:
+                    await self._call("editMessageText", self.status_msg.edit_text(text))
+            except Exception:
+                logging.debug("Status update failed", exc_info=True)
+            self.shown_text = text
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self, final_text=None, source="synthesis"):
+        """Request ပြီးရင် ခေါ်ရမယ်; final_text ပေးရင် (error) message ကို မဖျက်ဘဲ အဲဒီ text ပြထားမယ်"""
+        if self.closed:
+            return
+        self.closed = True
+        self._closing.set()
+        self._changed.set()
+        if self._task:
+            # Cancel မလုပ်ဘဲ စောင့်မယ် (ပို့နေဆဲ sendMessage ကို cancel ရင် ဖျက်လို့မရတဲ့ message ကျန်ခဲ့နိုင်လို့)
+            await asyncio.gather(self._task, return_exceptions=True)
+        try:
+            if final_text is not None:
+                if self.status_msg is not None:
+                    await self._call("editMessageText", self.status_msg.edit_text(final_text))
+                else:
+                    await self._call("sendMessage", self.message.reply_text(final_text))
+            elif self.status_msg is not None:
+                await self._call("deleteMessage", self.status_msg.delete())
+        except Exception:
+            logging.debug("Status close failed", exc_info=True)
+        self.manager.record(source, self.api_calls)
+
+
+class StatusManager:
+    """Creates StatusMessages and owns the per-chat edit rate limit.
+
+    Telegram allows roughly one message per second per chat; status sends
+    and edits for all requests in one chat share a slot every
+    edit_interval seconds. Bot API calls per request are recorded by source
+    (synthesis, cache, coalesced, rejected) for the dashboard.
+    """
+
+    def __init__(self, show_delay=2.0, edit_interval=3.0, chat_action="record_voice", max_chats=10000):
+        self.show_delay = show_delay
+        self.edit_interval = edit_interval
+        self.chat_action = chat_action
+        self.max_chats = max_chats
+        self._next_edit = {}  # chat_id -> နောက် edit လုပ်လို့ရမယ့်အချိန် (monotonic)
+        self._totals = {}  # source -> {"requests", "calls"}
+        self.coalesced = 0
+
+    def open(self, message, text):
+        status = StatusMessage(self, message, text)
+        status.start()
+        return status
+
+    def reserve_edit(self, chat_id):
+        """ဒီ chat ရဲ့ နောက် edit slot ကို ယူပြီး စောင့်ရမယ့် စက္ကန့်ကို ပြန်ပေးမယ်"""
+        now = time.monotonic()
+        if len(self._next_edit) > self.max_chats:
+            self._next_edit = {chat: at for chat, at in self._next_edit.items() if at > now}
+        at = max(now, self._next_edit.get(chat_id, 0.0))
+        self._next_edit[chat_id] = at + self.edit_interval
+        return at - now
+
+    def record(self, source, calls):
+        BOT_API_CALLS_PER_REQUEST.observe(calls, source=source)
+        totals = self._totals.setdefault(source, {"requests": 0, "calls": 0})
+        totals["requests"] += 1
+        totals["calls"] += calls
+
+    def stats(self):
+        return {
+            "coalesced": self.coalesced,
+            "sources": {
+                source: {**totals, "per_request": totals["calls"] / totals["requests"]}
+                for source, totals in self._totals.items()
+            },
+        }
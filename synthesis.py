@@ -0,0 +1,278 @@
+import asyncio
+import io
+import itertools
+import re
+import tempfile
+import time
+
+from metrics import Counter, Histogram
+from resilience import SynthesisPolicy
+
+EDGE_TTS_TTFB_SECONDS = Histogram(
+    "tts_edge_ttfb_seconds", "Time from opening an edge-tts request to its first audio chunk"
+)
+EDGE_TTS_SECONDS = Histogram(
+    "tts_edge_request_seconds", "Duration of one edge-tts request (one chunk)", ["result"]
+)
+EDGE_TTS_BYTES = Counter("tts_edge_audio_bytes_total", "Audio bytes received from edge-tts")
+
+# ဒီထက်ကြီးတဲ့ အသံဖိုင်တွေကိုသာ disk ပေါ် spill လုပ်မယ်
+DEFAULT_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+COPY_BLOCK_BYTES = 64 * 1024
+
+# Myanmar စာလုံးတစ်လုံး UTF-8 မှာ 3 bytes ဖြစ်လို့ 1200 chars ဆိုရင် edge-tts ရဲ့
+# 4096-byte request တစ်ခုထဲ ဆံ့မယ် (chunk တစ်ခု = websocket request တစ်ခု)
+DEFAULT_CHUNK_CHARS = 1200
+DEFAULT_CHUNK_CONCURRENCY = 4
+DEFAULT_CHUNK_RETRIES = 2
+
+# Sentence ending (။ ! ? .) ပြီးရင် ဖြတ်မယ်၊ မဆံ့ရင် clause (၊ , ;) မှာ ထပ်ဖြတ်မယ်
+_SENTENCE_END = re.compile(r"(?<=[။!?])\s*|(?<=[.])\s+|\n+")
+_CLAUSE_END = re.compile(r"(?<=[၊,;:])\s*")
+
+
+def _pack(pieces, max_chars):
+    """အပိုင်းငယ်တွေကို max_chars မကျော်အောင် ပြန်ပေါင်းခြင်း"""
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_long_piece(piece, max_chars):
+    if len(piece) <= max_chars:
+        return [piece]
+
+    parts = []
+    for clause in _pack([c for c in _CLAUSE_END.split(piece) if c], max_chars):
+        while len(clause) > max_chars:
+            # Punctuation မပါတဲ့ အရှည်ကြီးဆိုရင် space မှာ (မရှိရင် တိုက်ရိုက်) ဖြတ်မယ်
+            cut = clause.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            parts.append(clause[:cut])
+            clause = clause[cut:]
+        parts.append(clause)
+    return parts
+
+
+def split_text(text, max_chars=DEFAULT_CHUNK_CHARS):
+    """စာရှည်ကို ဝါကျနယ်နိမိတ်အလိုက် max_chars ထက်မကျော်သော အပိုင်းများ ခွဲခြင်း"""
+    pieces = []
+    for sentence in _SENTENCE_END.split(text):
+        if sentence and sentence.strip():
+            pieces.extend(_split_long_piece(sentence + " ", max_chars))
+    return [chunk.strip() for chunk in _pack(pieces, max_chars) if chunk.strip()]
+
+
+def _copy_frames(part, out):
+    """ID3v2 header / ID3v1 trailer ကို ဖယ်ပြီး MP3 frame တွေကိုပဲ part ကနေ out ထဲ ကူးခြင်း"""
+    end = part.seek(0, io.SEEK_END)
+    part.seek(0)
+    start = 0
+    head = part.read(10)
+    if head[:3] == b"ID3" and len(head) >= 10:
+        start = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+    if end - start >= 128:
+        part.seek(end - 128)
+        if part.read(3) == b"TAG":
+            end -= 128
+    part.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        data = part.read(min(remaining, COPY_BLOCK_BYTES))
+        if not data:
+            break
+        out.write(data)
+        remaining -= len(data)
+
+
+async def _stream_audio(text, voice, sink, observer=None, pool=None):
+    """observer(seconds, ok, chars) ကို edge-tts call တစ်ခုပြီးတိုင်း ခေါ်မယ်
+
+    With a pool (edge_pool.EdgeConnectionPool) the websocket is opened on one
+    of its warm connections.
+    """
+    # edge-tts (+ aiohttp) import က ကြာလို့ cold start မှာ မလုပ်ဘဲ ပထမ synthesis မှာမှ (main က background မှာ ကြိုလုပ်ထားမယ်)
+    import edge_tts
+
+    started = time.monotonic()
+    received = 0
+    connector = pool.acquire() if pool else None
+    failed = False
+    try:
+        communicate = edge_tts.Communicate(text, voice, connector=connector)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                if not received:
+                    EDGE_TTS_TTFB_SECONDS.observe(time.monotonic() - started)
+                received += len(chunk["data"])
+                sink.write(chunk["data"])
+    except Exception:
+        failed = True
+        elapsed = time.monotonic() - started
+        EDGE_TTS_SECONDS.observe(elapsed, result="error")
+        EDGE_TTS_BYTES.inc(received)
+        if observer:
+            observer(elapsed, False, len(text))
+        raise
+    finally:
+        # Cancel ဖြစ်တာက connection ပြဿနာ မဟုတ်လို့ error အဖြစ် မယူဘူး
+        if pool:
+            pool.release(connector, ok=not failed)
+    elapsed = time.monotonic() - started
+    EDGE_TTS_SECONDS.observe(elapsed, result="ok")
+    EDGE_TTS_BYTES.inc(received)
+    if observer:
+        observer(elapsed, True, len(text))
+
+
+def _new_spool(spool_max_bytes):
+    return tempfile.SpooledTemporaryFile(max_size=spool_max_bytes, suffix=".mp3")
+
+
+def _rewind(buffer):
+    """Returns (buffer, size) with the buffer rewound for upload"""
+    size = buffer.seek(0, io.SEEK_END)
+    buffer.seek(0)
+    return buffer, size
+
+
+async def _synthesize_chunk(index, text, voice, retries, observer=None, pool=None, policy=None,
+                            spool_max_bytes=DEFAULT_SPOOL_MAX_BYTES):
+    """Chunk တစ်ခုချင်းစီကို timeout / retry / hedge (resilience.SynthesisPolicy) နဲ့ ထုတ်ခြင်း
+
+    Each attempt streams into its own spooled file, so a large chunk spills
+    to disk instead of being held in memory; returns the winning attempt's
+    spool, rewound, which the caller must close. Without a policy a default
+    one with `retries` retries and no hedging is used for this call.
+    """
+    import edge_tts
+
+    async def attempt(sink):
+        await _stream_audio(text, voice, sink, observer, pool)
+        if sink.tell() == 0:
+            raise edge_tts.exceptions.NoAudioReceived("Empty chunk")
+
+    def timed_out(elapsed):
+        # Timeout ဖြစ်လို့ cancel ခံရတဲ့ attempt ကို _stream_audio က မမှတ်နိုင်လို့ ဒီမှာ failure အဖြစ် ပို့မယ်
+        observer(elapsed, False, len(text))
+
+    policy = policy or SynthesisPolicy(retries=retries)
+    return await policy.run(
+        attempt, label=f"Chunk {index}", on_timeout=timed_out if observer else None,
+        new_buffer=lambda: _new_spool(spool_max_bytes)
+    )
+
+
+async def synthesize_long(
+    text,
+    voice,
+    spool_max_bytes=DEFAULT_SPOOL_MAX_BYTES,
+    chunk_chars=DEFAULT_CHUNK_CHARS,
+    concurrency=DEFAULT_CHUNK_CONCURRENCY,
+    retries=DEFAULT_CHUNK_RETRIES,
+    observer=None,
+    pool=None,
+    policy=None,
+):
+    """စာရှည်ကို အပိုင်းလိုက် ပြိုင်တူထုတ်ပြီး MP3 frame များကို အစဉ်လိုက် ဆက်ခြင်း
+
+    Returns (buffer, size): a rewound SpooledTemporaryFile that the caller
+    owns and must close. Every chunk, including a single-chunk text, goes
+    through the retry/hedge policy; a single chunk's spool is returned as is.
+    """
+    chunks = split_text(text, chunk_chars) or [text]
+    if len(chunks) == 1:
+        return _rewind(await _synthesize_chunk(0, chunks[0], voice, retries, observer, pool, policy, spool_max_bytes))
+
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run(index, chunk):
+        async with limit:
+            return await _synthesize_chunk(index, chunk, voice, retries, observer, pool, policy, spool_max_bytes)
+
+    tasks = [asyncio.ensure_future(run(i, chunk)) for i, chunk in enumerate(chunks)]
+    try:
+        return await _join_parts(tasks, spool_max_bytes)
+    finally:
+        _discard(tasks)
+
+
+async def _join_parts(tasks, spool_max_bytes):
+    """Chunk task တွေ ပြီးသလို audio ကို spool ထဲ အစဉ်လိုက် ရေးခြင်း
+
+    A part is written as soon as every part before it has been written, so
+    only parts that finished ahead of an earlier one wait in their own
+    spools. Written tasks are removed from `tasks`; pass what is left there
+    to _discard().
+    """
+    # 48kbps CBR MP3 frame တွေဖြစ်လို့ re-encode မလုပ်ဘဲ အစဉ်လိုက် ဆက်ရုံပဲ
+    buffer = _new_spool(spool_max_bytes)
+    try:
+        while tasks:
+            with await tasks[0] as part:
+                _copy_frames(part, buffer)
+            tasks.pop(0)
+    except BaseException:
+        buffer.close()
+        raise
+    return _rewind(buffer)
+
+
+def _discard(tasks):
+    """မပြီးသေးတဲ့ chunk တွေကို cancel ပြီး ပြီးပြီးသား (မရေးရသေးတဲ့) chunk တွေရဲ့ spool ကို ပိတ်မယ်"""
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled() and task.exception() is None:
+            task.result().close()
+
+
+async def synthesize_segments(
+    text,
+    voice,
+    segment_chars,
+    spool_max_bytes=DEFAULT_SPOOL_MAX_BYTES,
+    chunk_chars=DEFAULT_CHUNK_CHARS,
+    concurrency=DEFAULT_CHUNK_CONCURRENCY,
+    retries=DEFAULT_CHUNK_RETRIES,
+    observer=None,
+    pool=None,
+    policy=None,
+):
+    """Progressive delivery: စာကို segment တွေခွဲပြီး ပြီးတဲ့ segment ကို အစဉ်လိုက် ထုတ်ပေးခြင်း
+
+    Async generator yielding (number, count, buffer, size) in text order,
+    number starting at 1. Every chunk of every segment is scheduled up front
+    on one semaphore, earliest segment first, so the first segment is ready
+    after roughly its own synthesis time and later segments keep
+    synthesizing while it is being sent. A segment that finishes early waits
+    for the ones before it. The caller owns (and must close) each buffer,
+    and should close the generator (contextlib.aclosing) so unfinished
+    chunks are cancelled.
+    """
+    segments = split_text(text, segment_chars)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run(index, chunk):
+        async with limit:
+            return await _synthesize_chunk(index, chunk, voice, retries, observer, pool, policy, spool_max_bytes)
+
+    index = itertools.count()
+    plans = [
+        [asyncio.ensure_future(run(next(index), chunk)) for chunk in split_text(segment, chunk_chars)]
+        for segment in segments
+    ]
+    try:
+        for number, tasks in enumerate(plans, 1):
+            buffer, size = await _join_parts(tasks, spool_max_bytes)
+            yield number, len(plans), buffer, size
+    finally:
+        for tasks in plans:
+            _discard(tasks)
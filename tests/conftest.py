@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+
+import mongomock
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py က required variable မရှိရင် import မှာ raise လို့ (Mongo / Telegram ကို တကယ် မချိတ်ဘူး)
+os.environ.setdefault("BOT_TOKEN", "1:test")
+os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:1")
+os.environ.setdefault("ADMIN_ID", "1")
+
+
+class FakeEdgeTTS:
+    """edge_tts.Communicate stand-in: a chunk's audio is its own text, after delays[text] seconds.
+
+    A text in `failures` raises that many times before it succeeds; a text in
+    `stalls` sends its first byte and then hangs.
+    """
+
+    def __init__(self):
+        self.delays = {}
+        self.failures = {}
+        self.stalls = set()
+        self.started = []
+        self.finished = []
+        self.cancelled = []
+
+    def communicate(self, text, voice, connector=None):
+        fake = self
+
+        class Communicate:
+            async def stream(self):
+                fake.started.append(text)
+                try:
+                    await asyncio.sleep(fake.delays.get(text, 0))
+                    if fake.failures.get(text):
+                        fake.failures[text] -= 1
+                        raise ConnectionError(f"fake failure for {text!r}")
+                    if text in fake.stalls:
+                        yield {"type": "audio", "data": text[:1].encode()}
+                        await asyncio.sleep(3600)
+                    yield {"type": "audio", "data": text.encode()}
+                except asyncio.CancelledError:
+                    fake.cancelled.append(text)
+                    raise
+                fake.finished.append(text)
+
+        return Communicate()
+
+
+@pytest.fixture
+def fake_edge_tts(monkeypatch):
+    import edge_tts
+
+    fake = FakeEdgeTTS()
+    monkeypatch.setattr(edge_tts, "Communicate", fake.communicate)
+    return fake
+
+
+async def _run_db(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+@pytest.fixture
+def run_db():
+    """async_db.run_db stand-in: mongomock call ကို executor မသုံးဘဲ တိုက်ရိုက် run မယ်"""
+    return _run_db
+
+
+@pytest.fixture
+def mongo_db():
+    return mongomock.MongoClient().db
+
+
+class FakeUser:
+    """telegram.User stand-in with the fields UserProfileCache.touch() reads"""
+
+    def __init__(self, user_id, first_name=None, username=None):
+        self.id = user_id
+        self.first_name = first_name or f"user{user_id}"
+        self.username = username
+
+
+@pytest.fixture
+def make_user():
+    return FakeUser
+
+
+@pytest.fixture
+def make_profile_cache(mongo_db, run_db):
+    """mongo_db["users"] ပေါ်မှာ UserProfileCache ဆောက်မယ် (တစ်ခါထက်ပိုခေါ်ရင် process restart လို)"""
+    from config import DEFAULT_VOICE
+    from user_cache import UserProfileCache
+
+    def make(**kwargs):
+        return UserProfileCache(mongo_db["users"], run_db, DEFAULT_VOICE, **kwargs)
+
+    return make
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import async_db
+from audio_cache import AudioCache
+from config import DEFAULT_VOICE
+from user_cache import UserProfileCache
+
+MONGO_LATENCY = 0.2
+
+
+class SlowCollection:
+    """mongomock collection whose every call blocks its thread like a slow Atlas round trip"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+
+    def __getattr__(self, attr):
+        method = getattr(self._collection, attr)
+
+        def call(*args, **kwargs):
+            time.sleep(MONGO_LATENCY)
+            return method(*args, **kwargs)
+        return call
+
+
+async def max_loop_lag(work, interval=0.01):
+    """work() run နေတုန်း event loop ပိတ်မိတဲ့ အကြာဆုံးအချိန်"""
+    lags = []
+
+    async def monitor():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - started - interval)
+
+    task = asyncio.ensure_future(monitor())
+    try:
+        await work()
+        await asyncio.sleep(interval * 2)  # နောက်ဆုံး tick ကိုပါ မှတ်မိအောင်
+    finally:
+        task.cancel()
+    return max(lags)
+
+
+def test_handler_db_calls_keep_the_event_loop_responsive(mongo_db, make_user):
+    users = SlowCollection(mongo_db["users"])
+    profiles = UserProfileCache(users, async_db.run_db, DEFAULT_VOICE)
+    audio_cache = AudioCache(SlowCollection(mongo_db["audio_cache"]), async_db.run_db)
+
+    async def handle(user_id):
+        await profiles.touch(make_user(user_id))
+        await audio_cache.get("မင်္ဂလာပါ", DEFAULT_VOICE)
+
+    async def work():
+        await asyncio.gather(*(handle(user_id) for user_id in range(8)))
+        await profiles.flush()
+
+    async def main():
+        started = time.perf_counter()
+        lag = await max_loop_lag(work)
+        return lag, time.perf_counter() - started
+
+    lag, elapsed = asyncio.run(main())
+    # Mongo call တွေက တကယ် နှေးခဲ့ပေမယ့် loop က ပိတ်မသွားရ
+    assert elapsed >= 2 * MONGO_LATENCY
+    assert lag < MONGO_LATENCY / 4
+    assert users.find_one({"_id": 3})["status"] == "active"
+
+
+def test_blocking_call_on_the_loop_is_detected():
+    # Monitor ကိုယ်တိုင် မှန်မမှန် (loop ပေါ်မှာ တိုက်ရိုက် ခေါ်ရင် lag ကို တွေ့ရမယ်)
+    async def work():
+        await asyncio.sleep(0.02)
+        time.sleep(MONGO_LATENCY)
+
+    assert asyncio.run(max_loop_lag(work)) >= MONGO_LATENCY / 2
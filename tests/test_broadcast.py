@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from pymongo.errors import CursorNotFound, ServerSelectionTimeoutError
+from telegram.error import Forbidden
+
+from broadcast import BroadcastEngine
+
+
+@pytest.fixture
+def engine(mongo_db, run_db):
+    users = mongo_db["users"]
+    users.insert_many([{"_id": i, "status": "blocked" if i % 4 == 0 else "active"} for i in range(1, 11)])
+    return BroadcastEngine(users, mongo_db["broadcasts"], run_db, batch_size=3)
+
+
+def test_cursor_streams_active_ids_one_batch_at_a_time(engine):
+    cursor = engine._open_cursor(None)
+
+    batches = []
+    while batch := engine._next_batch(cursor):
+        batches.append(batch)
+
+    assert batches == [[1, 2, 3], [5, 6, 7], [9, 10]]
+
+
+def test_cursor_resumes_after_checkpoint(engine):
+    assert engine._next_batch(engine._open_cursor(5)) == [6, 7, 9]
+
+
+class ExpiredCursor:
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        raise CursorNotFound("cursor id not found")
+
+
+def test_expired_cursor_is_reopened_after_last_id(engine):
+    cursor, user_ids = asyncio.run(engine._read_batch(ExpiredCursor(), 3))
+
+    assert user_ids == [5, 6, 7]
+    assert engine._next_batch(cursor) == [9, 10]
+
+
+class FakeBot:
+    def __init__(self, blocked=()):
+        self.blocked = set(blocked)
+        self.sent = []
+        self.edits = []
+
+    async def send_message(self, chat_id, text):
+        if chat_id in self.blocked:
+            raise Forbidden("bot was blocked by the user")
+        self.sent.append(chat_id)
+
+    async def edit_message_text(self, chat_id, message_id, text):
+        self.edits.append(text)
+
+
+def test_failed_run_keeps_the_checkpoint_and_tells_the_admin(engine):
+    bot = FakeBot(blocked={6})
+
+    def bulk_write(*args, **kwargs):
+        raise ServerSelectionTimeoutError("mongo down")
+
+    engine.users_col.bulk_write = bulk_write
+
+    async def main():
+        broadcast_id = await engine.start(bot, {"kind": "text", "text": "hi"}, 1, 2)
+        await asyncio.gather(*engine._tasks.values())
+        return broadcast_id
+
+    doc = engine.col.find_one({"_id": asyncio.run(main())})
+
+    # ပထမ batch ပြီးပြီ၊ ဒုတိယ batch ရဲ့ blocked update မှာ ရပ်သွားတယ်
+    assert doc["status"] == "running"
+    assert doc["last_id"] == 3
+    assert "mongo down" in doc["last_error"]
+    assert bot.edits[-1].startswith("⚠️ Broadcast stopped at 3/8")
@@ -0,0 +1,72 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+
+import mongomock
+import pymongo
+
+import async_db
+import database
+
+
+def test_importing_main_builds_no_mongo_client():
+    # Subprocess: တခြား test တွေက database module state ကို မထိမိအောင်
+    code = "import database, main; print(database.is_connected())"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60)
+    assert result.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_lazy_collection_defers_methods_until_the_client_exists(monkeypatch):
+    monkeypatch.setattr(database, "_client", None)
+    monkeypatch.setattr(pymongo, "MongoClient", lambda *args, **kwargs: mongomock.MongoClient())
+    users = database.LazyDatabase("test_db")["users"]
+
+    insert_one = users.insert_one
+    assert isinstance(insert_one, database._DeferredMethod)
+    assert insert_one.__qualname__ == "users.insert_one"
+    assert not database.is_connected()
+
+    # ခေါ်တဲ့အချိန် (executor ပေါ်မှာ) မှ client ဆောက်မယ်
+    insert_one({"_id": 1})
+    assert database.is_connected()
+    assert users.find_one({"_id": 1}) == {"_id": 1}
+    assert not isinstance(users.find_one, database._DeferredMethod)
+
+
+def test_run_db_waits_for_the_background_connect(monkeypatch):
+    monkeypatch.setattr(async_db, "_ready", None)
+    connected = threading.Event()
+    order = []
+
+    def slow_connect():
+        time.sleep(0.2)
+        order.append("connect")
+        connected.set()
+
+    def query():
+        order.append("query")
+        return connected.is_set()
+
+    monkeypatch.setattr(database, "connect", slow_connect)
+
+    async def main():
+        async_db.connect()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        result = await async_db.run_db(query)
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(main())
+    assert result and order == ["connect", "query"]
+    # Connect ကို စောင့်နေတုန်း event loop က အလုပ်ဆက်လုပ်နေရမယ်
+    assert ticks >= 10
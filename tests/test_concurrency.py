@@ -0,0 +1,105 @@
+from concurrency import AIMDController
+
+TARGET = 8.0  # seconds per 1000 characters
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSynthesizer:
+    """edge-tts stand-in: calls slow down once more than `capacity` run together, or during an outage"""
+
+    def __init__(self, capacity, base_latency=2.0):
+        self.capacity = capacity
+        self.base_latency = base_latency
+        self.outage_latency = None  # latency per 1k chars while degraded
+        self.failing = False
+
+    def call(self, concurrent):
+        """Returns (seconds, ok) for one 1000-character request"""
+        if self.failing:
+            return 1.0, False
+        if self.outage_latency is not None:
+            return self.outage_latency, True
+        return self.base_latency * max(1.0, concurrent / self.capacity), True
+
+
+def run(controller, synthesizer, clock, rounds):
+    """Round တစ်ခုစီမှာ limit အတိုင်း call တွေကို တစ်ပြိုင်နက် run ပြီး controller ကို ပြန်ပြောမယ်"""
+    limits = []
+    for _ in range(rounds):
+        concurrent = controller.limit
+        results = [synthesizer.call(concurrent) for _ in range(concurrent)]
+        for seconds, ok in results:
+            controller.record(seconds, ok, 1000)
+        clock.now += max(seconds for seconds, _ in results)
+        limits.append(controller.limit)
+    return limits
+
+
+def make_controller(clock, changes, initial=2):
+    return AIMDController(
+        min_limit=1, max_limit=8, initial=initial, latency_target=TARGET,
+        decrease_factor=0.5, decrease_cooldown=5.0, on_change=changes.append, clock=clock
+    )
+
+
+def test_limit_is_cut_when_latency_passes_the_target_and_recovers_after():
+    clock, changes = FakeClock(), []
+    controller = make_controller(clock, changes)
+    synthesizer = FakeSynthesizer(capacity=8)
+
+    healthy = run(controller, synthesizer, clock, 20)
+    assert healthy[-1] == 8
+
+    synthesizer.outage_latency = 3 * TARGET
+    degraded = run(controller, synthesizer, clock, 10)
+    assert degraded[0] == 4  # ပထမ slow call မှာ တစ်ဝက် လျှော့မယ်
+    assert degraded[-1] == 1
+    assert controller.slow > 0
+
+    synthesizer.outage_latency = None
+    recovered = run(controller, synthesizer, clock, 30)
+    assert recovered[-1] == 8
+    # on_change (scheduler.set_concurrency) က limit ပြောင်းတိုင်း ခေါ်ခံရမယ်
+    assert changes[-1] == 8 and 1 in changes
+
+
+def test_errors_cut_the_limit():
+    clock, changes = FakeClock(), []
+    controller = make_controller(clock, changes, initial=8)
+    synthesizer = FakeSynthesizer(capacity=8)
+
+    synthesizer.failing = True
+    run(controller, synthesizer, clock, 1)
+    assert controller.limit == 4
+    assert controller.failures == 8
+
+
+def test_one_cut_per_cooldown():
+    clock, changes = FakeClock(), []
+    controller = make_controller(clock, changes, initial=8)
+    for _ in range(5):
+        controller.record(3 * TARGET, True, 1000)
+    assert controller.limit == 4
+
+    clock.now += 5.0
+    controller.record(3 * TARGET, True, 1000)
+    assert controller.limit == 2
+
+
+def test_limit_settles_near_the_synthesizer_capacity():
+    clock, changes = FakeClock(), []
+    controller = make_controller(clock, changes)
+    # 3 ခုထက်ပိုရင် latency = 4s * concurrent / 3၊ concurrent 7 ကစပြီး target (8s) ကျော်မယ်
+    synthesizer = FakeSynthesizer(capacity=3, base_latency=4.0)
+
+    limits = run(controller, synthesizer, clock, 200)
+    # အဲဒီနားမှာပဲ လှုပ်နေရမယ် (max_limit 8 ထိ မတက်ရ)
+    assert max(limits[50:]) <= 7
+    assert min(limits[50:]) >= 3
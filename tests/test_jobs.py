@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from jobs import JobQueue
+
+
+@pytest.fixture
+def make_queue(mongo_db, run_db):
+    def make(max_attempts=3):
+        col = mongo_db["jobs"]
+        return col, JobQueue(col, run_db, lease_seconds=60, max_attempts=max_attempts, retry_delay=5)
+
+    return make
+
+
+def expire_lease(col, job_id):
+    col.update_one({"_id": job_id}, {"$set": {"lease_until": datetime.now() - timedelta(seconds=1)}})
+
+
+def test_claim_takes_queued_jobs_in_order_and_counts_attempts(make_queue):
+    col, queue = make_queue()
+
+    async def main():
+        first = await queue.enqueue({"text": "a"})
+        await queue.enqueue({"text": "b"})
+        job = await queue.claim("w1")
+        return first, job
+
+    first, job = asyncio.run(main())
+    assert job["_id"] == first
+    assert (job["status"], job["worker"], job["attempts"]) == ("running", "w1", 1)
+
+
+def test_expired_lease_is_claimed_again_until_attempts_run_out(make_queue):
+    col, queue = make_queue(max_attempts=2)
+
+    async def main():
+        job_id = await queue.enqueue({"text": "a"})
+        assert (await queue.claim("w1"))["attempts"] == 1
+        expire_lease(col, job_id)
+        assert (await queue.claim("w2"))["attempts"] == 2
+        expire_lease(col, job_id)
+        # Attempt ကုန်ပြီမို့ ထပ်မပေးဘဲ failed လုပ်မယ်
+        claimed = await queue.claim("w3")
+        exhausted = await queue.fail_exhausted("w3")
+        return job_id, claimed, exhausted
+
+    job_id, claimed, exhausted = asyncio.run(main())
+    assert claimed is None
+    assert exhausted["_id"] == job_id
+    assert col.find_one({"_id": job_id})["status"] == "failed"
+
+
+def test_fail_exhausted_leaves_live_leases_and_retryable_jobs(make_queue):
+    col, queue = make_queue(max_attempts=1)
+
+    async def main():
+        running = await queue.enqueue({"text": "a"})
+        await queue.claim("w1")  # lease မကုန်သေး
+        await queue.enqueue({"text": "b"})
+        return running, await queue.fail_exhausted("w2")
+
+    running, exhausted = asyncio.run(main())
+    assert exhausted is None
+    assert col.find_one({"_id": running})["status"] == "running"
+
+
+def test_retry_backs_off_then_fails_after_max_attempts(make_queue):
+    col, queue = make_queue(max_attempts=2)
+
+    async def main():
+        await queue.enqueue({"text": "a"})
+        job = await queue.claim("w1")
+        assert await queue.retry_or_fail(job, "w1", "boom")
+        # Backoff ကုန်မှ ပြန်ယူလို့ရမယ်
+        assert await queue.claim("w1") is None
+        col.update_one({"_id": job["_id"]}, {"$set": {"available_at": datetime.now()}})
+        job = await queue.claim("w1")
+        assert job["attempts"] == 2
+        return job, await queue.retry_or_fail(job, "w1", "boom")
+
+    job, retried = asyncio.run(main())
+    assert not retried
+    assert col.find_one({"_id": job["_id"]})["status"] == "failed"
+
+
+def test_release_gives_the_attempt_back(make_queue):
+    col, queue = make_queue()
+
+    async def main():
+        await queue.enqueue({"text": "a"})
+        job = await queue.claim("w1")
+        await queue.release(job["_id"], "w1")
+        return await queue.claim("w2")
+
+    assert asyncio.run(main())["attempts"] == 1
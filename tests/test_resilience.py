@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from resilience import AttemptTimeout, RetryBudget, SynthesisPolicy
+from synthesis import _synthesize_chunk
+
+VOICE = "my-MM-ThihaNeural"
+
+
+class Observer:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, seconds, ok, chars):
+        self.calls.append((seconds, ok, chars))
+
+
+def test_retry_budget_allows_a_fraction_of_requests():
+    budget = RetryBudget(ratio=0.5, min_per_second=0, capacity=2)
+    for _ in range(10):
+        budget.deposit()
+
+    # Capacity အထိပဲ စုမယ်
+    assert [budget.withdraw() for _ in range(3)] == [True, True, False]
+    assert budget.denied == 1
+
+
+def test_retry_budget_reserve_allows_retries_while_traffic_is_low():
+    budget = RetryBudget(ratio=0, min_per_second=0.1)
+
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+
+def test_transient_failure_is_retried_and_reported(fake_edge_tts):
+    fake_edge_tts.failures["hello"] = 1
+    policy = SynthesisPolicy(retries=2, backoff_base=0)
+    observer = Observer()
+
+    with asyncio.run(_synthesize_chunk(0, "hello", VOICE, 2, observer, policy=policy)) as audio:
+        assert audio.read() == b"hello"
+    assert policy.retried == 1
+    assert [ok for _, ok, _ in observer.calls] == [False, True]
+
+
+def test_retry_is_refused_when_the_budget_is_empty(fake_edge_tts):
+    fake_edge_tts.failures["hello"] = 1
+    policy = SynthesisPolicy(retries=2, backoff_base=0, budget=RetryBudget(ratio=0, min_per_second=0))
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(_synthesize_chunk(0, "hello", VOICE, 2, policy=policy))
+    assert policy.retries_denied == 1
+    assert fake_edge_tts.started == ["hello"]
+
+
+def test_stalled_attempt_is_cancelled_and_reported_as_a_failure(fake_edge_tts):
+    fake_edge_tts.stalls.add("hello")
+    policy = SynthesisPolicy(retries=1, backoff_base=0, stall_timeout=0.05)
+    observer = Observer()
+
+    with pytest.raises(AttemptTimeout):
+        asyncio.run(_synthesize_chunk(0, "hello", VOICE, 1, observer, policy=policy))
+
+    assert policy.timeouts == 2
+    assert fake_edge_tts.cancelled == ["hello", "hello"]
+    # AIMD controller က stall ကို မြင်ရမယ်
+    assert [(ok, chars) for _, ok, chars in observer.calls] == [(False, 5), (False, 5)]
+    assert all(seconds >= 0.05 for seconds, _, _ in observer.calls)
+
+
+def test_hedge_wins_over_a_slow_attempt_and_the_loser_is_not_reported(fake_edge_tts):
+    policy = SynthesisPolicy(retries=0, hedge=True, hedge_min_delay=0.05, min_samples=1)
+    observer = Observer()
+
+    async def main():
+        # ပထမ request က time-to-first-audio sample ပေးမယ်
+        (await _synthesize_chunk(0, "warm", VOICE, 0, policy=policy)).close()
+        fake_edge_tts.delays["hello"] = 1.0
+        task = asyncio.ensure_future(_synthesize_chunk(1, "hello", VOICE, 0, observer, policy=policy))
+        await asyncio.sleep(0.01)
+        # Primary က နှေးနေပြီး hedge attempt ကတော့ ချက်ချင်းပြီးမယ်
+        fake_edge_tts.delays["hello"] = 0
+        with await task as audio:
+            return audio.read()
+
+    assert asyncio.run(main()) == b"hello"
+    assert (policy.hedges, policy.hedge_wins, policy.timeouts) == (1, 1, 0)
+    assert fake_edge_tts.cancelled == ["hello"]
+    assert [ok for _, ok, _ in observer.calls] == [True]
+
+
+def test_no_hedge_once_audio_is_flowing(fake_edge_tts):
+    policy = SynthesisPolicy(retries=0, hedge=True, hedge_min_delay=0.01, min_samples=1)
+
+    async def main():
+        (await _synthesize_chunk(0, "warm", VOICE, 0, policy=policy)).close()
+        fake_edge_tts.stalls.add("hello")
+        policy.stall_timeout = 0.1
+        with pytest.raises(AttemptTimeout):
+            await _synthesize_chunk(1, "hello", VOICE, 0, policy=policy)
+
+    asyncio.run(main())
+    assert policy.hedges == 0
+    assert fake_edge_tts.started == ["warm", "hello"]
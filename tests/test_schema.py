@@ -0,0 +1,51 @@
+import schema
+
+
+class FakeDatabase:
+    """Returns a canned explain result (mongomock has no explain command)"""
+
+    def __init__(self, winning_plan):
+        self.winning_plan = winning_plan
+        self.commands = []
+
+    def command(self, name, command, verbosity=None):
+        self.commands.append((name, command, verbosity))
+        return {"queryPlanner": {"winningPlan": self.winning_plan}}
+
+
+def test_ensure_indexes_only_creates_missing_indexes(mongo_db):
+    mongo_db["users"].create_index([("last_active", 1)], name="last_active_1")
+
+    created = schema.ensure_indexes(mongo_db)
+
+    assert sorted(created) == ["status_1__id_1", "voice_preference_1"]
+    assert {"status_1__id_1", "last_active_1", "voice_preference_1"} <= set(mongo_db["users"].index_information())
+    assert schema.ensure_indexes(mongo_db) == []
+
+
+def test_explain_query_marks_index_only_plan_as_covered():
+    database = FakeDatabase({
+        "stage": "PROJECTION_COVERED",
+        "inputStage": {"stage": "IXSCAN", "indexName": "status_1__id_1"},
+    })
+
+    report = schema.explain_query(database, schema.HOT_QUERIES["broadcast batch"])
+
+    assert report == {
+        "stages": ["PROJECTION_COVERED", "IXSCAN"], "indexes": ["status_1__id_1"], "covered": True, "ok": True,
+    }
+    name, command, verbosity = database.commands[0]
+    assert (name, verbosity) == ("explain", "queryPlanner")
+    assert command["sort"] == {"_id": 1}
+
+
+def test_explain_query_fails_collscan_and_uncovered_fetch():
+    scan = FakeDatabase({"stage": "PROJECTION_SIMPLE", "inputStage": {"stage": "COLLSCAN"}})
+    fetch = FakeDatabase({
+        "queryPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "status_1__id_1"}},
+    })
+
+    assert not schema.explain_query(scan, schema.HOT_QUERIES["export changes"])["ok"]
+    # FETCH လိုတာ covered=False query အတွက် ရတယ်၊ covered=True query အတွက် မရဘူး
+    assert schema.explain_query(fetch, schema.HOT_QUERIES["users by voice"])["ok"]
+    assert not schema.explain_query(fetch, schema.HOT_QUERIES["active user count"])["ok"]
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from config import DEFAULT_VOICE
+from stats import StatsService
+
+
+@pytest.fixture
+def stats(mongo_db, run_db):
+    return StatsService(mongo_db["users"], mongo_db["counters"], run_db)
+
+
+@pytest.fixture
+def profiles(stats, make_profile_cache):
+    return make_profile_cache(stats=stats)
+
+
+def test_recount_includes_unflushed_new_users_and_generations(mongo_db, stats, profiles, make_user):
+    mongo_db["users"].insert_one({"_id": 1, "status": "active", "voice_preference": DEFAULT_VOICE, "generated_count": 4})
+
+    async def main():
+        await profiles.touch(make_user(1))
+        await profiles.touch(make_user(2))
+        profiles.record_generation(2)
+        # Counters document မရှိသေးလို့ get() က recount မယ်
+        return await stats.get()
+
+    result = asyncio.run(main())
+    assert result["total"] == 2
+    assert result["active"] == 2
+    assert result["total_generated"] == 5
+    assert result["voices"] == {DEFAULT_VOICE: 2}
+
+
+def test_recount_keeps_deltas_recorded_while_it_runs(stats, profiles, make_user):
+
+    async def add_user():
+        # profiles.flush() ပြီးမှ၊ recount က users ကို မဖတ်ခင် user အသစ် ဝင်လာရင် (write-behind ထဲမှာပဲ ရှိသေး)
+        await profiles.touch(make_user(9))
+
+    stats.add_write_buffer(add_user)
+
+    async def main():
+        await profiles.touch(make_user(1))
+        await stats.recount()
+        return await stats.get()
+
+    result = asyncio.run(main())
+    assert result["total"] == 2
+    assert result["active"] == 2
+
+
+def test_deltas_flush_into_the_counters_document(mongo_db, stats, profiles, make_user):
+
+    async def main():
+        await stats.recount()
+        await profiles.touch(make_user(1))
+        profiles.record_generation(1)
+        await stats.flush()
+        return await stats.get()
+
+    result = asyncio.run(main())
+    assert (result["total"], result["total_generated"]) == (1, 1)
+    assert mongo_db["counters"].find_one()["total"] == 1
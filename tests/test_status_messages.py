@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+from status_messages import StatusManager
+
+
+class FakeChat:
+    """Bot API call တွေကို (monotonic time, method, text) အဖြစ် မှတ်မယ်"""
+
+    def __init__(self, chat_id=1):
+        self.chat_id = chat_id
+        self.calls = []
+
+    def log(self, method, text=None):
+        self.calls.append((time.monotonic(), method, text))
+
+    def methods(self):
+        return [(method, text) for _, method, text in self.calls]
+
+
+class FakeSent:
+    def __init__(self, chat):
+        self.chat = chat
+
+    async def edit_text(self, text):
+        self.chat.log("edit", text)
+
+    async def delete(self):
+        self.chat.log("delete")
+
+
+class FakeMessage:
+    def __init__(self, chat):
+        self.chat = chat
+        self.chat_id = chat.chat_id
+
+    async def reply_chat_action(self, action):
+        self.chat.log("action", action)
+
+    async def reply_text(self, text):
+        self.chat.log("send", text)
+        return FakeSent(self.chat)
+
+
+def test_fast_request_only_sends_the_chat_action():
+    manager = StatusManager(show_delay=0.2, edit_interval=0.1)
+    chat = FakeChat()
+
+    async def main():
+        status = manager.open(FakeMessage(chat), "Processing...")
+        await asyncio.sleep(0.01)
+        status.update("Synthesizing...")
+        await status.close()
+
+    asyncio.run(main())
+    assert chat.methods() == [("action", "record_voice")]
+    assert manager.stats()["sources"]["synthesis"] == {"requests": 1, "calls": 1, "per_request": 1.0}
+
+
+def test_superseded_texts_are_never_sent():
+    manager = StatusManager(show_delay=0.02, edit_interval=0.1)
+    chat = FakeChat()
+
+    async def main():
+        status = manager.open(FakeMessage(chat), "Queued")
+        await asyncio.sleep(0.05)
+        for text in ("Chunk 1/3", "Chunk 2/3", "Chunk 3/3"):
+            status.update(text)
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.15)
+        status.count()  # audio upload
+        await status.close(source="synthesis")
+        return status
+
+    status = asyncio.run(main())
+    assert chat.methods() == [
+        ("action", "record_voice"), ("send", "Queued"), ("edit", "Chunk 3/3"), ("delete", None),
+    ]
+    assert manager.coalesced == 2
+    assert status.api_calls == 5
+
+
+def test_requests_in_one_chat_share_the_edit_rate_limit():
+    manager = StatusManager(show_delay=0, edit_interval=0.1)
+    chat = FakeChat()
+
+    async def main():
+        statuses = [manager.open(FakeMessage(chat), f"Request {n}") for n in range(3)]
+        await asyncio.sleep(0.25)
+        for status in statuses:
+            await status.close()
+
+    asyncio.run(main())
+    sends = [at for at, method, _ in chat.calls if method == "send"]
+    assert len(sends) == 3
+    assert all(later - earlier >= 0.09 for earlier, later in zip(sends, sends[1:]))
+
+
+def test_other_chats_are_not_delayed():
+    manager = StatusManager(show_delay=0, edit_interval=1.0)
+    chats = [FakeChat(chat_id) for chat_id in (1, 2)]
+
+    async def main():
+        statuses = [manager.open(FakeMessage(chat), "Processing...") for chat in chats]
+        await asyncio.sleep(0.05)
+        for status in statuses:
+            await status.close()
+
+    asyncio.run(main())
+    for chat in chats:
+        assert ("send", "Processing...") in chat.methods()
+
+
+def test_close_with_final_text_keeps_the_message():
+    manager = StatusManager(show_delay=0.02, edit_interval=0.1)
+    shown, hidden = FakeChat(1), FakeChat(2)
+
+    async def main():
+        status = manager.open(FakeMessage(shown), "Processing...")
+        await asyncio.sleep(0.05)
+        await status.close(final_text="❌ Error")
+        # Status မပြရသေးခင် error ဖြစ်ရင် reply အသစ်နဲ့ ပြမယ်
+        status = manager.open(FakeMessage(hidden), "Processing...")
+        await status.close(final_text="❌ Error")
+
+    asyncio.run(main())
+    assert shown.methods()[-1] == ("edit", "❌ Error")
+    assert hidden.methods()[-1] == ("send", "❌ Error")
+    assert all(method != "delete" for method, _ in shown.methods() + hidden.methods())
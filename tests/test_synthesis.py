@@ -0,0 +1,133 @@
+import asyncio
+import tempfile
+import time
+from contextlib import aclosing
+
+import synthesis
+from synthesis import split_text, synthesize_long, synthesize_segments
+
+VOICE = "my-MM-ThihaNeural"
+TEXT = "First sentence here. Second one follows. Third comes next. Fourth ends it."
+
+
+async def collect(segments):
+    out = []
+    async with aclosing(segments):
+        async for number, count, buffer, size in segments:
+            with buffer:
+                out.append((number, count, buffer.read(), size, time.monotonic()))
+    return out
+
+
+def test_split_text_keeps_every_sentence_within_the_limit():
+    chunks = split_text(TEXT, 40)
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert " ".join(chunks) == TEXT
+
+
+def test_segments_arrive_in_text_order(fake_edge_tts):
+    segments = split_text(TEXT, 40)
+    assert len(segments) > 1
+    # ပထမ segment က အနှေးဆုံး ဖြစ်ပေမယ့် အရင်ထွက်ရမယ်
+    fake_edge_tts.delays[split_text(segments[0], 20)[0]] = 0.1
+
+    out = asyncio.run(collect(synthesize_segments(TEXT, VOICE, 40, chunk_chars=20, concurrency=8)))
+
+    assert [(number, count) for number, count, *_ in out] == [(n, len(segments)) for n in range(1, len(segments) + 1)]
+    for (_, _, audio, size, _), segment in zip(out, segments):
+        assert audio == "".join(split_text(segment, 20)).encode()
+        assert size == len(audio)
+
+
+def test_later_segments_synthesize_while_the_first_is_pending(fake_edge_tts):
+    segments = split_text(TEXT, 40)
+    for chunk in split_text(TEXT, 20):
+        fake_edge_tts.delays[chunk] = 0.1
+
+    started = time.monotonic()
+    out = asyncio.run(collect(synthesize_segments(TEXT, VOICE, 40, chunk_chars=20, concurrency=8)))
+
+    # Chunk အားလုံး တစ်ပြိုင်နက် စလို့ segment တွေကို တစ်ခုပြီးမှ တစ်ခု မစောင့်ရဘူး
+    assert out[-1][-1] - started < 0.1 * len(segments)
+    assert len(out) == len(segments)
+
+
+def test_closing_the_generator_cancels_unfinished_chunks(fake_edge_tts):
+    segments = split_text(TEXT, 40)
+    last_chunk = split_text(segments[-1], 20)[-1]
+    fake_edge_tts.delays[last_chunk] = 5
+
+    async def main():
+        generator = synthesize_segments(TEXT, VOICE, 40, chunk_chars=20, concurrency=8)
+        async with aclosing(generator):
+            number, count, buffer, size = await generator.__anext__()
+            buffer.close()
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert last_chunk in fake_edge_tts.cancelled
+
+
+def test_synthesize_long_joins_chunks_in_order(fake_edge_tts):
+    chunks = split_text(TEXT, 20)
+    fake_edge_tts.delays[chunks[0]] = 0.05
+
+    async def main():
+        buffer, size = await synthesize_long(TEXT, VOICE, chunk_chars=20, concurrency=4)
+        with buffer:
+            return buffer.read(), size
+
+    audio, size = asyncio.run(main())
+    assert audio == "".join(chunks).encode()
+    assert size == len(audio)
+
+
+def test_chunks_are_written_as_soon_as_their_predecessors_are(fake_edge_tts, monkeypatch):
+    chunks = split_text(TEXT, 20)
+    assert len(chunks) >= 3
+    fake_edge_tts.delays[chunks[0]] = 0.05
+    fake_edge_tts.delays[chunks[1]] = 0.3
+
+    class RecordingSpool(tempfile.SpooledTemporaryFile):
+        def write(self, data):
+            self.writes = getattr(self, "writes", []) + [(data, time.monotonic())]
+            return super().write(data)
+
+    monkeypatch.setattr(synthesis.tempfile, "SpooledTemporaryFile", RecordingSpool)
+
+    async def main():
+        started = time.monotonic()
+        buffer, size = await synthesize_long(TEXT, VOICE, chunk_chars=20, concurrency=4)
+        buffer.close()
+        # Chunk attempt တွေလည်း spool သုံးလို့ output spool ရဲ့ write တွေကိုပဲ ကြည့်မယ်
+        return started, buffer.writes
+
+    started, writes = asyncio.run(main())
+    assert [data for data, _ in writes] == [chunk.encode() for chunk in chunks]
+    # ပထမ chunk ကို ဒုတိယ chunk မပြီးခင် ရေးပြီးပြီ၊ နောက်က chunk တွေကတော့ ဒုတိယကို စောင့်ရတယ်
+    assert writes[0][1] - started < 0.2
+    assert all(at - started >= 0.3 for _, at in writes[1:])
+
+
+def test_single_chunk_audio_streams_into_the_returned_spool(fake_edge_tts, monkeypatch):
+    text = "x" * 300
+    fake_edge_tts.failures[text] = 1
+    spools = []
+
+    class TrackedSpool(tempfile.SpooledTemporaryFile):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            spools.append(self)
+
+    monkeypatch.setattr(synthesis.tempfile, "SpooledTemporaryFile", TrackedSpool)
+    policy = synthesis.SynthesisPolicy(retries=1, backoff_base=0)
+
+    buffer, size = asyncio.run(synthesize_long(text, VOICE, spool_max_bytes=100, policy=policy))
+
+    with buffer:
+        # Memory ထဲ ထပ်မကူးဘဲ attempt ရဲ့ spool ကိုယ်တိုင်ပြန်လာပြီး spool_max_bytes ကျော်လို့ disk ပေါ် ရောက်ပြီ
+        assert buffer is spools[-1]
+        assert buffer.name is not None
+        assert (buffer.read(), size) == (text.encode(), 300)
+    # Fail ဖြစ်ခဲ့တဲ့ ပထမ attempt ရဲ့ spool ကို ပိတ်ပြီးပြီ
+    assert len(spools) == 2 and spools[0].closed
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import usage_log
+from usage_log import UsageLog
+
+NOW = datetime(2026, 3, 14, 9, 30)
+
+
+class FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+@pytest.fixture
+def log(monkeypatch, mongo_db, run_db):
+    monkeypatch.setattr(usage_log, "datetime", FixedDatetime)
+    return UsageLog(mongo_db["usage_events"], mongo_db["usage_summaries"], run_db, bucket_max_events=2)
+
+
+def record_some(log):
+    log.record(1, "my-MM.NilarNeural", 10, "generated", audio_bytes=100, queue_wait=0.5, synthesis_seconds=2.0)
+    log.record(2, "my-MM.NilarNeural", 20, "cache_hit", audio_bytes=200)
+    log.record(3, "my-MM-ThihaNeural", 30, "error")
+
+
+def test_flush_rolls_events_up_into_hour_and_day_summaries(log):
+    record_some(log)
+    asyncio.run(log.flush())
+
+    for doc_id, period in (("hour:2026-03-14T09", "hour"), ("day:2026-03-14", "day")):
+        doc = log.col.find_one({"_id": doc_id})
+        assert doc["period"] == period
+        assert (doc["requests"], doc["ok"], doc["failed"]) == (3, 2, 1)
+        # Audio မရတဲ့ request ရဲ့ chars ကို မထည့်ဘူး
+        assert (doc["chars"], doc["audio_bytes"]) == (30, 300)
+        assert doc["results"] == {"generated": 1, "cache_hit": 1, "error": 1}
+        assert doc["voices"]["my-MM_NilarNeural"] == {"requests": 2, "chars": 30}
+        assert (doc["synthesized"], doc["queue_wait_seconds"], doc["synthesis_seconds"]) == (1, 0.5, 2.0)
+    assert log.col.find_one({"_id": "day:2026-03-14"})["hours"] == {"09": {"requests": 3, "chars": 30}}
+
+    # Event တွေကို hour bucket document (တစ်ခုကို bucket_max_events အထိ) အဖြစ် ရေးမယ်
+    buckets = list(log.events_col.find({}, sort=[("_id", 1)]))
+    assert [bucket["count"] for bucket in buckets] == [2, 1]
+    assert {bucket["start"] for bucket in buckets} == {datetime(2026, 3, 14, 9)}
+    assert log.stats()["written"] == 3 and log.stats()["pending"] == 0
+
+
+def test_second_flush_adds_to_existing_summaries(log):
+    record_some(log)
+    asyncio.run(log.flush())
+    log.record(4, "my-MM.NilarNeural", 5, "coalesced")
+    asyncio.run(log.flush())
+
+    doc = log.col.find_one({"_id": "hour:2026-03-14T09"})
+    assert (doc["requests"], doc["ok"], doc["chars"]) == (4, 3, 35)
+    assert log.flushes == 2
+
+
+class FailingCollection:
+    def __init__(self):
+        self.calls = 0
+
+    def insert_many(self, *args, **kwargs):
+        self.calls += 1
+        raise RuntimeError("mongo down")
+
+    bulk_write = insert_many
+
+
+def test_failed_flush_keeps_events_and_deltas_for_the_next_one(log):
+    events, summaries = log.events_col, log.col
+    log.events_col = log.col = FailingCollection()
+    record_some(log)
+    asyncio.run(log.flush())
+    log.record(4, "my-MM.NilarNeural", 5, "generated")
+
+    log.events_col, log.col = events, summaries
+    asyncio.run(log.flush())
+
+    assert log.written == 4
+    assert sum(bucket["count"] for bucket in events.find()) == 4
+    assert summaries.find_one({"_id": "day:2026-03-14"})["requests"] == 4
+
+
+def test_full_buffer_drops_oldest_events_while_mongo_fails(log):
+    log.max_buffer = 2
+    log.events_col = FailingCollection()
+    record_some(log)
+    asyncio.run(log.flush())
+
+    assert [event["user_id"] for event in log._events] == [2, 3]
+    assert log.stats()["dropped"] == 1
+
+
+def test_report_reads_summaries_only(log):
+    record_some(log)
+    asyncio.run(log.flush())
+    # Raw event တွေ မရှိလည်း report ထွက်ရမယ်
+    log.events_col.delete_many({})
+
+    report = asyncio.run(log.report(days=2, now=NOW))
+
+    assert [day for day, _ in report["days"]] == ["2026-03-13", "2026-03-14"]
+    assert report["days"][0][1] == {}
+    assert report["last_24h"]["requests"] == 3
+    assert report["last_24h"]["chars"] == 30
+    assert report["hours"] == {"09": 3}
+    assert report["voices"] == {
+        "my-MM_NilarNeural": {"requests": 2, "chars": 30},
+        "my-MM-ThihaNeural": {"requests": 1, "chars": 0},
+    }
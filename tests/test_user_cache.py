@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from config import DEFAULT_VOICE
+
+NILAR = "my-MM-NilarNeural"
+
+
+@pytest.fixture
+def col(mongo_db):
+    return mongo_db["users"]
+
+
+def test_new_user_voice_choice_survives_the_first_flush(col, make_profile_cache, make_user):
+    cache = make_profile_cache()
+
+    async def main():
+        await cache.touch(make_user(1))
+        assert await cache.set_voice_preference(1, NILAR)
+        await cache.flush()
+
+    asyncio.run(main())
+    doc = col.find_one({"_id": 1})
+    assert doc["voice_preference"] == NILAR
+    assert doc["status"] == "active"
+    assert doc["generated_count"] == 0
+    assert "joined_at" in doc
+
+
+def test_voice_choice_is_kept_after_the_profile_is_reloaded(col, make_profile_cache, make_user):
+    cache = make_profile_cache()
+
+    async def main():
+        await cache.touch(make_user(1))
+        await cache.set_voice_preference(1, NILAR)
+        cache.record_generation(1)
+        await cache.flush()
+        # TTL ကုန်လို့ DB ကနေ ပြန် load တဲ့အခါ
+        return await make_profile_cache().get_voice_preference(1)
+
+    assert asyncio.run(main()) == NILAR
+    assert col.find_one({"_id": 1})["generated_count"] == 1
+
+
+def test_existing_user_keeps_its_fields(col, make_profile_cache, make_user):
+    cache = make_profile_cache()
+    col.insert_one({"_id": 1, "voice_preference": DEFAULT_VOICE, "generated_count": 7, "joined_at": "then"})
+
+    async def main():
+        await cache.touch(make_user(1))
+        await cache.set_voice_preference(1, NILAR)
+        await cache.flush()
+
+    asyncio.run(main())
+    doc = col.find_one({"_id": 1})
+    assert (doc["voice_preference"], doc["generated_count"], doc["joined_at"]) == (NILAR, 7, "then")
+
+
+def test_new_user_format_choice_survives_the_first_flush(col, make_profile_cache, make_user):
+    cache = make_profile_cache()
+
+    async def main():
+        await cache.touch(make_user(1))
+        assert await cache.set_format_preference(1, "opus")
+        await cache.flush()
+        return (await make_profile_cache().get(1))["format_preference"]
+
+    assert asyncio.run(main()) == "opus"
+    doc = col.find_one({"_id": 1})
+    assert (doc["format_preference"], doc["voice_preference"], doc["generated_count"]) == ("opus", DEFAULT_VOICE, 0)
@@ -0,0 +1,81 @@
+import asyncio
+
+import main
+from voice_catalog import VoiceCatalog
+
+FALLBACK = [
+    {"ShortName": "my-MM-ThihaNeural", "Gender": "Male", "Locale": "my-MM"},
+    {"ShortName": "my-MM-NilarNeural", "Gender": "Female", "Locale": "my-MM"},
+]
+
+
+class Message:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text=None, **kwargs):
+        self.replies.append((text, kwargs))
+
+
+class Update:
+    callback_query = None
+
+    def __init__(self):
+        self.message = Message()
+
+
+async def empty_profile(user_id):
+    return {}
+
+
+def show(monkeypatch, catalog):
+    monkeypatch.setattr(main, "voice_catalog", catalog)
+    monkeypatch.setattr(main.profile_cache, "get", empty_profile)
+    update = Update()
+    asyncio.run(main.show_voice_selection(update, None, 42))
+    return update.message.replies
+
+
+def test_empty_catalog_shows_a_loading_message(monkeypatch, tmp_path):
+    # VOICE_CATALOG_LOCALES=en ဆိုရင် snapshot မရောက်ခင် fallback voice တစ်ခုမှ မကျန်ဘူး
+    catalog = VoiceCatalog(None, None, str(tmp_path / "voices.json"), fallback_voices=FALLBACK, locales=["en"])
+    assert catalog.locales() == []
+
+    [(text, kwargs)] = show(monkeypatch, catalog)
+    assert "load" in text
+    assert "reply_markup" not in kwargs
+
+
+def test_catalog_voices_are_offered(monkeypatch, tmp_path):
+    catalog = VoiceCatalog(None, None, str(tmp_path / "voices.json"), fallback_voices=FALLBACK)
+
+    [(text, kwargs)] = show(monkeypatch, catalog)
+    assert "my-MM" in text
+    buttons = [button.callback_data for row in kwargs["reply_markup"].inline_keyboard for button in row]
+    assert f"vc:{catalog.find('my-MM-NilarNeural')['id']}:42" in buttons
+
+
+def start_text(monkeypatch, user, ffmpeg_path, format_preference):
+    async def touch(user):
+        return {"voice_preference": "my-MM-NilarNeural", "format_preference": format_preference}
+
+    monkeypatch.setattr(main.profile_cache, "touch", touch)
+    monkeypatch.setattr(main.transcoder, "ffmpeg_path", ffmpeg_path)
+    update = Update()
+    update.effective_user = user
+    asyncio.run(main.start(update, None))
+    [(text, _)] = update.message.replies
+    return text
+
+
+def test_start_shows_the_chosen_format(monkeypatch, make_user):
+    text = start_text(monkeypatch, make_user(7), "ffmpeg", "opus")
+    assert "(MP3)" not in text
+    assert main.AUDIO_FORMAT_DISPLAY_NAMES["opus"] in text
+    assert "Audio format ရွေးချယ်ရန်" in text
+
+
+def test_start_without_ffmpeg_offers_only_voices(monkeypatch, make_user):
+    text = start_text(monkeypatch, make_user(7), None, "opus")
+    assert main.AUDIO_FORMAT_DISPLAY_NAMES["mp3"] in text
+    assert "Audio format ရွေးချယ်ရန်" not in text
@@ -0,0 +1,55 @@
+import asyncio
+from types import SimpleNamespace
+
+from aiohttp.test_utils import TestClient, TestServer
+from telegram import Bot
+
+from webserver import BotWebServer
+
+
+def make_server(maxsize=10):
+    application = SimpleNamespace(bot=Bot("1:test"), update_queue=asyncio.Queue(maxsize))
+    return BotWebServer(application, webhook_path="/hook", secret_token="s3cret")
+
+
+def post(server, *bodies, token="s3cret"):
+    """Body တွေကို server တစ်ခုတည်းဆီ အစဉ်လိုက် ပို့ပြီး status code တွေ ပြန်ပေးမယ်"""
+    async def main():
+        statuses = []
+        async with TestClient(TestServer(server.app)) as client:
+            for body in bodies:
+                response = await client.post(
+                    "/hook", data=body,
+                    headers={"X-Telegram-Bot-Api-Secret-Token": token, "Content-Type": "application/json"}
+                )
+                statuses.append(response.status)
+        return statuses
+
+    return asyncio.run(main())
+
+
+def test_valid_update_is_queued():
+    server = make_server()
+
+    assert post(server, '{"update_id": 1}') == [200]
+    assert server.application.update_queue.get_nowait().update_id == 1
+    assert server.received == 1
+
+
+def test_wrong_secret_token_is_forbidden():
+    assert post(make_server(), '{"update_id": 1}', token="nope") == [403]
+
+
+def test_malformed_bodies_are_rejected_with_400():
+    server = make_server()
+
+    # JSON မဟုတ်တာ၊ dict မဟုတ်တာ၊ Update ပုံစံ မဟုတ်တာ
+    assert post(server, "not json", "[1, 2]", '{"update_id": 1, "message": 5}', "{}") == [400] * 4
+    assert server.application.update_queue.empty()
+
+
+def test_full_update_queue_asks_telegram_to_retry():
+    server = make_server(maxsize=1)
+
+    assert post(server, '{"update_id": 1}', '{"update_id": 2}') == [200, 503]
+    assert server.rejected == 1
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+from metrics import Counter
+from stats import _field
+
+USAGE_EVENTS_DROPPED = Counter(
+    "tts_usage_events_dropped_total", "Usage events dropped because the buffer was full while MongoDB was failing"
+)
+
+# ဒီ result တွေကိုပဲ user က audio ရခဲ့တယ်လို့ ယူမယ်
+SUCCESS_RESULTS = ("generated", "cache_hit", "coalesced")
+
+
+def hour_id(at):
+    return f"hour:{at:%Y-%m-%dT%H}"
+
+
+def day_id(at):
+    return f"day:{at:%Y-%m-%d}"
+
+
+class UsageLog:
+    """Per-request usage events, buffered in memory and written in bulk.
+
+    Every request outcome is appended to an in-memory buffer and, at the
+    same time, folded into $inc deltas for its hourly and daily summary
+    documents. A flush writes the buffered events with one insert_many as
+    one document per hour bucket (raw history, expired after
+    retention_days), then applies the summary deltas with one bulk_write.
+    Reports read only the summary documents, so their cost does not grow
+    with history.
+    """
+
+    def __init__(self, events_col, summaries_col, run_db, flush_interval=10.0, flush_max_pending=500,
+                 max_buffer=20000, bucket_max_events=1000, retention_days=30):
+        self.events_col = events_col
+        self.col = summaries_col
+        self._run_db = run_db
+        self.flush_interval = flush_interval
+        self.flush_max_pending = flush_max_pending
+        self.max_buffer = max_buffer
+        self.bucket_max_events = bucket_max_events
+        self.retention_days = retention_days
+
+        self._events = []
+        self._deltas = {}  # summary _id -> {field: amount}
+        self._flush_lock = asyncio.Lock()
+        self._flusher = None
+        self._early_flush = None
+
+        self.recorded = 0
+        self.written = 0
+        self.flushes = 0
+        self.dropped = 0
+
+    def ensure_indexes(self):
+        # Raw event bucket တွေကို retention_days ကျော်ရင် Mongo က ဖျက်မယ် (summary တွေကတော့ ထားမယ်)
+        try:
+            self.events_col.create_index("start", expireAfterSeconds=self.retention_days * 24 * 3600)
+        except Exception:
+            logging.exception("Usage Log Index Error")
+
+    # --- Events ---
+
+    def _inc(self, doc_id, field, amount=1):
+        fields = self._deltas.setdefault(doc_id, {})
+        fields[field] = fields.get(field, 0) + amount
+
+    def record(self, user_id, voice, chars, result, audio_bytes=0, queue_wait=0.0, synthesis_seconds=0.0):
+        """Request တစ်ခုရဲ့ ရလဒ်ကို buffer ထဲထည့်မယ် (DB call မရှိ)
+
+        chars and audio_bytes count towards the summaries only for
+        successful results; queue_wait and synthesis_seconds are summed so
+        averages can be taken over the requests that had them.
+        """
+        at = datetime.now()
+        ok = result in SUCCESS_RESULTS
+        self._events.append({
+            "at": at, "user_id": user_id, "voice": voice, "chars": chars, "result": result, "ok": ok,
+            "audio_bytes": audio_bytes, "queue_wait": queue_wait, "synthesis_seconds": synthesis_seconds,
+        })
+        self.recorded += 1
+
+        voice = _field(voice)
+        for doc_id in (hour_id(at), day_id(at)):
+            self._inc(doc_id, "requests")
+            self._inc(doc_id, "ok" if ok else "failed")
+            self._inc(doc_id, f"results.{_field(result)}")
+            self._inc(doc_id, f"voices.{voice}.requests")
+            if ok:
+                self._inc(doc_id, "chars", chars)
+                self._inc(doc_id, "audio_bytes", audio_bytes)
+                self._inc(doc_id, f"voices.{voice}.chars", chars)
+            if synthesis_seconds:
+                self._inc(doc_id, "synthesized")
+                self._inc(doc_id, "queue_wait_seconds", queue_wait)
+                self._inc(doc_id, "synthesis_seconds", synthesis_seconds)
+        # Peak hour တွေကို daily document တစ်ခုတည်းကနေ ကြည့်လို့ရအောင်
+        self._inc(day_id(at), f"hours.{at:%H}.requests")
+        if ok:
+            self._inc(day_id(at), f"hours.{at:%H}.chars", chars)
+
+        if len(self._events) >= self.flush_max_pending and not self._flush_lock.locked():
+            self._early_flush = asyncio.get_running_loop().create_task(self.flush())
+
+    # --- Flush ---
+
+    def _buckets(self, events):
+        """Event တွေကို hour bucket document တွေ (တစ်ခုကို bucket_max_events အထိ) အဖြစ် စုမယ်"""
+        buckets = {}
+        for event in events:
+            start = event["at"].replace(minute=0, second=0, microsecond=0)
+            docs = buckets.setdefault(start, [])
+            if not docs or len(docs[-1]["events"]) >= self.bucket_max_events:
+                docs.append({"start": start, "events": []})
+            docs[-1]["events"].append(event)
+        docs = [doc for start in sorted(buckets) for doc in buckets[start]]
+        for doc in docs:
+            doc["count"] = len(doc["events"])
+        return docs
+
+    def _summary_ops(self, deltas):
+        ops = []
+        for doc_id, fields in deltas.items():
+            period, stamp = doc_id.split(":", 1)
+            start = datetime.strptime(stamp, "%Y-%m-%dT%H" if period == "hour" else "%Y-%m-%d")
+            ops.append(UpdateOne(
+                {"_id": doc_id},
+                {"$inc": fields, "$setOnInsert": {"period": period, "start": start}},
+                upsert=True
+            ))
+        return ops
+
+    async def flush(self):
+        """Buffer ထဲက event တွေကို insert_many၊ summary delta တွေကို bulk_write တစ်ခါစီနဲ့ ရေးမယ်"""
+        async with self._flush_lock:
+            if self._events:
+                events, self._events = self._events, []
+                try:
+                    await self._run_db(self.events_col.insert_many, self._buckets(events), ordered=False)
+                    self.written += len(events)
+                except Exception:
+                    logging.exception("Usage Event Flush Error")
+                    # နောက်တစ်ခေါက် ပြန်ရေးမယ်၊ buffer ပြည့်နေရင် အဟောင်းဆုံးတွေကို လွှင့်မယ်
+                    self._events = events + self._events
+                    overflow = len(self._events) - self.max_buffer
+                    if overflow > 0:
+                        del self._events[:overflow]
+                        self.dropped += overflow
+                        USAGE_EVENTS_DROPPED.inc(overflow)
+
+            if self._deltas:
+                deltas, self._deltas = self._deltas, {}
+                try:
+                    await self._run_db(self.col.bulk_write, self._summary_ops(deltas), ordered=False)
+                    self.flushes += 1
+                except Exception:
+                    logging.exception("Usage Summary Flush Error")
+                    for doc_id, fields in deltas.items():
+                        for field, amount in fields.items():
+                            self._inc(doc_id, field, amount)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._flusher is None:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    # --- Reads (summary documents only) ---
+
+    async def report(self, days=7, now=None):
+        """နောက်ဆုံး days ရက်ရဲ့ daily summary နဲ့ နောက်ဆုံး 24 နာရီရဲ့ hourly summary တွေ
+
+        One find by _id over at most days + 24 documents. Returns
+        {"days": [(date, doc)], "last_24h": merged hourly totals,
+        "hours": {"HH": requests}, "voices": {voice: {"requests", "chars"}}},
+        with days oldest first; the newest flush_interval seconds are not
+        included yet.
+        """
+        now = now or datetime.now()
+        day_ids = [day_id(now - timedelta(days=n)) for n in range(days - 1, -1, -1)]
+        hour_ids = [hour_id(now - timedelta(hours=n)) for n in range(23, -1, -1)]
+        docs = await self._run_db(lambda: {doc["_id"]: doc for doc in self.col.find({"_id": {"$in": day_ids + hour_ids}})})
+
+        totals = ("requests", "ok", "failed", "chars", "audio_bytes", "synthesized", "queue_wait_seconds", "synthesis_seconds")
+        last_24h = dict.fromkeys(totals, 0)
+        for doc_id in hour_ids:
+            for field in totals:
+                last_24h[field] += docs.get(doc_id, {}).get(field, 0)
+
+        hours, voices = {}, {}
+        for doc_id in day_ids:
+            doc = docs.get(doc_id, {})
+            for hour, row in doc.get("hours", {}).items():
+                hours[hour] = hours.get(hour, 0) + row.get("requests", 0)
+            for voice, row in doc.get("voices", {}).items():
+                total = voices.setdefault(voice, {"requests": 0, "chars": 0})
+                total["requests"] += row.get("requests", 0)
+                total["chars"] += row.get("chars", 0)
+
+        return {
+            "days": [(doc_id.split(":", 1)[1], docs.get(doc_id, {})) for doc_id in day_ids],
+            "last_24h": last_24h,
+            "hours": hours,
+            "voices": voices,
+        }
+
+    def stats(self):
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "pending": len(self._events),
+            "flushes": self.flushes,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+# Handler တွေ သုံးတဲ့ field အားလုံးကို find_one တစ်ခါတည်းနဲ့ ယူမယ်
+PROFILE_PROJECTION = {"voice_preference": 1, "format_preference": 1, "last_generated": 1, "status": 1}
+
+
+class UserProfileCache:
+    """In-process user profiles with write-behind batching.
+
+    Profiles are loaded once with a combined projection, and voice preference
+    is then served from memory. last_active, generated_count and
+    last_generated writes are coalesced per user and flushed as one bulk_write.
+    """
+
+    def __init__(self, collection, run_db, default_voice, max_items=10000, ttl_seconds=600,
+                 flush_interval=5.0, flush_max_pending=500, stats=None):
+        self.col = collection
+        self._run_db = run_db
+        self.stats_service = stats  # Dashboard counters (optional)
+        if stats:
+            # Recount မလုပ်ခင် ဒီ cache ထဲက user write တွေကို flush ခိုင်းမယ်
+            stats.add_write_buffer(self.flush)
+        self.default_voice = default_voice
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+        self.flush_max_pending = flush_max_pending
+
+        self._profiles = OrderedDict()  # user_id -> (profile dict, loaded_at)
+        self._loading = {}  # user_id -> Future (တစ်ပြိုင်နက် load ထပ်မလုပ်မိအောင်)
+        self._pending = {}  # user_id -> {"set": {}, "inc": {}}
+        self._flush_lock = asyncio.Lock()
+        self._flusher = None
+        self._early_flush = None
+
+        self.requests = 0
+        self.db_ops = 0
+        self.loads = 0
+        self.flushes = 0
+
+    # --- Reads ---
+
+    async def get(self, user_id):
+        """Profile ကို memory ကနေပေးမယ်၊ မရှိ (သို့) သက်တမ်းကုန်ရင် DB ကနေ တစ်ခါပဲ load မယ်"""
+        entry = self._profiles.get(user_id)
+        if entry and time.monotonic() - entry[1] < self.ttl_seconds:
+            self._profiles.move_to_end(user_id)
+            return entry[0]
+
+        if user_id in self._loading:
+            return await asyncio.shield(self._loading[user_id])
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[user_id] = future
+        try:
+            self.db_ops += 1
+            self.loads += 1
+            doc = await self._run_db(self.col.find_one, {"_id": user_id}, PROFILE_PROJECTION)
+            profile = {
+                "voice_preference": self.default_voice,
+                "format_preference": None,  # None = config ထဲက default format
+                "last_generated": datetime.min,
+                "status": None,  # None = DB ထဲမှာ မရှိသေး
+            }
+            if doc:
+                profile.update({k: v for k, v in doc.items() if k != "_id" and v is not None})
+            # Flush မလုပ်ရသေးတဲ့ local ပြောင်းလဲမှုတွေကို DB value နဲ့ မဖုံးမိအောင်
+            pending = self._pending.get(user_id)
+            if pending:
+                profile.update({k: v for k, v in pending["set"].items() if k in profile})
+            self._store(user_id, profile)
+            future.set_result(profile)
+            return profile
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # စောင့်နေသူမရှိရင် "never retrieved" warning မထွက်အောင်
+            raise
+        finally:
+            del self._loading[user_id]
+
+    def _store(self, user_id, profile):
+        self._profiles[user_id] = (profile, time.monotonic())
+        self._profiles.move_to_end(user_id)
+        while len(self._profiles) > self.max_items:
+            self._profiles.popitem(last=False)
+
+    async def get_voice_preference(self, user_id):
+        profile = await self.get(user_id)
+        return profile.get("voice_preference") or self.default_voice
+
+    # --- Writes ---
+
+    def _queue(self, user_id, set_fields=None, inc_fields=None):
+        pending = self._pending.setdefault(user_id, {"set": {}, "inc": {}})
+        pending["set"].update(set_fields or {})
+        for field, amount in (inc_fields or {}).items():
+            pending["inc"][field] = pending["inc"].get(field, 0) + amount
+
+        if len(self._pending) >= self.flush_max_pending and not self._flush_lock.locked():
+            self._early_flush = asyncio.get_running_loop().create_task(self.flush())
+
+    async def touch(self, user):
+        """add_or_update_user အစား: profile ကို load ပြီး last_active ကို write-behind queue ထဲထည့်မယ်"""
+        self.requests += 1
+        profile = await self.get(user.id)
+        if self.stats_service:
+            if profile["status"] is None:
+                self.stats_service.user_added(profile["voice_preference"])
+            else:
+                self.stats_service.status_changed(profile["status"], "active")
+        profile["status"] = "active"
+        self._queue(user.id, {
+            "name": user.first_name,
+            "username": user.username or "None",
+            "status": "active",
+            "last_active": datetime.now()
+        })
+        return profile
+
+    def record_generation(self, user_id):
+        """update_usage_stats အစား: count နဲ့ last_generated ကို memory မှာ ချက်ချင်းပြောင်းပြီး နောက်မှ flush မယ်"""
+        now = datetime.now()
+        entry = self._profiles.get(user_id)
+        if entry:
+            entry[0]["last_generated"] = now
+        self._queue(user_id, {"last_generated": now}, {"generated_count": 1})
+        if self.stats_service:
+            self.stats_service.generated()
+
+    def _insert_defaults(self, fields):
+        """User အသစ်ဆိုရင် ထည့်မယ့် default field တွေ ($set/$inc လုပ်မယ့် fields နဲ့ မထပ်အောင် ဖယ်မယ်)"""
+        defaults = {
+            "joined_at": datetime.now(),
+            "generated_count": 0,
+            "last_generated": datetime.min,
+            "voice_preference": self.default_voice
+        }
+        for field in fields:
+            defaults.pop(field, None)
+        return defaults
+
+    async def _write_through(self, user_id, fields):
+        # touch() ရဲ့ write-behind flush မတိုင်ခင်ဆိုရင် user document မရှိသေးလို့ upsert မယ်
+        # (နောက်မှ flush ရင် document ရှိပြီးသားမို့ သူ့ $setOnInsert က ဒီ fields ကို default နဲ့ မဖုံးတော့ဘူး)
+        self.db_ops += 1
+        await self._run_db(
+            self.col.update_one,
+            {"_id": user_id},
+            {"$set": fields, "$setOnInsert": self._insert_defaults(fields)},
+            upsert=True
+        )
+
+    async def set_voice_preference(self, user_id, voice_code):
+        """Voice ပြောင်းတာက user မြင်ရတဲ့အတွက် write-through လုပ်မယ်"""
+        try:
+            old_voice = (await self.get(user_id)).get("voice_preference")
+            await self._write_through(user_id, {"voice_preference": voice_code})
+        except Exception:
+            logging.exception("DB Voice Update Error")
+            return False
+        entry = self._profiles.get(user_id)
+        if entry:
+            entry[0]["voice_preference"] = voice_code
+        if self.stats_service:
+            self.stats_service.voice_changed(old_voice, voice_code)
+        return True
+
+    async def set_format_preference(self, user_id, fmt):
+        """Output format ကိုလည်း voice လိုပဲ write-through လုပ်မယ်"""
+        try:
+            await self.get(user_id)
+            await self._write_through(user_id, {"format_preference": fmt})
+        except Exception:
+            logging.exception("DB Format Update Error")
+            return False
+        entry = self._profiles.get(user_id)
+        if entry:
+            entry[0]["format_preference"] = fmt
+        return True
+
+    def _build_ops(self, batch):
+        ops = []
+        for user_id, pending in batch.items():
+            update = {}
+            if pending["set"]:
+                update["$set"] = pending["set"]
+            if pending["inc"]:
+                update["$inc"] = pending["inc"]
+            set_on_insert = self._insert_defaults(list(pending["set"]) + list(pending["inc"]))
+            if set_on_insert:
+                update["$setOnInsert"] = set_on_insert
+            ops.append(UpdateOne({"_id": user_id}, update, upsert=True))
+        return ops
+
+    async def flush(self):
+        """Pending write အားလုံးကို bulk_write တစ်ခါတည်းနဲ့ DB ထဲ ရေးမယ်"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            try:
+                self.db_ops += 1
+                await self._run_db(self.col.bulk_write, self._build_ops(batch), ordered=False)
+                self.flushes += 1
+            except Exception:
+                logging.exception("Write-behind Flush Error")
+                # မအောင်မြင်ရင် နောက်တစ်ခေါက် ပြန်ကြိုးစားဖို့ ပြန်ထည့်မယ် (နောက်မှရောက်တဲ့ value က အနိုင်ရမယ်)
+                for user_id, failed in batch.items():
+                    newer = self._pending.get(user_id)
+                    if newer:
+                        failed["set"].update(newer["set"])
+                        for field, amount in newer["inc"].items():
+                            failed["inc"][field] = failed["inc"].get(field, 0) + amount
+                    self._pending[user_id] = failed
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._flusher is None:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self):
+        """Shutdown မှာ flusher ကိုရပ်ပြီး ကျန်နေတာအကုန် flush မယ်"""
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "db_ops": self.db_ops,
+            "ops_per_request": (self.db_ops / self.requests) if self.requests else 0.0,
+            "loads": self.loads,
+            "flushes": self.flushes,
+            "pending": len(self._pending),
+            "cached": len(self._profiles),
+        }
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+CATALOG_DOC_ID = "edge_tts_voices"
+
+# Snapshot ထဲမှာ ဒီ field တွေပဲ သိမ်းမယ်
+_VOICE_FIELDS = ("ShortName", "Gender", "Locale")
+
+
+def voice_id(short_name):
+    """callback_data (64 bytes) ထဲ ဆံ့အောင် voice တစ်ခုကို 6-char id ပေးမယ် (refresh လုပ်လည်း မပြောင်းဘူး)"""
+    return hashlib.sha1(short_name.encode("utf-8")).hexdigest()[:6]
+
+
+def voice_label(short_name, gender=None):
+    # "my-MM-ThihaNeural" -> "Thiha (Male)"
+    name = short_name.split("-", 2)[-1]
+    if name.endswith("Neural"):
+        name = name[:-len("Neural")]
+    return f"{name} ({gender})" if gender else name
+
+
+class VoiceCatalog:
+    """edge-tts voice list served from memory, refreshed in the background.
+
+    The list is fetched with edge_tts.list_voices() at most once per
+    ttl_seconds and persisted both to a local JSON file and to MongoDB, so a
+    restart (or another instance) loads it without a network call. Until a
+    snapshot is loaded the catalog serves only the configured fallback
+    voices. Lookups by short id, by locale and by (locale, gender) are dict
+    reads on indexes built once per snapshot.
+    """
+
+    def __init__(self, collection, run_db, snapshot_path, ttl_seconds=7 * 24 * 3600,
+                 fallback_voices=None, display_names=None, locales=None):
+        self.col = collection
+        self._run_db = run_db
+        self.snapshot_path = snapshot_path
+        self.ttl_seconds = ttl_seconds
+        self.display_names = display_names or {}
+        # Operator က ခွင့်ပြုထားတဲ့ locale prefix တွေ (ဥပမာ "my", "en-US")၊ အလွတ်ဆိုရင် အကုန်
+        self.locales_allowed = tuple(locales or ())
+        self._task = None
+
+        self.fetched_at = None
+        self.source = "fallback"
+        self.fetches = 0
+        self.fetch_errors = 0
+        self._by_id, self._by_name, self._by_locale, self._by_gender, self._locales = {}, {}, {}, {}, []
+        self._index(fallback_voices or [])
+
+    # --- Indexes ---
+
+    def _allowed(self, locale):
+        return not self.locales_allowed or any(
+            locale == prefix or locale.startswith(prefix + "-") for prefix in self.locales_allowed
+        )
+
+    def _index(self, voices):
+        by_id, by_name, by_locale, by_gender = {}, {}, {}, {}
+        for voice in sorted(voices, key=lambda v: (v["Locale"], v["Gender"], v["ShortName"])):
+            if not self._allowed(voice["Locale"]):
+                continue
+            voice = {field: voice.get(field) for field in _VOICE_FIELDS}
+            voice["id"] = voice_id(voice["ShortName"])
+            by_id[voice["id"]] = voice
+            by_name[voice["ShortName"]] = voice
+            by_locale.setdefault(voice["Locale"], []).append(voice)
+            by_gender.setdefault((voice["Locale"], voice["Gender"]), []).append(voice)
+        if not by_id:
+            return False
+        # Dict တွေကို အသစ်တစ်ခါတည်း လဲလိုက်လို့ handler တွေက တစ်ဝက်တစ်ပျက် index ကို မမြင်ရဘူး
+        self._by_id, self._by_name, self._by_locale, self._by_gender = by_id, by_name, by_locale, by_gender
+        self._locales = sorted(by_locale)
+        return True
+
+    # --- Lookups (hot path, memory only) ---
+
+    def get(self, short_id):
+        return self._by_id.get(short_id)
+
+    def find(self, short_name):
+        return self._by_name.get(short_name)
+
+    def locales(self):
+        return self._locales
+
+    def voices(self, locale, gender=None):
+        if gender:
+            return self._by_gender.get((locale, gender), [])
+        return self._by_locale.get(locale, [])
+
+    def display_name(self, short_name):
+        if short_name in self.display_names:
+            return self.display_names[short_name]
+        voice = self._by_name.get(short_name)
+        return voice_label(short_name, voice["Gender"] if voice else None)
+
+    # --- Persistence ---
+
+    def _read_file(self):
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            return snapshot["voices"], datetime.fromtimestamp(snapshot["fetched_at"])
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logging.exception("Voice Catalog File Error")
+            return None
+
+    def _write_file(self, voices, fetched_at):
+        # တစ်ဝက်ရေးထားတဲ့ file မကျန်အောင် temp file ကို rename မယ်
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fetched_at": fetched_at.timestamp(), "voices": voices}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception:
+            logging.exception("Voice Catalog File Write Error")
+
+    async def _read_db(self):
+        try:
+            doc = await self._run_db(self.col.find_one, {"_id": CATALOG_DOC_ID})
+        except Exception:
+            logging.exception("Voice Catalog DB Error")
+            return None
+        return (doc["voices"], doc["fetched_at"]) if doc else None
+
+    def _stale(self, fetched_at):
+        return (datetime.now() - fetched_at).total_seconds() >= self.ttl_seconds
+
+    def _use(self, snapshot, source):
+        voices, fetched_at = snapshot
+        if self._index(voices):
+            self.fetched_at = fetched_at
+            self.source = source
+            return True
+        return False
+
+    # --- Background load / refresh ---
+
+    async def refresh(self):
+        """edge-tts ကနေ voice list ပြန်ယူပြီး file + Mongo ထဲ သိမ်းမယ်"""
+        import edge_tts
+
+        self.fetches += 1
+        voices = [
+            {field: voice[field] for field in _VOICE_FIELDS}
+            for voice in await edge_tts.list_voices()
+        ]
+        fetched_at = datetime.now()
+        if not self._use((voices, fetched_at), "edge-tts"):
+            raise ValueError("edge-tts returned no usable voices")
+        await asyncio.to_thread(self._write_file, voices, fetched_at)
+        await self._run_db(
+            self.col.replace_one,
+            {"_id": CATALOG_DOC_ID},
+            {"voices": voices, "fetched_at": fetched_at},
+            upsert=True
+        )
+        logging.info(f"Voice catalog refreshed: {len(self._by_id)} voices, {len(self._locales)} locales")
+
+    async def _load(self):
+        """File -> Mongo -> edge-tts အစဉ်အတိုင်း ရှာမယ်၊ သက်တမ်းကုန်နေရင်လည်း အရင်သုံးထားပြီး နောက်မှ refresh မယ်"""
+        snapshot = await asyncio.to_thread(self._read_file)
+        if snapshot and self._use(snapshot, "file") and not self._stale(snapshot[1]):
+            return
+        db_snapshot = await self._read_db()
+        if db_snapshot and (not snapshot or db_snapshot[1] > snapshot[1]) and self._use(db_snapshot, "mongo"):
+            await asyncio.to_thread(self._write_file, *db_snapshot)
+            if not self._stale(db_snapshot[1]):
+                return
+
+        delay = 30
+        while True:
+            try:
+                await self.refresh()
+                return
+            except Exception:
+                self.fetch_errors += 1
+                logging.warning("Voice catalog refresh failed, keeping current voices", exc_info=True)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 3600)
+
+    async def _run(self):
+        while True:
+            await self._load()
+            await asyncio.sleep(max(self.ttl_seconds - (datetime.now() - self.fetched_at).total_seconds(), 60))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        return {
+            "voices": len(self._by_id),
+            "locales": len(self._locales),
+            "source": self.source,
+            "age_hours": (time.time() - self.fetched_at.timestamp()) / 3600 if self.fetched_at else None,
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+        }
@@ -0,0 +1,88 @@
+import asyncio
+import hmac
+import logging
+
+from aiohttp import web
+from telegram import Update
+
+import metrics
+
+HEALTH_TEXT = "Bot is running with Advanced Logic!"
+
+
+class BotWebServer:
+    """aiohttp server running on the bot's own event loop.
+
+    Serves the keep-alive health route and the Prometheus /metrics route and,
+    in webhook mode, receives Telegram updates and puts them on the
+    application's bounded update_queue.
+    """
+
+    def __init__(self, application, host="0.0.0.0", port=5000, webhook_path=None, secret_token=None,
+                 metrics_path="/metrics"):
+        self.application = application
+        self.host = host
+        self.port = port
+        self.webhook_path = webhook_path
+        self.secret_token = secret_token
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/", self.health)
+        if metrics_path:
+            self.app.router.add_get(metrics_path, self.metrics)
+        if webhook_path:
+            self.app.router.add_post(webhook_path, self.webhook)
+
+        self.received = 0
+        self.rejected = 0
+
+    async def health(self, request):
+        return web.Response(text=HEALTH_TEXT)
+
+    async def metrics(self, request):
+        return web.Response(
+            body=metrics.render().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+    async def webhook(self, request):
+        # setWebhook မှာပေးထားတဲ့ secret_token နဲ့ မကိုက်ရင် လက်မခံဘူး
+        if self.secret_token:
+            token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+            if not hmac.compare_digest(token, self.secret_token):
+                return web.Response(status=403)
+
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+
+        try:
+            update = Update.de_json(data, self.application.bot)
+        except Exception:
+            # JSON မှန်ပေမယ့် Update ပုံစံ မဟုတ်ရင် 500 ပြန်လို့ Telegram က ထပ်ခါထပ်ခါ ပြန်ပို့နေမှာမို့ 400 ပြန်မယ်
+            logging.warning("Malformed webhook update", exc_info=True)
+            return web.Response(status=400)
+
+        try:
+            self.application.update_queue.put_nowait(update)
+        except asyncio.QueueFull:
+            # Queue ပြည့်နေရင် 503 ပြန်ပြီး Telegram ကို နောက်မှ ပြန်ပို့ခိုင်းမယ် (backpressure)
+            self.rejected += 1
+            logging.warning("Update queue full, asking Telegram to retry")
+            return web.Response(status=503)
+
+        self.received += 1
+        return web.Response()
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logging.info(f"Web server listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,309 @@
+"""Synthesis worker processes for SYNTH_MODE=queue.
+
+The bot front end validates requests and inserts jobs into the "jobs"
+collection; these workers claim them, synthesize the audio and send it to the
+user. Run any number of them, on any machine that can reach MongoDB:
+
+    BOT_TOKEN=... MONGO_URI=mongodb://localhost:27017 ADMIN_ID=... python worker.py --processes 4
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from datetime import datetime
+
+from telegram import Bot
+
+import async_db
+from audio_cache import AudioCache
+from audio_format import AudioTranscoder, AUDIO_FORMATS, DEFAULT_FORMAT
+from database import db, users_col
+from edge_pool import EdgeConnectionPool
+from jobs import JobQueue
+from stats import StatsService
+from resilience import RetryBudget, SynthesisPolicy
+from synthesis import synthesize_long
+from usage_log import UsageLog
+from user_cache import UserProfileCache
+
+from config import (
+    TOKEN, TELEGRAM_BASE_URL, DEFAULT_VOICE, FFMPEG_PATH, FFMPEG_TIMEOUT, AUDIO_CACHE_MAX_ITEMS, AUDIO_CACHE_TTL_SECONDS, AUDIO_SPOOL_MAX_BYTES,
+    CHUNK_CHARS, CHUNK_CONCURRENCY, CHUNK_RETRIES, EDGE_TTS_POOL_SIZE, EDGE_TTS_POOL_IDLE_SECONDS,
+    EDGE_TTS_STALL_TIMEOUT, EDGE_TTS_ATTEMPT_TIMEOUT, EDGE_TTS_RETRY_BACKOFF, EDGE_TTS_RETRY_BACKOFF_MAX,
+    EDGE_TTS_RETRY_BUDGET_RATIO, EDGE_TTS_RETRY_BUDGET_MIN_PER_SECOND,
+    EDGE_TTS_HEDGE, EDGE_TTS_HEDGE_PERCENTILE, EDGE_TTS_HEDGE_MIN_DELAY,
+    PROFILE_CACHE_MAX_ITEMS, PROFILE_CACHE_TTL_SECONDS, PROFILE_FLUSH_INTERVAL_SECONDS, PROFILE_FLUSH_MAX_PENDING,
+    STATS_MAX_STALENESS_SECONDS, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY,
+    WORKER_PROCESSES, WORKER_CONCURRENCY, WORKER_POLL_INTERVAL,
+    USAGE_FLUSH_INTERVAL_SECONDS, USAGE_FLUSH_MAX_PENDING, USAGE_EVENTS_RETENTION_DAYS
+)
+
+job_queue = JobQueue(
+    db["jobs"], async_db.run_db,
+    lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS, retry_delay=JOB_RETRY_DELAY
+)
+audio_cache = AudioCache(
+    db["audio_cache"], async_db.run_db,
+    max_items=AUDIO_CACHE_MAX_ITEMS, ttl_seconds=AUDIO_CACHE_TTL_SECONDS
+)
+stats_service = StatsService(
+    users_col, db["counters"], async_db.run_db,
+    max_staleness=STATS_MAX_STALENESS_SECONDS, flush_interval=PROFILE_FLUSH_INTERVAL_SECONDS
+)
+# generated_count တွေကို front end လိုပဲ batch နဲ့ ရေးမယ်
+profile_cache = UserProfileCache(
+    users_col, async_db.run_db, DEFAULT_VOICE,
+    max_items=PROFILE_CACHE_MAX_ITEMS, ttl_seconds=PROFILE_CACHE_TTL_SECONDS,
+    flush_interval=PROFILE_FLUSH_INTERVAL_SECONDS, flush_max_pending=PROFILE_FLUSH_MAX_PENDING,
+    stats=stats_service
+)
+# Queue mode မှာ request ရဲ့ ရလဒ်ကို worker က usage log ထဲ မှတ်မယ်
+usage_log = UsageLog(
+    db["usage_events"], db["usage_summaries"], async_db.run_db,
+    flush_interval=USAGE_FLUSH_INTERVAL_SECONDS, flush_max_pending=USAGE_FLUSH_MAX_PENDING,
+    retention_days=USAGE_EVENTS_RETENTION_DAYS
+)
+
+
+class SynthesisWorker:
+    """Claims jobs from a JobQueue and delivers the audio with its own Bot.
+
+    Runs `concurrency` claim loops. While a job runs, a heartbeat extends its
+    lease every lease/3 seconds; if the process dies, the lease expires and
+    another worker picks the job up.
+    """
+
+    def __init__(self, name, bot, job_queue, audio_cache, profile_cache, concurrency=2,
+                 poll_interval=1.0, spool_max_bytes=AUDIO_SPOOL_MAX_BYTES, edge_pool=None, transcoder=None,
+                 usage_log=None, policy=None):
+        self.name = name
+        self.bot = bot
+        self.job_queue = job_queue
+        self.audio_cache = audio_cache
+        self.profile_cache = profile_cache
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.spool_max_bytes = spool_max_bytes
+        self.edge_pool = edge_pool
+        self.transcoder = transcoder
+        self.usage_log = usage_log
+        self.policy = policy
+
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    async def run(self, stop_event):
+        """stop_event set ဖြစ်ရင် job အသစ်မယူတော့ဘဲ လက်ရှိ job တွေ ပြီးမှ ပြန်မယ်"""
+        await asyncio.gather(*(self._claim_loop(stop_event) for _ in range(self.concurrency)))
+
+    async def _claim_loop(self, stop_event):
+        while not stop_event.is_set():
+            try:
+                # Worker တွေကို အကြိမ်ကြိမ် ပျက်စေခဲ့တဲ့ job တွေကို claim မပေးဘဲ ဒီမှာ failed လုပ်မယ်
+                exhausted = await self.job_queue.fail_exhausted(self.name)
+                if exhausted:
+                    await self._give_up(exhausted)
+                    continue
+                job = await self.job_queue.claim(self.name)
+            except Exception:
+                logging.exception("Job Claim Error")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(stop_event.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.process(job)
+
+    async def _heartbeat(self, job_id):
+        while True:
+            await asyncio.sleep(self.job_queue.lease_seconds / 3)
+            try:
+                if not await self.job_queue.heartbeat(job_id, self.name):
+                    logging.warning(f"Lost lease on job {job_id}")
+                    return
+            except Exception:
+                logging.exception("Job Heartbeat Error")
+
+    async def _edit_status(self, job, text):
+        try:
+            await self.bot.edit_message_text(chat_id=job["chat_id"], message_id=job["status_message_id"], text=text)
+        except Exception:
+            logging.debug("Job status edit failed", exc_info=True)
+
+    async def _delete_status(self, job):
+        try:
+            await self.bot.delete_message(chat_id=job["chat_id"], message_id=job["status_message_id"])
+        except Exception:
+            pass
+
+    async def _give_up(self, job):
+        """fail_exhausted() က failed လုပ်ခဲ့တဲ့ job ရဲ့ user ကို အကြောင်းကြားမယ်"""
+        logging.warning(f"Job {job['_id']} failed: lease expired {job['attempts']} times")
+        self.failed += 1
+        if self.usage_log:
+            self.usage_log.record(job["user_id"], job["voice"], len(job["text"]), "error")
+        await self._edit_status(job, "Sorry, an error occurred during generation.")
+
+    async def process(self, job):
+        voice_display = job["voice_display"]
+        heartbeat = asyncio.ensure_future(self._heartbeat(job["_id"]))
+        audio = None
+        # Retry ဖြစ်ခဲ့ရင် ဒီ attempt မတိုင်ခင် စောင့်ခဲ့ရတာ အကုန်ပါမယ်
+        queue_wait = (datetime.now() - job["created_at"]).total_seconds()
+        started = time.monotonic()
+        try:
+            await self._edit_status(job, f"Generating Audio with {voice_display}... 🎵")
+            audio, audio_size = await synthesize_long(
+                job["text"], job["voice"], self.spool_max_bytes,
+                chunk_chars=CHUNK_CHARS, concurrency=CHUNK_CONCURRENCY, retries=CHUNK_RETRIES,
+                pool=self.edge_pool, policy=self.policy
+            )
+            synthesis_seconds = time.monotonic() - started
+            if audio_size == 0:
+                raise ValueError("Audio file empty")
+
+            # Format မပါတဲ့ အဟောင်း job တွေက MP3
+            audio_format = job.get("format", DEFAULT_FORMAT)
+            if self.transcoder:
+                audio, audio_size, audio_format = await self.transcoder.convert(
+                    audio, audio_size, audio_format, len(job["text"])
+                )
+            else:
+                audio_format = DEFAULT_FORMAT
+            spec = AUDIO_FORMATS[audio_format]
+            if spec["voice_note"]:
+                sent = await self.bot.send_voice(
+                    chat_id=job["chat_id"],
+                    voice=audio.read(),
+                    filename=f"voice.{spec['extension']}",
+                    caption=f"Generated with {voice_display}"
+                )
+                file_id = sent.voice.file_id if sent.voice else None
+            else:
+                sent = await self.bot.send_audio(
+                    chat_id=job["chat_id"],
+                    audio=audio.read(),
+                    filename=f"voice.{spec['extension']}",
+                    title=f"Voice-{job['created_at'].strftime('%H%M%S')}",
+                    performer=f"Bot AI ({voice_display})",
+                    caption=f"Generated with {voice_display}"
+                )
+                file_id = sent.audio.file_id if sent.audio else None
+            if file_id:
+                await self.audio_cache.put(job["text"], job["voice"], file_id, audio_format)
+            self.profile_cache.record_generation(job["user_id"])
+            if self.usage_log:
+                self.usage_log.record(
+                    job["user_id"], job["voice"], len(job["text"]), "generated",
+                    audio_bytes=audio_size, queue_wait=queue_wait, synthesis_seconds=synthesis_seconds
+                )
+            await self.job_queue.complete(job["_id"], self.name, file_id=file_id)
+            await self._delete_status(job)
+            self.completed += 1
+        except asyncio.CancelledError:
+            await self.job_queue.release(job["_id"], self.name)
+            raise
+        except Exception as e:
+            logging.exception(f"Job {job['_id']} failed (attempt {job['attempts']})")
+            if await self.job_queue.retry_or_fail(job, self.name, repr(e)):
+                self.retried += 1
+            else:
+                self.failed += 1
+                if self.usage_log:
+                    self.usage_log.record(job["user_id"], job["voice"], len(job["text"]), "error", queue_wait=queue_wait)
+                await self._edit_status(job, "Sorry, an error occurred during generation.")
+        finally:
+            heartbeat.cancel()
+            if audio is not None:
+                audio.close()
+
+
+async def serve(name, concurrency):
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    bot = Bot(TOKEN, base_url=TELEGRAM_BASE_URL)
+    edge_pool = EdgeConnectionPool(
+        size=EDGE_TTS_POOL_SIZE, idle_timeout=EDGE_TTS_POOL_IDLE_SECONDS
+    ) if EDGE_TTS_POOL_SIZE > 0 else None
+    transcoder = AudioTranscoder(FFMPEG_PATH, spool_max_bytes=AUDIO_SPOOL_MAX_BYTES, timeout=FFMPEG_TIMEOUT)
+    policy = SynthesisPolicy(
+        retries=CHUNK_RETRIES, attempt_timeout=EDGE_TTS_ATTEMPT_TIMEOUT, stall_timeout=EDGE_TTS_STALL_TIMEOUT,
+        backoff_base=EDGE_TTS_RETRY_BACKOFF, backoff_max=EDGE_TTS_RETRY_BACKOFF_MAX,
+        hedge=EDGE_TTS_HEDGE, hedge_percentile=EDGE_TTS_HEDGE_PERCENTILE, hedge_min_delay=EDGE_TTS_HEDGE_MIN_DELAY,
+        budget=RetryBudget(ratio=EDGE_TTS_RETRY_BUDGET_RATIO, min_per_second=EDGE_TTS_RETRY_BUDGET_MIN_PER_SECOND)
+    )
+    worker = SynthesisWorker(
+        name, bot, job_queue, audio_cache, profile_cache,
+        concurrency=concurrency, poll_interval=WORKER_POLL_INTERVAL, edge_pool=edge_pool, transcoder=transcoder,
+        usage_log=usage_log, policy=policy
+    )
+    async with bot:
+        profile_cache.start()
+        stats_service.start()
+        usage_log.start()
+        if edge_pool:
+            edge_pool.start()
+        logging.info(f"Worker {name} started with {concurrency} slots")
+        try:
+            await worker.run(stop_event)
+        finally:
+            if edge_pool:
+                await edge_pool.stop()
+            await profile_cache.stop()
+            await stats_service.stop()
+            await usage_log.stop()
+            async_db.shutdown()
+    logging.info(f"Worker {name} stopped: {worker.completed} done, {worker.retried} retried, {worker.failed} failed")
+    logging.info(f"Worker {name} edge-tts: {policy.stats()}")
+
+
+def run_process(concurrency):
+    logging.basicConfig(format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s', level=logging.INFO)
+    asyncio.run(serve(f"{socket.gethostname()}:{os.getpid()}", concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS synthesis workers")
+    parser.add_argument("--processes", type=int, default=WORKER_PROCESSES)
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY, help="jobs per process")
+    args = parser.parse_args()
+
+    job_queue.ensure_indexes()
+    audio_cache.ensure_indexes()
+    usage_log.ensure_indexes()
+    if args.processes <= 1:
+        run_process(args.concurrency)
+        return
+
+    # Process တိုင်းမှာ ကိုယ်ပိုင် event loop / Mongo client / Bot ရှိအောင် spawn သုံးမယ်
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_process, args=(args.concurrency,), name=f"worker-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()